@@ -4,6 +4,7 @@ from .security import (
     create_refresh_token,
     verify_password,
     get_password_hash,
+    password_hasher,
 )
 from .logging import setup_logging
 
@@ -13,5 +14,6 @@ __all__ = [
     "create_refresh_token",
     "verify_password",
     "get_password_hash",
+    "password_hasher",
     "setup_logging",
 ]
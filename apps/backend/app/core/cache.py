@@ -0,0 +1,152 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+from uuid import UUID
+
+from .config import settings
+
+
+class TTLCache:
+    """Bounded in-process LRU cache with per-entry time to live.
+    
+    A ``maxsize`` of 0 disables the cache: every lookup is a miss and
+    nothing is stored.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Hashable) -> Any | None:
+        """Return the cached value or None if missing or expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.evictions += 1
+            self.misses += 1
+            return None
+        
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """Store a value, evicting the least recently used entry if full."""
+        if self.maxsize <= 0:
+            return
+        
+        expires_in = self.ttl if ttl is None else ttl
+        self._data[key] = (time.monotonic() + expires_in, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry."""
+        self._data.pop(key, None)
+    
+    def clear(self) -> None:
+        """Drop all entries and reset counters."""
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def stats(self) -> dict[str, int]:
+        """Return cache counters."""
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class TokenEpochTable:
+    """Current access-token epoch of every user whose epoch was bumped.
+    
+    Users missing from the table are at epoch 0. Local bumps are applied
+    once committed; changes made by other workers are picked up when the
+    table is reloaded after ``refresh_interval`` seconds.
+    """
+    
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self._epochs: dict[UUID, int] = {}
+        self._loaded_at: float | None = None
+    
+    def is_stale(self) -> bool:
+        """Check whether the table should be reloaded."""
+        if self._loaded_at is None:
+            return True
+        return time.monotonic() - self._loaded_at >= self.refresh_interval
+    
+    def replace(self, epochs: dict[UUID, int]) -> None:
+        """
+        Replace the table with freshly loaded epochs.
+        
+        Epochs only grow, so a bump applied while the load was running is
+        kept rather than overwritten by the older value.
+        """
+        merged = dict(self._epochs)
+        for user_id, epoch in epochs.items():
+            merged[user_id] = max(epoch, merged.get(user_id, 0))
+        self._epochs = merged
+        self._loaded_at = time.monotonic()
+    
+    def get(self, user_id: UUID) -> int:
+        """Return the current epoch of a user."""
+        return self._epochs.get(user_id, 0)
+    
+    def set(self, user_id: UUID, epoch: int) -> None:
+        """Record a locally bumped epoch, ignoring one older than known."""
+        self._epochs[user_id] = max(epoch, self._epochs.get(user_id, 0))
+    
+    def clear(self) -> None:
+        """Forget all epochs and force a reload."""
+        self._epochs.clear()
+        self._loaded_at = None
+
+
+# Authenticated principals keyed by user id
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+# List totals keyed by table and normalized filters
+count_cache = TTLCache(
+    maxsize=settings.COUNT_CACHE_SIZE,
+    ttl=settings.COUNT_CACHE_TTL_SECONDS,
+)
+
+# Access-token epochs keyed by user id
+token_epochs = TokenEpochTable(
+    refresh_interval=settings.TOKEN_EPOCH_REFRESH_SECONDS,
+)
+
+
+async def invalidate_principals(epochs: dict[UUID, int]) -> None:
+    """
+    Apply committed token epochs and drop the users' cached principals.
+    
+    Run with after_commit: applied earlier, a request could cache the old
+    row again before the change is committed, and a rolled back change
+    would leave epochs the database never stored.
+    """
+    for user_id, epoch in epochs.items():
+        token_epochs.set(user_id, epoch)
+        principal_cache.invalidate(user_id)
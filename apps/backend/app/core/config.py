@@ -21,6 +21,53 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    MAX_ACTIVE_SESSIONS_PER_USER: int = 10
+    
+    # Refresh token reaper
+    TOKEN_REAPER_ENABLED: bool = True
+    TOKEN_REAPER_INTERVAL_SECONDS: float = 3600.0
+    TOKEN_REAPER_BATCH_SIZE: int = 1000
+    TOKEN_REAPER_BATCH_PAUSE_SECONDS: float = 0.1
+    REVOKED_TOKEN_RETENTION_HOURS: int = 24
+    
+    # Password hashing pool
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    
+    # Principal cache (0 disables caching)
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0
+    
+    # Cached list totals for total=estimate
+    COUNT_CACHE_SIZE: int = 1024
+    COUNT_CACHE_TTL_SECONDS: float = 10.0
+    
+    # Route response cache: "memory" (per process), "redis" (shared) or "none"
+    RESPONSE_CACHE_BACKEND: str = "memory"
+    RESPONSE_CACHE_REDIS_URL: str = "redis://redis:6379/0"
+    RESPONSE_CACHE_SIZE: int = 2048
+    RESPONSE_CACHE_TTL_SECONDS: float = 60.0
+    RESPONSE_CACHE_ROUTE_DETAIL: bool = True
+    RESPONSE_CACHE_ROUTE_LIST: bool = True
+    
+    # Bulk route import
+    ROUTE_IMPORT_BATCH_SIZE: int = 500
+    ROUTE_IMPORT_MAX_ITEMS: int = 10000
+    
+    # Bulk status changes selected by filter
+    ROUTE_BULK_STATUS_MAX_ROUTES: int = 5000
+    
+    # Route statistics recount correcting drift of the incremental totals
+    ROUTE_STATS_RECONCILE_ENABLED: bool = True
+    ROUTE_STATS_RECONCILE_INTERVAL_SECONDS: float = 900.0
+    # How long a pass waits to lock writers out before skipping
+    ROUTE_STATS_RECONCILE_LOCK_TIMEOUT_SECONDS: float = 2.0
+    
+    # Responses stored for Idempotency-Key replays
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+    
+    # How often each worker reloads access-token epochs from the database
+    TOKEN_EPOCH_REFRESH_SECONDS: float = 30.0
     
     # CORS
     CORS_ORIGINS: list[str] = ["http://localhost:3000", "http://localhost:5173"]
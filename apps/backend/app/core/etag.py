@@ -0,0 +1,40 @@
+import hashlib
+
+from fastapi import Request, Response
+
+# Responses depend on the caller's token, so only the browser may keep them,
+# and it has to revalidate them on every use
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: object) -> str:
+    """Build a strong ETag from the version parts of a resource."""
+    raw = "|".join(str(part) for part in parts)
+    return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check the If-None-Match header of a request against an ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+def cache_headers(etag: str) -> dict[str, str]:
+    """Headers sent with cacheable responses."""
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response for a matching ETag."""
+    return Response(status_code=304, headers=cache_headers(etag))
+
+
+def cached_json_response(etag: str, body: bytes) -> Response:
+    """JSON response from an already serialized body."""
+    return Response(content=body, media_type="application/json", headers=cache_headers(etag))
@@ -95,3 +95,14 @@ class BusinessRuleError(AppException):
             code="BUSINESS_RULE_ERROR",
             message=message,
         )
+
+
+class ServiceUnavailableError(AppException):
+    """Service temporarily overloaded."""
+    
+    def __init__(self, message: str = "Service temporarily unavailable"):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            code="SERVICE_UNAVAILABLE",
+            message=message,
+        )
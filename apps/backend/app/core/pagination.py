@@ -0,0 +1,22 @@
+import base64
+import json
+from datetime import datetime
+from uuid import UUID
+
+from .exceptions import ValidationError
+
+
+def encode_cursor(created_at: datetime, item_id: UUID) -> str:
+    """Encode a keyset position as an opaque cursor string."""
+    raw = json.dumps({"c": created_at.isoformat(), "i": str(item_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """Decode a cursor produced by encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data["c"]), UUID(data["i"])
+    except (ValueError, KeyError, TypeError):
+        raise ValidationError("Invalid cursor", details=[{"field": "cursor", "message": "Malformed cursor"}])
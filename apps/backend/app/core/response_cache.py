@@ -0,0 +1,307 @@
+import asyncio
+import hashlib
+import uuid
+from typing import Any, Protocol
+from urllib.parse import urlsplit
+
+from .cache import TTLCache
+from .config import settings
+from .logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class CacheBackendError(Exception):
+    """The cache backend could not serve a command."""
+
+
+class CacheBackend(Protocol):
+    """Key-value store used by the response cache."""
+    
+    async def get_many(self, keys: list[str]) -> list[bytes | None]: ...
+    
+    async def set(self, key: str, value: bytes, ttl: float) -> None: ...
+    
+    async def delete(self, *keys: str) -> None: ...
+
+
+class MemoryCacheBackend:
+    """In-process LRU backend; invalidations are only seen by this process."""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+    
+    async def get_many(self, keys: list[str]) -> list[bytes | None]:
+        return [self._cache.get(key) for key in keys]
+    
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._cache.set(key, value, ttl)
+    
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._cache.invalidate(key)
+    
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+class RedisCacheBackend:
+    """Backend speaking the Redis protocol (RESP) over a small connection pool."""
+    
+    def __init__(self, url: str, max_connections: int = 10, timeout: float = 0.5):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 6379
+        self.password = parts.password
+        self.db = int(parts.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots = asyncio.Semaphore(max_connections)
+    
+    async def get_many(self, keys: list[str]) -> list[bytes | None]:
+        return await self._command("MGET", *keys)
+    
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._command("SET", key, value, "PX", int(ttl * 1000))
+    
+    async def delete(self, *keys: str) -> None:
+        await self._command("DEL", *keys)
+    
+    async def close(self) -> None:
+        """Close idle connections."""
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+    
+    async def _command(self, *args: Any) -> Any:
+        async with self._slots:
+            conn = self._idle.pop() if self._idle else None
+            try:
+                if conn is None:
+                    conn = await self._connect()
+                reply = await asyncio.wait_for(self._roundtrip(conn, args), self.timeout)
+            except CacheBackendError:
+                # Error replies leave the connection usable
+                if conn is not None:
+                    self._idle.append(conn)
+                raise
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                if conn is not None:
+                    conn[1].close()
+                raise CacheBackendError(f"redis {args[0]} failed: {e!r}") from e
+            self._idle.append(conn)
+            return reply
+    
+    async def _connect(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        conn = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port),
+            self.timeout,
+        )
+        try:
+            if self.password:
+                await self._roundtrip(conn, ("AUTH", self.password))
+            if self.db:
+                await self._roundtrip(conn, ("SELECT", self.db))
+        except BaseException:
+            conn[1].close()
+            raise
+        return conn
+    
+    async def _roundtrip(self, conn, args) -> Any:
+        reader, writer = conn
+        writer.write(self._encode(args))
+        await writer.drain()
+        return await self._read_reply(reader)
+    
+    @staticmethod
+    def _encode(args) -> bytes:
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(out)
+    
+    async def _read_reply(self, reader: asyncio.StreamReader) -> Any:
+        line = (await reader.readuntil(b"\r\n"))[:-2]
+        kind, rest = line[:1], line[1:]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise CacheBackendError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            return (await reader.readexactly(length + 2))[:-2]
+        if kind == b"*":
+            count = int(rest)
+            if count < 0:
+                return None
+            return [await self._read_reply(reader) for _ in range(count)]
+        raise CacheBackendError(f"unexpected reply {line!r}")
+
+
+class RouteCache:
+    """Cache of serialized route responses, stored with their ETags.
+    
+    Entries are keyed by version tokens instead of being deleted: every
+    route has its own token, lists share a generation token and creator
+    data embedded in responses has a users token. Invalidation drops a
+    token, so the next reader mints a new one and older entries are
+    never reached again. Backend failures degrade to cache misses.
+    """
+    
+    LIST_GENERATION = "routes:list:generation"
+    USERS_GENERATION = "users:generation"
+    
+    def __init__(
+        self,
+        backend: CacheBackend | None,
+        ttl: float,
+        detail_enabled: bool = True,
+        list_enabled: bool = True,
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.detail_enabled = detail_enabled and backend is not None
+        self.list_enabled = list_enabled and backend is not None
+        self.hits = {"detail": 0, "list": 0}
+        self.misses = {"detail": 0, "list": 0}
+    
+    async def lookup_route(self, route_id: uuid.UUID) -> tuple[str | None, tuple[str, bytes] | None]:
+        """
+        Look up a cached route response.
+        Returns: (key to store the response under, cached (etag, body) or None)
+        """
+        if not self.detail_enabled:
+            return None, None
+        route_key = f"route:{route_id}:version"
+        versions = await self._versions([route_key, self.USERS_GENERATION])
+        if versions is None:
+            return None, None
+        return await self._lookup("detail", f"route:{route_id}:" + ":".join(versions))
+    
+    async def lookup_list(self, params: dict[str, Any]) -> tuple[str | None, tuple[str, bytes] | None]:
+        """
+        Look up a cached route list response by its normalized parameters.
+        Returns: (key to store the response under, cached (etag, body) or None)
+        """
+        if not self.list_enabled:
+            return None, None
+        versions = await self._versions([self.LIST_GENERATION, self.USERS_GENERATION])
+        if versions is None:
+            return None, None
+        normalized = repr(sorted(
+            (name, tuple(sorted(value)) if isinstance(value, list) else value)
+            for name, value in params.items()
+        ))
+        digest = hashlib.sha256(normalized.encode()).hexdigest()[:32]
+        return await self._lookup("list", f"routes:list:{':'.join(versions)}:{digest}")
+    
+    async def store(self, key: str | None, etag: str, body: bytes) -> None:
+        """Store a response under a key returned by a lookup."""
+        if key is None:
+            return
+        try:
+            await self.backend.set(key, etag.encode() + b"\n" + body, self.ttl)
+        except CacheBackendError as e:
+            logger.warning("response_cache_unavailable", error=str(e))
+    
+    async def invalidate_route(self, route_id: uuid.UUID | None = None) -> None:
+        """Drop cached responses of a route (if given) and of all route lists."""
+        keys = [self.LIST_GENERATION]
+        if route_id is not None:
+            keys.append(f"route:{route_id}:version")
+        await self._delete(*keys)
+    
+    async def invalidate_routes(self, route_ids: list[uuid.UUID]) -> None:
+        """Drop cached responses of several routes and of all route lists."""
+        await self._delete(self.LIST_GENERATION, *(f"route:{route_id}:version" for route_id in route_ids))
+    
+    async def invalidate_users(self) -> None:
+        """Drop every cached response embedding user data."""
+        await self._delete(self.USERS_GENERATION)
+    
+    async def close(self) -> None:
+        """Release backend connections."""
+        if isinstance(self.backend, RedisCacheBackend):
+            await self.backend.close()
+    
+    def clear(self) -> None:
+        """Drop all entries of an in-process backend and reset counters."""
+        if isinstance(self.backend, MemoryCacheBackend):
+            self.backend.clear()
+        for counters in (self.hits, self.misses):
+            for name in counters:
+                counters[name] = 0
+    
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Return hit/miss counters and hit ratio per endpoint."""
+        result = {}
+        for name in self.hits:
+            lookups = self.hits[name] + self.misses[name]
+            result[name] = {
+                "hits": self.hits[name],
+                "misses": self.misses[name],
+                "hit_ratio": self.hits[name] / lookups if lookups else 0.0,
+            }
+        return result
+    
+    async def _versions(self, keys: list[str]) -> list[str] | None:
+        """Read version tokens, minting the missing ones."""
+        try:
+            values = await self.backend.get_many(keys)
+            versions = []
+            for key, value in zip(keys, values):
+                if value is None:
+                    value = uuid.uuid4().hex.encode()
+                    await self.backend.set(key, value, self.ttl)
+                versions.append(value.decode())
+            return versions
+        except CacheBackendError as e:
+            logger.warning("response_cache_unavailable", error=str(e))
+            return None
+    
+    async def _lookup(self, name: str, key: str) -> tuple[str | None, tuple[str, bytes] | None]:
+        try:
+            [entry] = await self.backend.get_many([key])
+        except CacheBackendError as e:
+            logger.warning("response_cache_unavailable", error=str(e))
+            return None, None
+        if entry is None:
+            self.misses[name] += 1
+            return key, None
+        self.hits[name] += 1
+        etag, body = entry.split(b"\n", 1)
+        return key, (etag.decode(), body)
+    
+    async def _delete(self, *keys: str) -> None:
+        if self.backend is None:
+            return
+        try:
+            await self.backend.delete(*keys)
+        except CacheBackendError as e:
+            logger.error("response_cache_invalidation_failed", keys=keys, error=str(e))
+
+
+def create_backend(name: str) -> CacheBackend | None:
+    """Create the configured cache backend."""
+    if name == "memory":
+        return MemoryCacheBackend(
+            maxsize=settings.RESPONSE_CACHE_SIZE,
+            ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+        )
+    if name == "redis":
+        return RedisCacheBackend(settings.RESPONSE_CACHE_REDIS_URL)
+    return None
+
+
+route_cache = RouteCache(
+    create_backend(settings.RESPONSE_CACHE_BACKEND),
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    detail_enabled=settings.RESPONSE_CACHE_ROUTE_DETAIL,
+    list_enabled=settings.RESPONSE_CACHE_ROUTE_LIST,
+)
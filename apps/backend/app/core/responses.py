@@ -0,0 +1,21 @@
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+# UTC datetimes end in "Z", as in pydantic's own JSON output
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+
+def dump_json(model: BaseModel) -> bytes:
+    """Serialize a validated response model to JSON bytes."""
+    return orjson.dumps(model.model_dump(), option=ORJSON_OPTIONS)
+
+
+def model_response(model: BaseModel, status_code: int = 200) -> Response:
+    """JSON response for a validated model.
+    
+    Returning a Response makes FastAPI skip validating the result against
+    ``response_model`` again and encoding it with jsonable_encoder; the
+    decorator's response_model then only documents the endpoint.
+    """
+    return Response(content=dump_json(model), status_code=status_code, media_type="application/json")
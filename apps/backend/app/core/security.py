@@ -1,9 +1,16 @@
+import asyncio
+import hashlib
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any
+from typing import Any, Callable, TypeVar
 from jose import jwt
 from passlib.context import CryptContext
 
 from .config import settings
+from .exceptions import ServiceUnavailableError
+
+T = TypeVar("T")
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -18,6 +25,63 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class PasswordHasher:
+    """Runs bcrypt on a bounded thread pool so it never blocks the event loop.
+    
+    At most ``max_pending`` operations may be running or queued at once;
+    further calls are rejected with ServiceUnavailableError instead of
+    piling up behind a login storm.
+    """
+    
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pending = 0
+        self._executor: ThreadPoolExecutor | None = None
+    
+    @property
+    def pending(self) -> int:
+        """Number of operations running or waiting for a worker."""
+        return self._pending
+    
+    async def hash(self, password: str) -> str:
+        """Generate password hash."""
+        return await self._run(get_password_hash, password)
+    
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against a hash."""
+        return await self._run(verify_password, plain_password, hashed_password)
+    
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        if self._pending >= self.max_pending:
+            raise ServiceUnavailableError("Too many concurrent authentication requests, retry later")
+        
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="password-hasher",
+            )
+        
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+    
+    def shutdown(self) -> None:
+        """Stop the worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+
 def create_access_token(data: dict[str, Any], expires_delta: timedelta | None = None) -> str:
     """Create JWT access token."""
     to_encode = data.copy()
@@ -30,6 +94,21 @@ def create_access_token(data: dict[str, Any], expires_delta: timedelta | None =
     return encoded_jwt
 
 
+def access_token_claims(
+    user_id: Any,
+    role: str,
+    must_change_password: bool,
+    token_epoch: int,
+) -> dict[str, Any]:
+    """Build access token claims that let requests authorize without a user query."""
+    return {
+        "sub": str(user_id),
+        "role": role,
+        "mcp": must_change_password,
+        "epoch": token_epoch,
+    }
+
+
 def create_refresh_token(data: dict[str, Any], expires_delta: timedelta | None = None) -> str:
     """Create JWT refresh token."""
     to_encode = data.copy()
@@ -37,11 +116,17 @@ def create_refresh_token(data: dict[str, Any], expires_delta: timedelta | None =
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh"})
+    # jti keeps tokens issued within the same second distinct
+    to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
+def hash_token(token: str) -> str:
+    """Return the fixed-width digest under which a refresh token is stored."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
 def decode_token(token: str) -> dict[str, Any] | None:
     """Decode and validate JWT token."""
     try:
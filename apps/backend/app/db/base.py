@@ -1,5 +1,5 @@
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy import MetaData
+from sqlalchemy import DDL, MetaData, event
 
 # Naming convention for constraints
 convention = {
@@ -15,3 +15,16 @@ class Base(DeclarativeBase):
     """Base class for all database models."""
     
     metadata = MetaData(naming_convention=convention)
+    
+    # Fetch server-generated values with RETURNING as part of each INSERT/UPDATE,
+    # so written objects never need a refresh() round trip
+    __mapper_args__ = {"eager_defaults": True}
+
+
+# Trigram operator classes used by the route search indexes
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
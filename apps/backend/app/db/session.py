@@ -1,7 +1,10 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Awaitable, Callable
 
 from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
 
 engine = create_async_engine(
     settings.DATABASE_URL,
@@ -18,6 +21,26 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    """Dependency for work that outlives the request, such as streamed responses."""
+    return AsyncSessionLocal
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], Awaitable[None]]) -> None:
+    """Run a callback once the request's transaction has been committed."""
+    session.info.setdefault("after_commit", []).append(callback)
+
+
+async def run_after_commit(session: AsyncSession) -> None:
+    """Run and clear callbacks registered with after_commit."""
+    for callback in session.info.pop("after_commit", []):
+        try:
+            await callback()
+        except Exception as e:
+            # The transaction is already committed
+            logger.error("after_commit_callback_failed", error=str(e))
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Dependency for getting database session."""
     async with AsyncSessionLocal() as session:
@@ -25,7 +48,9 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             yield session
             await session.commit()
         except Exception:
+            session.info.pop("after_commit", None)
             await session.rollback()
             raise
         finally:
             await session.close()
+        await run_after_commit(session)
@@ -1,15 +1,18 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 from app.core.config import settings
 from app.core.logging import setup_logging, get_logger
 from app.core.exceptions import AppException
+from app.core.security import password_hasher
+from app.core.response_cache import route_cache
 from app.db.session import engine, AsyncSessionLocal
-from app.db.base import Base
 from app.routers import auth_router, users_router, routes_router
 from app.services.user import UserService
+from app.services.maintenance import token_reaper, route_stats_reconciler
 from app.schemas.common import HealthResponse
 
 # Setup logging
@@ -22,10 +25,6 @@ async def lifespan(app: FastAPI):
     """Application lifespan events."""
     logger.info("application_starting", app_name=settings.APP_NAME)
     
-    # Create tables
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    
     # Create admin user if not exists
     async with AsyncSessionLocal() as session:
         try:
@@ -41,10 +40,23 @@ async def lifespan(app: FastAPI):
             logger.error("admin_creation_failed", error=str(e))
             await session.rollback()
     
+    # Start background maintenance
+    tasks = []
+    if settings.TOKEN_REAPER_ENABLED:
+        tasks.append(asyncio.create_task(token_reaper.run_forever()))
+    if settings.ROUTE_STATS_RECONCILE_ENABLED:
+        tasks.append(asyncio.create_task(route_stats_reconciler.run_forever()))
+    
     logger.info("application_started")
     yield
     
     logger.info("application_stopping")
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    password_hasher.shutdown()
+    await route_cache.close()
     await engine.dispose()
     logger.info("application_stopped")
 
@@ -55,6 +67,7 @@ app = FastAPI(
     version=settings.APP_VERSION,
     description="API для управления маршрутами грузоперевозок и отправками",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
@@ -2,6 +2,9 @@ from .user import User, UserRole
 from .route import Route, RouteStatus
 from .route_stop import RouteStop, StopType
 from .refresh_token import RefreshToken
+from .route_number_counter import RouteNumberCounter
+from .idempotency_key import IdempotencyKey
+from .route_stat import RouteStat, RouteStatDimension
 
 __all__ = [
     "User",
@@ -11,4 +14,8 @@ __all__ = [
     "RouteStop",
     "StopType",
     "RefreshToken",
+    "RouteNumberCounter",
+    "IdempotencyKey",
+    "RouteStat",
+    "RouteStatDimension",
 ]
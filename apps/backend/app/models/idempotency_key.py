@@ -0,0 +1,38 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import String, DateTime, Integer, LargeBinary, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base import Base
+
+
+class IdempotencyKey(Base):
+    """Response stored for an Idempotency-Key sent with a write request."""
+    
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+    
+    # Keys are scoped to the user sending them
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    # SHA-256 hex digest of method, path and body of the first request
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    # Both empty while the first request is still running
+    status_code: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    body: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=datetime.utcnow,
+        nullable=False,
+    )
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    
+    def __repr__(self) -> str:
+        return f"<IdempotencyKey {self.user_id}:{self.key}>"
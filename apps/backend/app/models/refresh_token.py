@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import String, DateTime, ForeignKey, Boolean
+from sqlalchemy import String, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -11,14 +11,18 @@ class RefreshToken(Base):
     """Refresh token model for session management."""
     
     __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        Index("ix_refresh_tokens_user_id_created_at", "user_id", "created_at"),
+    )
     
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
         default=uuid.uuid4,
     )
-    token: Mapped[str] = mapped_column(
-        String(500),
+    # SHA-256 hex digest of the JWT; the token itself is never stored
+    token_hash: Mapped[str] = mapped_column(
+        String(64),
         unique=True,
         index=True,
         nullable=False,
@@ -28,7 +32,17 @@ class RefreshToken(Base):
         ForeignKey("users.id", ondelete="CASCADE"),
         nullable=False,
     )
+    # Tokens rotated from the same login share a family
+    family_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        default=uuid.uuid4,
+        index=True,
+        nullable=False,
+    )
     is_revoked: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    # Set when the token was retired by rotation rather than revoked; such
+    # tokens are kept until they expire so a replay still revokes the family
+    rotated_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     created_at: Mapped[datetime] = mapped_column(
         DateTime,
@@ -40,7 +54,7 @@ class RefreshToken(Base):
     user: Mapped["User"] = relationship(
         "User",
         back_populates="refresh_tokens",
-        lazy="selectin",
+        lazy="raise",
     )
     
     def __repr__(self) -> str:
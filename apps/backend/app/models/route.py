@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from enum import Enum
-from sqlalchemy import String, Text, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import String, Text, DateTime, ForeignKey, Index, Enum as SQLEnum, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -19,6 +19,34 @@ class Route(Base):
     """Route model."""
     
     __tablename__ = "routes"
+    __table_args__ = (
+        # Keyset pagination order of route listings
+        Index("ix_routes_created_at_id", "created_at", "id"),
+        # List filters combined with the same order (also scanned backwards)
+        Index("ix_routes_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_routes_created_by_created_at_id", "created_by", "created_at", "id"),
+        # Hot set: open (draft and active) routes only
+        Index(
+            "ix_routes_open_created_at_id",
+            "created_at",
+            "id",
+            postgresql_where=text("status IN ('DRAFT', 'ACTIVE')"),
+            sqlite_where=text("status IN ('DRAFT', 'ACTIVE')"),
+        ),
+        # Substring search on route number and title (pg_trgm)
+        Index(
+            "ix_routes_route_number_trgm",
+            "route_number",
+            postgresql_using="gin",
+            postgresql_ops={"route_number": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_routes_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
     
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -36,7 +64,6 @@ class Route(Base):
         SQLEnum(RouteStatus),
         default=RouteStatus.DRAFT,
         nullable=False,
-        index=True,
     )
     created_by: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
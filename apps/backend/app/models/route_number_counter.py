@@ -0,0 +1,16 @@
+from sqlalchemy import Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class RouteNumberCounter(Base):
+    """Last route number handed out per year (RT-{year}-{last_value})."""
+    
+    __tablename__ = "route_number_counters"
+    
+    year: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    last_value: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    
+    def __repr__(self) -> str:
+        return f"<RouteNumberCounter {self.year}={self.last_value}>"
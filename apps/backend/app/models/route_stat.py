@@ -0,0 +1,30 @@
+from enum import Enum
+from sqlalchemy import String, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class RouteStatDimension(str, Enum):
+    """What routes are counted by."""
+    
+    STATUS = "status"
+    CREATOR = "creator"
+    CREATED_DAY = "created_day"
+    DEPARTURE_DAY = "departure_day"
+
+
+class RouteStat(Base):
+    """Number of routes in one bucket of a dimension.
+    
+    Buckets are status values, creator ids and ISO dates (UTC days).
+    """
+    
+    __tablename__ = "route_stats"
+    
+    dimension: Mapped[str] = mapped_column(String(20), primary_key=True)
+    bucket: Mapped[str] = mapped_column(String(64), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    
+    def __repr__(self) -> str:
+        return f"<RouteStat {self.dimension}:{self.bucket}={self.count}>"
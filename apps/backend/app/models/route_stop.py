@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from enum import Enum
-from sqlalchemy import String, Text, Integer, DateTime, ForeignKey, Numeric, Enum as SQLEnum, UniqueConstraint
+from sqlalchemy import String, Text, Integer, DateTime, ForeignKey, Index, Numeric, Enum as SQLEnum, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -20,6 +20,13 @@ class RouteStop(Base):
     __tablename__ = "route_stops"
     __table_args__ = (
         UniqueConstraint("route_id", "seq", name="uq_route_stops_route_seq"),
+        # Substring search on stop addresses (pg_trgm)
+        Index(
+            "ix_route_stops_address_trgm",
+            "address",
+            postgresql_using="gin",
+            postgresql_ops={"address": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
     )
     
     id: Mapped[uuid.UUID] = mapped_column(
@@ -54,7 +61,7 @@ class RouteStop(Base):
     route: Mapped["Route"] = relationship(
         "Route",
         back_populates="stops",
-        lazy="selectin",
+        lazy="raise",
     )
     
     def __repr__(self) -> str:
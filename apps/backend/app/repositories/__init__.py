@@ -1,5 +1,7 @@
 from .user import UserRepository
 from .route import RouteRepository
 from .refresh_token import RefreshTokenRepository
+from .idempotency import IdempotencyRepository
+from .route_stats import RouteStatsRepository
 
-__all__ = ["UserRepository", "RouteRepository", "RefreshTokenRepository"]
+__all__ = ["UserRepository", "RouteRepository", "RefreshTokenRepository", "IdempotencyRepository", "RouteStatsRepository"]
@@ -0,0 +1,52 @@
+from typing import Hashable
+from sqlalchemy import Select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.common import TotalMode
+from app.core.cache import count_cache
+
+
+async def count_total(
+    db: AsyncSession,
+    count_query: Select,
+    mode: TotalMode,
+    table_name: str,
+    cache_key: Hashable,
+) -> int | None:
+    """
+    Compute the total for a list endpoint according to the requested mode.
+    
+    ``estimate`` reads planner statistics for unfiltered Postgres lists and
+    otherwise serves an exact count cached for a few seconds per filter set.
+    Returns: total, or None for ``none``
+    """
+    if mode == TotalMode.NONE:
+        return None
+    
+    if mode == TotalMode.EXACT:
+        result = await db.execute(count_query)
+        return result.scalar() or 0
+    
+    key = (table_name, cache_key)
+    total = count_cache.get(key)
+    if total is not None:
+        return total
+    
+    total = None
+    unfiltered = count_query.whereclause is None
+    if unfiltered and db.bind.dialect.name == "postgresql":
+        result = await db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+            {"name": table_name},
+        )
+        estimate = result.scalar()
+        # Never analyzed tables report -1
+        if estimate is not None and estimate >= 0:
+            total = estimate
+    
+    if total is None:
+        result = await db.execute(count_query)
+        total = result.scalar() or 0
+    
+    count_cache.set(key, total)
+    return total
@@ -0,0 +1,94 @@
+from uuid import UUID
+from datetime import datetime
+from sqlalchemy import select, update, delete, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.idempotency_key import IdempotencyKey
+
+
+class IdempotencyRepository:
+    """Repository for stored idempotent responses."""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def reserve(
+        self,
+        user_id: UUID,
+        key: str,
+        fingerprint: str,
+        expires_at: datetime,
+    ) -> bool:
+        """
+        Claim a key for a new request, taking over an expired record.
+        
+        While another transaction holds an uncommitted claim on the same
+        key, the database makes this statement wait for it to finish.
+        Returns: True if the key was claimed, False if a live record exists
+        """
+        table = IdempotencyKey.__table__
+        now = datetime.utcnow()
+        dialect_insert = pg_insert if self.db.bind.dialect.name == "postgresql" else sqlite_insert
+        query = dialect_insert(table).values(
+            user_id=user_id,
+            key=key,
+            fingerprint=fingerprint,
+            created_at=now,
+            expires_at=expires_at,
+        )
+        query = query.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.key],
+            set_={
+                "fingerprint": query.excluded.fingerprint,
+                "status_code": None,
+                "body": None,
+                "created_at": query.excluded.created_at,
+                "expires_at": query.excluded.expires_at,
+            },
+            where=table.c.expires_at <= now,
+        ).returning(table.c.key)
+        result = await self.db.execute(query)
+        return result.first() is not None
+    
+    async def get(self, user_id: UUID, key: str) -> tuple[str, int | None, bytes | None] | None:
+        """
+        Get a stored record.
+        Returns: (fingerprint, status code, body), or None if missing
+        """
+        table = IdempotencyKey.__table__
+        result = await self.db.execute(
+            select(table.c.fingerprint, table.c.status_code, table.c.body)
+            .where(table.c.user_id == user_id, table.c.key == key)
+        )
+        row = result.first()
+        return tuple(row) if row else None
+    
+    async def complete(self, user_id: UUID, key: str, status_code: int, body: bytes) -> None:
+        """Store the response of a claimed key."""
+        table = IdempotencyKey.__table__
+        await self.db.execute(
+            update(table)
+            .where(table.c.user_id == user_id, table.c.key == key)
+            .values(status_code=status_code, body=body)
+        )
+    
+    async def cleanup_expired(self, limit: int | None = None) -> int:
+        """Delete expired records.
+        
+        With a limit only that many rows are deleted, so callers can work
+        through a large backlog in short transactions.
+        """
+        table = IdempotencyKey.__table__
+        condition = table.c.expires_at < datetime.utcnow()
+        
+        query = delete(table)
+        if limit is not None:
+            batch = select(table.c.user_id, table.c.key).where(condition).limit(limit)
+            query = query.where(tuple_(table.c.user_id, table.c.key).in_(batch))
+        else:
+            query = query.where(condition)
+        
+        result = await self.db.execute(query)
+        return result.rowcount or 0
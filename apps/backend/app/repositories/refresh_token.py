@@ -1,9 +1,11 @@
 from uuid import UUID
 from datetime import datetime
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, update, or_, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.refresh_token import RefreshToken
+from app.models.user import User, UserRole
+from app.core.security import hash_token
 
 
 class RefreshTokenRepository:
@@ -14,8 +16,12 @@ class RefreshTokenRepository:
     
     async def get_by_token(self, token: str) -> RefreshToken | None:
         """Get refresh token by token string."""
+        return await self.get_by_token_hash(hash_token(token))
+    
+    async def get_by_token_hash(self, token_hash: str) -> RefreshToken | None:
+        """Get refresh token by its stored digest."""
         result = await self.db.execute(
-            select(RefreshToken).where(RefreshToken.token == token)
+            select(RefreshToken).where(RefreshToken.token_hash == token_hash)
         )
         return result.scalar_one_or_none()
     
@@ -23,36 +29,122 @@ class RefreshTokenRepository:
         """Create a new refresh token."""
         self.db.add(refresh_token)
         await self.db.flush()
-        await self.db.refresh(refresh_token)
         return refresh_token
     
     async def revoke(self, refresh_token: RefreshToken) -> RefreshToken:
         """Revoke a refresh token."""
         refresh_token.is_revoked = True
         await self.db.flush()
-        await self.db.refresh(refresh_token)
         return refresh_token
     
+    async def rotate(self, token_hash: str) -> tuple[UUID, UUID] | None:
+        """
+        Retire an active, unexpired token in a single statement.
+        Returns: (user_id, family_id), or None if the token is not usable
+        """
+        query = (
+            update(RefreshToken)
+            .where(
+                RefreshToken.token_hash == token_hash,
+                RefreshToken.is_revoked == False,
+                RefreshToken.expires_at > datetime.utcnow(),
+            )
+            .values(is_revoked=True, rotated_at=datetime.utcnow())
+            .returning(RefreshToken.user_id, RefreshToken.family_id)
+        )
+        result = await self.db.execute(
+            query,
+            execution_options={"synchronize_session": False},
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        return row.user_id, row.family_id
+    
+    async def revoke_family(self, family_id: UUID) -> int:
+        """Revoke every token rotated from the same login."""
+        result = await self.db.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.family_id == family_id,
+                RefreshToken.is_revoked == False,
+            )
+            .values(is_revoked=True),
+            execution_options={"synchronize_session": False},
+        )
+        return result.rowcount or 0
+    
+    async def prune_sessions(self, user_id: UUID, keep: int) -> int:
+        """Delete the user's oldest active tokens beyond the newest ``keep``."""
+        oldest = (
+            select(RefreshToken.id)
+            .where(
+                RefreshToken.user_id == user_id,
+                RefreshToken.is_revoked == False,
+            )
+            .order_by(RefreshToken.created_at.desc())
+            .offset(keep)
+        )
+        result = await self.db.execute(
+            delete(RefreshToken).where(RefreshToken.id.in_(oldest.scalar_subquery())),
+            execution_options={"synchronize_session": False},
+        )
+        return result.rowcount or 0
+    
     async def revoke_all_for_user(self, user_id: UUID) -> int:
         """Revoke all refresh tokens for a user."""
-        query = select(RefreshToken).where(
-            RefreshToken.user_id == user_id,
-            RefreshToken.is_revoked == False,
-        )
-        result = await self.db.execute(query)
-        tokens = result.scalars().all()
-        count = 0
-        for token in tokens:
-            token.is_revoked = True
-            count += 1
-        await self.db.flush()
-        return count
+        return await self.revoke_for_users(user_ids=[user_id])
     
-    async def cleanup_expired(self) -> int:
-        """Delete expired tokens."""
-        query = delete(RefreshToken).where(
-            RefreshToken.expires_at < datetime.utcnow()
+    async def revoke_for_users(
+        self,
+        user_ids: list[UUID] | None = None,
+        role: UserRole | None = None,
+    ) -> int:
+        """Revoke active refresh tokens of the given users in one statement."""
+        query = update(RefreshToken).where(RefreshToken.is_revoked == False)
+        if user_ids is not None:
+            query = query.where(RefreshToken.user_id.in_(user_ids))
+        if role is not None:
+            query = query.where(
+                RefreshToken.user_id.in_(select(User.id).where(User.role == role))
+            )
+        
+        result = await self.db.execute(
+            query.values(is_revoked=True),
+            execution_options={"synchronize_session": False},
         )
-        result = await self.db.execute(query)
+        return result.rowcount or 0
+    
+    async def cleanup_expired(
+        self,
+        limit: int | None = None,
+        revoked_before: datetime | None = None,
+    ) -> int:
+        """Delete expired tokens, and revoked ones issued before the cutoff.
+        
+        Tokens retired by rotation are only deleted once expired: replaying
+        one must still find it to revoke its family.
+        With a limit only that many rows are deleted, so callers can work
+        through a large backlog in short transactions.
+        """
+        condition = RefreshToken.expires_at < datetime.utcnow()
+        if revoked_before is not None:
+            condition = or_(
+                condition,
+                and_(
+                    RefreshToken.is_revoked == True,
+                    RefreshToken.rotated_at.is_(None),
+                    RefreshToken.created_at < revoked_before,
+                ),
+            )
+        
+        query = delete(RefreshToken)
+        if limit is not None:
+            batch = select(RefreshToken.id).where(condition).limit(limit)
+            query = query.where(RefreshToken.id.in_(batch.scalar_subquery()))
+        else:
+            query = query.where(condition)
+        
+        result = await self.db.execute(query, execution_options={"synchronize_session": False})
         await self.db.flush()
         return result.rowcount or 0
@@ -1,11 +1,36 @@
+import re
 from uuid import UUID
 from datetime import datetime
-from sqlalchemy import select, func, or_, and_
+from typing import AsyncIterator, Callable
+from sqlalchemy import select, insert, update, delete, func, or_, and_, tuple_, case, literal, bindparam
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.models.route import Route, RouteStatus
-from app.models.route_stop import RouteStop
+from app.models.route_stop import RouteStop, StopType
+from app.models.route_number_counter import RouteNumberCounter
+from app.models.user import User
+from app.schemas.common import TotalMode
+from app.schemas.route import RouteSort, RouteView
+from .counting import count_total
+
+
+ROUTE_NUMBER_PATTERN = re.compile(r"RT-(\d{4})-(\d+)")
+
+
+def format_route_number(year: int, num: int) -> str:
+    """Format a generated route number."""
+    return f"RT-{year}-{num:04d}"
+
+
+def parse_route_number(route_number: str) -> tuple[int, int] | None:
+    """Return (year, number) of a route number in the generated format."""
+    match = ROUTE_NUMBER_PATTERN.fullmatch(route_number)
+    if match is None:
+        return None
+    return int(match.group(1)), int(match.group(2))
 
 
 class RouteRepository:
@@ -24,6 +49,20 @@ class RouteRepository:
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
     
+    async def get_version(self, route_id: UUID) -> tuple[datetime, datetime] | None:
+        """
+        Get what a route response depends on, without loading it.
+        Returns: (route updated_at, creator updated_at), or None if missing
+        """
+        query = (
+            select(Route.updated_at, User.updated_at)
+            .join(User, User.id == Route.created_by)
+            .where(Route.id == route_id)
+        )
+        result = await self.db.execute(query)
+        row = result.one_or_none()
+        return tuple(row) if row else None
+    
     async def get_by_route_number(self, route_number: str) -> Route | None:
         """Get route by route number."""
         result = await self.db.execute(
@@ -31,28 +70,29 @@ class RouteRepository:
         )
         return result.scalar_one_or_none()
     
-    async def get_list(
+    async def get_creator(self, user_id: UUID) -> User | None:
+        """Get the user embedded in route responses (from the identity map if loaded)."""
+        return await self.db.get(User, user_id)
+    
+    def _build_filters(
         self,
-        limit: int = 20,
-        offset: int = 0,
-        status: RouteStatus | None = None,
+        status: list[RouteStatus] | None = None,
         q: str | None = None,
         created_by: UUID | None = None,
         from_date: datetime | None = None,
         to_date: datetime | None = None,
-    ) -> tuple[list[Route], int]:
-        """Get paginated list of routes with filters."""
-        # Base query
-        base_query = select(Route).options(
-            selectinload(Route.stops),
-            selectinload(Route.created_by_user)
-        )
-        count_query = select(func.count()).select_from(Route)
-        
-        # Apply filters
+    ) -> list:
+        """Build WHERE conditions for the route list filters."""
         filters = []
         if status:
-            filters.append(Route.status == status)
+            statuses = [s for s in RouteStatus if s in status]
+            if len(statuses) == 1:
+                filters.append(Route.status == statuses[0])
+            else:
+                # Inlined values let the planner match partial indexes
+                filters.append(Route.status.in_(
+                    bindparam("statuses", statuses, expanding=True, literal_execute=True)
+                ))
         if created_by:
             filters.append(Route.created_by == created_by)
         if from_date:
@@ -60,38 +100,221 @@ class RouteRepository:
         if to_date:
             filters.append(Route.created_at <= to_date)
         if q:
-            search_filter = or_(
-                Route.route_number.ilike(f"%{q}%"),
-                Route.title.ilike(f"%{q}%"),
+            filters.append(self._search_filter(q))
+        return filters
+    
+    def _search_filter(self, q: str):
+        """Match routes by route number, title or any stop address.
+        
+        On Postgres the ILIKE patterns are served by the pg_trgm GIN indexes.
+        """
+        pattern = f"%{q}%"
+        stop_matches = select(RouteStop.route_id).where(RouteStop.address.ilike(pattern))
+        return or_(
+            Route.route_number.ilike(pattern),
+            Route.title.ilike(pattern),
+            Route.id.in_(stop_matches),
+        )
+    
+    def _search_rank(self, q: str):
+        """Relevance of a route for the search query, higher is better."""
+        if self.db.bind.dialect.name == "postgresql":
+            stop_rank = (
+                select(func.max(func.word_similarity(q, RouteStop.address)))
+                .where(RouteStop.route_id == Route.id)
+                .scalar_subquery()
+            )
+            return func.greatest(
+                func.word_similarity(q, Route.route_number),
+                func.word_similarity(q, Route.title),
+                func.coalesce(stop_rank, 0),
             )
-            filters.append(search_filter)
         
+        # Without pg_trgm: exact number, then prefixes, then substrings
+        return case(
+            (func.lower(Route.route_number) == q.lower(), literal(5)),
+            (Route.route_number.ilike(f"{q}%"), literal(4)),
+            (Route.title.ilike(f"{q}%"), literal(3)),
+            (Route.route_number.ilike(f"%{q}%"), literal(2)),
+            (Route.title.ilike(f"%{q}%"), literal(1)),
+            else_=literal(0),
+        )
+    
+    def _summary_query(self):
+        """Select list columns plus stop aggregates, without loading relationships."""
+        stops = RouteStop.__table__.alias("summary_stops")
+        
+        def endpoint_address(stop_type: StopType, order):
+            return (
+                select(stops.c.address)
+                .where(stops.c.route_id == Route.id, stops.c.type == stop_type)
+                .order_by(order)
+                .limit(1)
+                .scalar_subquery()
+            )
+        
+        stop_count = (
+            select(func.count())
+            .select_from(stops)
+            .where(stops.c.route_id == Route.id)
+            .scalar_subquery()
+        )
+        return select(
+            Route.id,
+            Route.route_number,
+            Route.title,
+            Route.status,
+            Route.created_by,
+            Route.planned_departure_at,
+            Route.created_at,
+            Route.updated_at,
+            stop_count.label("stop_count"),
+            endpoint_address(StopType.ORIGIN, stops.c.seq).label("origin_address"),
+            endpoint_address(StopType.DESTINATION, stops.c.seq.desc()).label("destination_address"),
+        )
+    
+    def _versions_query(self, with_creator: bool):
+        """Select what list items depend on, for ETag checks."""
+        if not with_creator:
+            return select(Route.id, Route.updated_at)
+        return select(
+            Route.id,
+            Route.updated_at,
+            User.updated_at.label("creator_updated_at"),
+        ).join(User, User.id == Route.created_by)
+    
+    async def get_list(
+        self,
+        limit: int = 20,
+        offset: int = 0,
+        status: list[RouteStatus] | None = None,
+        q: str | None = None,
+        created_by: UUID | None = None,
+        from_date: datetime | None = None,
+        to_date: datetime | None = None,
+        after: tuple[datetime, UUID] | None = None,
+        total_mode: TotalMode = TotalMode.EXACT,
+        sort: RouteSort = RouteSort.NEWEST,
+        view: RouteView = RouteView.FULL,
+        versions_only: bool = False,
+    ) -> tuple[list, int | None, bool]:
+        """
+        Get paginated list of routes with filters.
+        
+        Routes are ordered newest first. With ``after`` (a created_at, id
+        keyset position) the page starts right after that route and the
+        offset is not used. ``RouteSort.RELEVANCE`` with a search query
+        orders by match quality instead and pages by offset only.
+        ``RouteView.SUMMARY`` returns rows of list columns with stop count
+        and origin/destination addresses in a single statement.
+        ``versions_only`` returns just (id, updated_at, creator_updated_at)
+        rows of the page, the creator part only for the full view.
+        Returns: (routes or rows, total, has_more)
+        """
+        # Base query
+        if versions_only:
+            base_query = self._versions_query(with_creator=view == RouteView.FULL)
+        elif view == RouteView.SUMMARY:
+            base_query = self._summary_query()
+        else:
+            base_query = select(Route).options(
+                selectinload(Route.stops),
+                selectinload(Route.created_by_user)
+            )
+        count_query = select(func.count()).select_from(Route)
+        
+        # Apply filters
+        filters = self._build_filters(status, q, created_by, from_date, to_date)
         if filters:
             base_query = base_query.where(and_(*filters))
             count_query = count_query.where(and_(*filters))
         
         # Get total count
-        total_result = await self.db.execute(count_query)
-        total = total_result.scalar() or 0
+        total = await count_total(
+            self.db,
+            count_query,
+            total_mode,
+            Route.__tablename__,
+            (frozenset(status or ()), q, created_by, from_date, to_date),
+        )
         
-        # Get routes
-        query = base_query.order_by(Route.created_at.desc()).limit(limit).offset(offset)
-        result = await self.db.execute(query)
-        routes = list(result.scalars().all())
+        # Get routes, one extra row tells whether another page exists
+        order_by = [Route.created_at.desc(), Route.id.desc()]
+        if q and sort == RouteSort.RELEVANCE:
+            order_by.insert(0, self._search_rank(q).desc())
+        query = base_query.order_by(*order_by)
+        if after is not None:
+            query = query.where(tuple_(Route.created_at, Route.id) < tuple_(*after))
+        else:
+            query = query.offset(offset)
+        result = await self.db.execute(query.limit(limit + 1))
+        if versions_only or view == RouteView.SUMMARY:
+            routes = list(result.all())
+        else:
+            routes = list(result.scalars().all())
         
-        return routes, total
+        has_more = len(routes) > limit
+        return routes[:limit], total, has_more
+    
+    async def stream_export_rows(
+        self,
+        status: list[RouteStatus] | None = None,
+        q: str | None = None,
+        created_by: UUID | None = None,
+        from_date: datetime | None = None,
+        to_date: datetime | None = None,
+        chunk_size: int = 500,
+    ) -> AsyncIterator:
+        """
+        Stream one row per route stop, newest route first and stops in order.
+        
+        Rows are plain columns fetched through a server-side cursor in
+        chunks, so memory does not grow with the number of routes.
+        """
+        query = (
+            select(
+                Route.id,
+                Route.route_number,
+                Route.title,
+                Route.status,
+                Route.created_by,
+                User.full_name.label("created_by_name"),
+                Route.planned_departure_at,
+                Route.comment,
+                Route.created_at,
+                Route.updated_at,
+                RouteStop.seq.label("stop_seq"),
+                RouteStop.type.label("stop_type"),
+                RouteStop.address.label("stop_address"),
+                RouteStop.lat.label("stop_lat"),
+                RouteStop.lng.label("stop_lng"),
+                RouteStop.time_window_from.label("stop_time_window_from"),
+                RouteStop.time_window_to.label("stop_time_window_to"),
+                RouteStop.contact_name.label("stop_contact_name"),
+                RouteStop.contact_phone.label("stop_contact_phone"),
+            )
+            .join(User, User.id == Route.created_by)
+            .outerjoin(RouteStop, RouteStop.route_id == Route.id)
+            .order_by(Route.created_at.desc(), Route.id.desc(), RouteStop.seq)
+            .execution_options(yield_per=chunk_size)
+        )
+        filters = self._build_filters(status, q, created_by, from_date, to_date)
+        if filters:
+            query = query.where(and_(*filters))
+        
+        result = await self.db.stream(query)
+        async for row in result:
+            yield row
     
     async def create(self, route: Route) -> Route:
         """Create a new route."""
         self.db.add(route)
         await self.db.flush()
-        await self.db.refresh(route)
         return route
     
     async def update(self, route: Route) -> Route:
         """Update a route."""
         await self.db.flush()
-        await self.db.refresh(route)
         return route
     
     async def delete(self, route: Route) -> None:
@@ -99,41 +322,227 @@ class RouteRepository:
         await self.db.delete(route)
         await self.db.flush()
     
+    def _has_stop_type(self, stop_type: StopType):
+        """Correlated EXISTS for a stop of the given type on the route."""
+        return (
+            select(RouteStop.id)
+            .where(RouteStop.route_id == Route.id, RouteStop.type == stop_type)
+            .exists()
+        )
+    
+    async def get_status_candidates(
+        self,
+        ids: list[UUID] | None = None,
+        limit: int | None = None,
+        **filters,
+    ) -> list:
+        """
+        Select routes for a bulk status change by ids or list filters.
+        Returns: rows of (id, route_number, status, has_stops) where has_stops
+        tells whether the route has both an origin and a destination
+        """
+        query = select(
+            Route.id,
+            Route.route_number,
+            Route.status,
+            and_(
+                self._has_stop_type(StopType.ORIGIN),
+                self._has_stop_type(StopType.DESTINATION),
+            ).label("has_stops"),
+        )
+        if ids is not None:
+            query = query.where(Route.id.in_(ids))
+        else:
+            query = query.where(*self._build_filters(**filters))
+        query = query.order_by(Route.created_at.desc(), Route.id.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        result = await self.db.execute(query)
+        return list(result.all())
+    
+    async def set_status(
+        self,
+        ids: list[UUID],
+        status: RouteStatus,
+        from_statuses: list[RouteStatus],
+        require_stops: bool = False,
+    ) -> set[UUID]:
+        """
+        Move routes to ``status`` with a single UPDATE.
+        
+        The source statuses (and stops, if required) are checked again in
+        the WHERE clause, so routes changed concurrently are left alone.
+        Returns: ids of the routes actually updated
+        """
+        if not ids:
+            return set()
+        conditions = [Route.id.in_(ids), Route.status.in_(from_statuses)]
+        if require_stops:
+            conditions.append(self._has_stop_type(StopType.ORIGIN))
+            conditions.append(self._has_stop_type(StopType.DESTINATION))
+        query = (
+            update(Route)
+            .where(*conditions)
+            .values(status=status, updated_at=datetime.utcnow())
+            .returning(Route.id)
+            .execution_options(synchronize_session="fetch")
+        )
+        result = await self.db.execute(query)
+        return set(result.scalars().all())
+    
     async def get_next_route_number(self) -> str:
         """Generate next route number."""
+        numbers = await self.reserve_route_numbers(1)
+        return numbers[0]
+    
+    async def reserve_route_numbers(self, count: int) -> list[str]:
+        """
+        Allocate a block of ``count`` route numbers for the current year.
+        
+        The per-year counter is incremented with a single UPDATE, so
+        concurrent callers always get disjoint blocks. Numbers of rolled
+        back transactions are lost, leaving gaps.
+        """
+        if count <= 0:
+            return []
+        
         year = datetime.utcnow().year
-        prefix = f"RT-{year}-"
+        counter = RouteNumberCounter.__table__
+        last = await self._upsert_counter(year, lambda used: used + count, counter.c.last_value + count)
+        return [format_route_number(year, num) for num in range(last - count + 1, last + 1)]
+    
+    async def advance_route_numbers(self, route_numbers: list[str]) -> None:
+        """Move counters past explicitly chosen numbers in the RT-{year}-{n} format."""
+        highest: dict[int, int] = {}
+        for route_number in route_numbers:
+            parsed = parse_route_number(route_number)
+            if parsed is not None:
+                year, num = parsed
+                highest[year] = max(highest.get(year, 0), num)
         
-        # Find highest number for this year
-        query = select(Route.route_number).where(
-            Route.route_number.like(f"{prefix}%")
-        ).order_by(Route.route_number.desc()).limit(1)
+        counter = RouteNumberCounter.__table__
+        for year, num in highest.items():
+            await self._upsert_counter(
+                year,
+                lambda used, num=num: max(used, num),
+                case((counter.c.last_value < num, num), else_=counter.c.last_value),
+            )
+    
+    async def _upsert_counter(self, year: int, initial: Callable[[int], int], new_value) -> int:
+        """
+        Update a year's counter to ``new_value``, creating the row if missing.
         
-        result = await self.db.execute(query)
-        last_number = result.scalar_one_or_none()
+        A year's routes may predate its counter row, so a new row starts at
+        ``initial`` of the highest number already used that year.
+        Returns: the stored value
+        """
+        counter = RouteNumberCounter.__table__
+        result = await self.db.execute(
+            update(counter)
+            .where(counter.c.year == year)
+            .values(last_value=new_value)
+            .returning(counter.c.last_value)
+        )
+        value = result.scalar_one_or_none()
+        if value is not None:
+            return value
         
-        if last_number:
-            try:
-                num = int(last_number.split("-")[-1]) + 1
-            except (ValueError, IndexError):
-                num = 1
-        else:
-            num = 1
+        # Another transaction may create the row meanwhile; then update it
+        dialect_insert = pg_insert if self.db.bind.dialect.name == "postgresql" else sqlite_insert
+        query = (
+            dialect_insert(counter)
+            .values(year=year, last_value=initial(await self._highest_route_number(year)))
+            .on_conflict_do_update(index_elements=[counter.c.year], set_={"last_value": new_value})
+            .returning(counter.c.last_value)
+        )
+        result = await self.db.execute(query)
+        return result.scalar_one()
+    
+    async def _highest_route_number(self, year: int) -> int:
+        """Highest number used in the RT-{year}-{n} format, or 0."""
+        result = await self.db.stream_scalars(
+            select(Route.route_number).where(Route.route_number.like(f"RT-{year}-%"))
+        )
+        highest = 0
+        async for route_number in result:
+            parsed = parse_route_number(route_number)
+            if parsed is not None and parsed[0] == year:
+                highest = max(highest, parsed[1])
+        return highest
+    
+    async def get_existing_route_numbers(self, route_numbers: list[str]) -> set[str]:
+        """Return which of the given route numbers are already used."""
+        if not route_numbers:
+            return set()
+        result = await self.db.execute(
+            select(Route.route_number).where(Route.route_number.in_(route_numbers))
+        )
+        return set(result.scalars().all())
+    
+    async def bulk_insert(self, routes: list[dict], stops: list[dict]) -> None:
+        """Insert routes and their stops with multi-row INSERT statements."""
+        await self.db.execute(insert(Route), routes)
+        await self.bulk_insert_stops(stops)
+    
+    async def bulk_insert_stops(self, stops: list[dict]) -> None:
+        """Insert stops with a multi-row INSERT statement."""
+        if stops:
+            await self.db.execute(insert(RouteStop), stops)
+    
+    async def apply_stop_changes(
+        self,
+        delete_ids: list[UUID],
+        move_ids: list[UUID],
+        updates: list[dict],
+        inserts: list[dict],
+    ) -> None:
+        """
+        Apply a diff of route stops with one statement per kind of change.
         
-        return f"{prefix}{num:04d}"
+        Stops in ``move_ids`` get a new seq through ``updates``; they are
+        first parked at negative seqs so no intermediate state breaks the
+        (route_id, seq) unique constraint.
+        """
+        stops = RouteStop.__table__
+        if delete_ids:
+            await self.db.execute(delete(stops).where(stops.c.id.in_(delete_ids)))
+        if move_ids:
+            await self.db.execute(
+                update(stops).where(stops.c.id.in_(move_ids)).values(seq=-stops.c.seq)
+            )
+        if updates:
+            # Keys other than stop_id become the SET clause of every row
+            await self.db.execute(
+                update(stops).where(stops.c.id == bindparam("stop_id")),
+                updates,
+            )
+        await self.bulk_insert_stops(inserts)
     
-    async def delete_stops(self, route_id: UUID) -> None:
-        """Delete all stops for a route."""
-        query = select(RouteStop).where(RouteStop.route_id == route_id)
-        result = await self.db.execute(query)
-        stops = result.scalars().all()
-        for stop in stops:
-            await self.db.delete(stop)
-        await self.db.flush()
+    async def update_stop(self, stop_id: UUID, values: dict) -> None:
+        """Update columns of a single stop."""
+        stops = RouteStop.__table__
+        await self.db.execute(update(stops).where(stops.c.id == stop_id).values(**values))
     
-    async def add_stops(self, stops: list[RouteStop]) -> list[RouteStop]:
-        """Add stops to a route."""
-        for stop in stops:
-            self.db.add(stop)
-        await self.db.flush()
-        return stops
+    async def delete_stop(self, stop_id: UUID) -> None:
+        """Delete a single stop."""
+        stops = RouteStop.__table__
+        await self.db.execute(delete(stops).where(stops.c.id == stop_id))
+    
+    async def shift_stops(self, route_id: UUID, first_seq: int, last_seq: int, delta: int) -> None:
+        """
+        Move the stops with seq in [first_seq, last_seq] by ``delta``.
+        
+        Rows pass through negative seqs, so the shift never collides with
+        the (route_id, seq) unique constraint however rows are visited.
+        """
+        stops = RouteStop.__table__
+        await self.db.execute(
+            update(stops)
+            .where(stops.c.route_id == route_id, stops.c.seq.between(first_seq, last_seq))
+            .values(seq=-(stops.c.seq + delta))
+        )
+        await self.db.execute(
+            update(stops)
+            .where(stops.c.route_id == route_id, stops.c.seq < 0)
+            .values(seq=-stops.c.seq)
+        )
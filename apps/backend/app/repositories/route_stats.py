@@ -0,0 +1,183 @@
+from uuid import UUID
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Iterable
+from sqlalchemy import select, delete, func, text, tuple_, and_, or_
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.route import Route, RouteStatus
+from app.models.route_stat import RouteStat, RouteStatDimension
+from app.models.user import User
+
+StatKey = tuple[str, str]
+
+# SQLSTATE of a lock not taken within lock_timeout
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+def stat_bucket(value: RouteStatus | UUID | date | str) -> str:
+    """Bucket name of a grouped value."""
+    if isinstance(value, RouteStatus):
+        return value.value
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+class RouteStatsRepository:
+    """Repository for the route statistics summary table."""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def apply(self, deltas: dict[StatKey, int]) -> None:
+        """
+        Add deltas to bucket counts with a single upsert.
+        
+        Rows are written in key order, so concurrent transactions lock
+        them in the same order and cannot deadlock each other.
+        """
+        if not deltas:
+            return
+        await self._upsert(
+            sorted(deltas.items()),
+            lambda table, excluded: table.c.count + excluded.count,
+        )
+    
+    async def get_counts(
+        self,
+        dimensions: list[RouteStatDimension],
+        from_bucket: str | None = None,
+        to_bucket: str | None = None,
+    ) -> dict[StatKey, int]:
+        """Get non-zero counts of some dimensions, optionally within a bucket range."""
+        query = select(RouteStat.dimension, RouteStat.bucket, RouteStat.count).where(
+            RouteStat.dimension.in_([dimension.value for dimension in dimensions]),
+            RouteStat.count != 0,
+        )
+        if from_bucket is not None:
+            query = query.where(RouteStat.bucket >= from_bucket)
+        if to_bucket is not None:
+            query = query.where(RouteStat.bucket <= to_bucket)
+        result = await self.db.execute(query)
+        return {(dimension, bucket): count for dimension, bucket, count in result.all()}
+    
+    async def get_user_names(self, ids: list[UUID]) -> dict[UUID, str]:
+        """Get full names of users by id."""
+        if not ids:
+            return {}
+        result = await self.db.execute(select(User.id, User.full_name).where(User.id.in_(ids)))
+        return dict(result.all())
+    
+    async def lock(self, timeout: float) -> bool:
+        """
+        Block stats writers until the transaction ends.
+        
+        Taking the lock also waits for writers that already changed counts
+        to commit, so routes counted afterwards match the table exactly.
+        Gives up when writers hold the table for longer than timeout seconds,
+        leaving the transaction usable. Other backends run a single writer
+        at a time anyway.
+        Returns: whether the lock was taken
+        """
+        if self.db.bind.dialect.name != "postgresql":
+            return True
+        await self.db.execute(text(f"SET LOCAL lock_timeout = '{max(int(timeout * 1000), 1)}ms'"))
+        try:
+            # A lock taken in a released savepoint is held by the transaction
+            async with self.db.begin_nested():
+                await self.db.execute(text("LOCK TABLE route_stats IN EXCLUSIVE MODE"))
+        except DBAPIError as e:
+            if getattr(e.orig, "sqlstate", None) != LOCK_NOT_AVAILABLE:
+                raise
+            return False
+        return True
+    
+    async def count_routes(self, keys: Iterable[StatKey] | None = None) -> dict[StatKey, int]:
+        """
+        Count routes per bucket of every dimension.
+        
+        Without keys every route is scanned. With keys only routes in those
+        buckets are counted, through the indexes where there are any.
+        """
+        wanted: dict[str, list[str]] | None = None
+        if keys is not None:
+            wanted = defaultdict(list)
+            for dimension, bucket in keys:
+                wanted[dimension].append(bucket)
+        
+        groups = [
+            (RouteStatDimension.STATUS, Route.status, Route.status),
+            (RouteStatDimension.CREATOR, Route.created_by, Route.created_by),
+            (RouteStatDimension.CREATED_DAY, func.date(Route.created_at), Route.created_at),
+            (RouteStatDimension.DEPARTURE_DAY, func.date(Route.planned_departure_at), Route.planned_departure_at),
+        ]
+        counts: dict[StatKey, int] = {}
+        for dimension, group, column in groups:
+            query = select(group, func.count()).where(column.isnot(None)).group_by(group)
+            if wanted is not None:
+                if not wanted.get(dimension.value):
+                    continue
+                query = query.where(self._in_buckets(dimension, column, wanted[dimension.value]))
+            result = await self.db.execute(query)
+            for value, count in result.all():
+                counts[(dimension.value, stat_bucket(value))] = count
+        return counts
+    
+    async def find_changed(self, counts: dict[StatKey, int]) -> list[StatKey]:
+        """Get buckets whose stored count differs from a recount."""
+        current = await self._get_all()
+        return sorted(key for key in counts.keys() | current.keys() if current.get(key) != counts.get(key))
+    
+    async def replace(self, counts: dict[StatKey, int], keys: Iterable[StatKey] | None = None) -> int:
+        """
+        Overwrite the table with recounted values, writing only changed rows.
+        
+        With keys only those buckets were recounted, and the rest of the
+        table is left alone.
+        Returns: number of buckets whose count was wrong
+        """
+        current = await self._get_all()
+        if keys is not None:
+            keys = set(keys)
+            current = {key: count for key, count in current.items() if key in keys}
+        
+        changed = sorted((key, count) for key, count in counts.items() if current.get(key) != count)
+        stale = [key for key in current if key not in counts]
+        if changed:
+            await self._upsert(changed, lambda table, excluded: excluded.count)
+        if stale:
+            await self.db.execute(
+                delete(RouteStat).where(tuple_(RouteStat.dimension, RouteStat.bucket).in_(stale))
+            )
+        # Emptied buckets are left at zero by writers and are not drift
+        return len(changed) + sum(current[key] != 0 for key in stale)
+    
+    async def _get_all(self) -> dict[StatKey, int]:
+        result = await self.db.execute(select(RouteStat.dimension, RouteStat.bucket, RouteStat.count))
+        return {(dimension, bucket): count for dimension, bucket, count in result.all()}
+    
+    def _in_buckets(self, dimension: RouteStatDimension, column, buckets: list[str]):
+        if dimension == RouteStatDimension.STATUS:
+            return column.in_([RouteStatus(bucket) for bucket in buckets])
+        if dimension == RouteStatDimension.CREATOR:
+            return column.in_([UUID(bucket) for bucket in buckets])
+        # Day ranges rather than date() of the column, so an index can serve them
+        days = [datetime.combine(date.fromisoformat(bucket), time.min) for bucket in buckets]
+        return or_(*(and_(column >= day, column < day + timedelta(days=1)) for day in days))
+    
+    async def _upsert(self, rows: list[tuple[StatKey, int]], new_count) -> None:
+        table = RouteStat.__table__
+        dialect_insert = pg_insert if self.db.bind.dialect.name == "postgresql" else sqlite_insert
+        query = dialect_insert(table).values([
+            {"dimension": dimension, "bucket": bucket, "count": count}
+            for (dimension, bucket), count in rows
+        ])
+        query = query.on_conflict_do_update(
+            index_elements=[table.c.dimension, table.c.bucket],
+            set_={"count": new_count(table, query.excluded)},
+        )
+        await self.db.execute(query)
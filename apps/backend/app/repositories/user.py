@@ -1,8 +1,11 @@
 from uuid import UUID
-from sqlalchemy import select, func
+from sqlalchemy import select, update, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.user import User
+from app.models.user import User, UserRole
+from app.schemas.auth import Principal
+from app.schemas.common import TotalMode
+from .counting import count_total
 
 
 class UserRepository:
@@ -16,6 +19,46 @@ class UserRepository:
         result = await self.db.execute(select(User).where(User.id == user_id))
         return result.scalar_one_or_none()
     
+    async def get_principal(self, user_id: UUID) -> Principal | None:
+        """Get the authorization columns of a user without loading the entity."""
+        query = select(
+            User.id,
+            User.role,
+            User.is_active,
+            User.must_change_password,
+            User.token_epoch,
+        ).where(User.id == user_id)
+        result = await self.db.execute(query)
+        row = result.one_or_none()
+        if row is None:
+            return None
+        return Principal.model_validate(row)
+    
+    async def get_token_epochs(self) -> dict[UUID, int]:
+        """Get token epochs of all users whose epoch was ever bumped."""
+        result = await self.db.execute(
+            select(User.id, User.token_epoch).where(User.token_epoch > 0)
+        )
+        return {row.id: row.token_epoch for row in result}
+    
+    async def bump_token_epochs(
+        self,
+        user_ids: list[UUID] | None = None,
+        role: UserRole | None = None,
+    ) -> dict[UUID, int]:
+        """Invalidate access tokens of the given users in one statement."""
+        query = update(User).values(token_epoch=User.token_epoch + 1)
+        if user_ids is not None:
+            query = query.where(User.id.in_(user_ids))
+        if role is not None:
+            query = query.where(User.role == role)
+        
+        result = await self.db.execute(
+            query.returning(User.id, User.token_epoch),
+            execution_options={"synchronize_session": False},
+        )
+        return {row.id: row.token_epoch for row in result}
+    
     async def get_by_email(self, email: str) -> User | None:
         """Get user by email."""
         result = await self.db.execute(select(User).where(User.email == email))
@@ -25,31 +68,44 @@ class UserRepository:
         self,
         limit: int = 20,
         offset: int = 0,
-    ) -> tuple[list[User], int]:
-        """Get paginated list of users."""
+        total_mode: TotalMode = TotalMode.EXACT,
+    ) -> tuple[list[User], int | None, bool]:
+        """
+        Get paginated list of users.
+        Returns: (users, total, has_more)
+        """
         # Get total count
         count_query = select(func.count()).select_from(User)
-        total_result = await self.db.execute(count_query)
-        total = total_result.scalar() or 0
+        total = await count_total(
+            self.db,
+            count_query,
+            total_mode,
+            User.__tablename__,
+            None,
+        )
         
-        # Get users
-        query = select(User).order_by(User.created_at.desc()).limit(limit).offset(offset)
+        # Get users, one extra row tells whether another page exists
+        query = (
+            select(User)
+            .order_by(User.created_at.desc(), User.id.desc())
+            .limit(limit + 1)
+            .offset(offset)
+        )
         result = await self.db.execute(query)
         users = list(result.scalars().all())
         
-        return users, total
+        has_more = len(users) > limit
+        return users[:limit], total, has_more
     
     async def create(self, user: User) -> User:
         """Create a new user."""
         self.db.add(user)
         await self.db.flush()
-        await self.db.refresh(user)
         return user
     
     async def update(self, user: User) -> User:
         """Update a user."""
         await self.db.flush()
-        await self.db.refresh(user)
         return user
     
     async def delete(self, user: User) -> None:
@@ -12,7 +12,7 @@ from app.schemas.auth import (
 from app.schemas.user import UserResponse
 from app.services.auth import AuthService
 from app.services.user import UserService
-from app.core.security import verify_password
+from app.core.security import password_hasher
 from app.core.exceptions import AuthenticationError
 from .deps import CurrentUser, DbSession
 
@@ -43,12 +43,12 @@ async def refresh_token(
     db: DbSession,
 ):
     """
-    Refresh access token using refresh token.
+    Exchange a refresh token for a new access token and a new refresh token.
     """
     service = AuthService(db)
-    access_token = await service.refresh(data.refresh_token)
+    access_token, new_refresh_token = await service.refresh(data.refresh_token)
     
-    return RefreshResponse(access_token=access_token)
+    return RefreshResponse(access_token=access_token, refresh_token=new_refresh_token)
 
 
 @router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
@@ -67,11 +67,14 @@ async def logout(
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
     current_user: CurrentUser,
+    db: DbSession,
 ):
     """
     Get current authenticated user information.
     """
-    return UserResponse.model_validate(current_user)
+    service = UserService(db)
+    user = await service.get_by_id(current_user.id)
+    return UserResponse.model_validate(user)
 
 
 @router.post("/change-password", response_model=UserResponse)
@@ -83,11 +86,13 @@ async def change_password(
     """
     Change current user's password.
     """
+    service = UserService(db)
+    user = await service.get_by_id(current_user.id)
+    
     # Verify current password
-    if not verify_password(data.current_password, current_user.password_hash):
+    if not await password_hasher.verify(data.current_password, user.password_hash):
         raise AuthenticationError("Current password is incorrect")
     
-    service = UserService(db)
-    user = await service.change_password(current_user, data.new_password)
+    user = await service.change_password(user, data.new_password)
     
     return UserResponse.model_validate(user)
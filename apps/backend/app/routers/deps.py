@@ -1,13 +1,16 @@
 from uuid import UUID
 from typing import Annotated
-from fastapi import Depends, Header
+from fastapi import Depends, Header, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.db.session import get_db
-from app.models.user import User, UserRole
+from app.db.session import get_db, get_session_factory
+from app.models.user import UserRole
 from app.repositories.user import UserRepository
+from app.services.idempotency import IdempotencyService, request_fingerprint
+from app.schemas.auth import Principal
 from app.core.security import decode_token
+from app.core.cache import principal_cache, token_epochs
 from app.core.exceptions import AuthenticationError, AuthorizationError
 
 security = HTTPBearer()
@@ -16,8 +19,8 @@ security = HTTPBearer()
 async def get_current_user(
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
     db: Annotated[AsyncSession, Depends(get_db)],
-) -> User:
-    """Get current authenticated user from JWT token."""
+) -> Principal:
+    """Get current authenticated principal from JWT token."""
     token = credentials.credentials
     
     # Decode token
@@ -38,22 +41,59 @@ async def get_current_user(
     except ValueError:
         raise AuthenticationError("Invalid user ID in token")
     
-    # Get user from database
-    repo = UserRepository(db)
-    user = await repo.get_by_id(user_id)
+    # Tokens carrying role and epoch are authorized without a user query
+    if "role" in payload and "epoch" in payload:
+        return await _principal_from_claims(user_id, payload, db)
     
-    if not user:
-        raise AuthenticationError("User not found")
+    # Get authorization columns from cache or database
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        repo = UserRepository(db)
+        principal = await repo.get_principal(user_id)
+        
+        if not principal:
+            raise AuthenticationError("User not found")
+        
+        principal_cache.set(user_id, principal)
     
-    if not user.is_active:
+    if not principal.is_active:
         raise AuthenticationError("User account is deactivated")
     
-    return user
+    return principal
+
+
+async def _principal_from_claims(
+    user_id: UUID,
+    payload: dict,
+    db: AsyncSession,
+) -> Principal:
+    """Build principal from access token claims after checking its epoch."""
+    if token_epochs.is_stale():
+        repo = UserRepository(db)
+        token_epochs.replace(await repo.get_token_epochs())
+    
+    try:
+        role = UserRole(payload["role"])
+        epoch = int(payload["epoch"])
+    except (TypeError, ValueError):
+        raise AuthenticationError("Invalid token payload")
+    
+    # Deactivation, role change and password reset bump the epoch
+    if epoch < token_epochs.get(user_id):
+        raise AuthenticationError("Token has been revoked")
+    
+    return Principal(
+        id=user_id,
+        role=role,
+        is_active=True,
+        must_change_password=bool(payload.get("mcp", False)),
+        token_epoch=epoch,
+    )
 
 
 async def get_admin_user(
-    current_user: Annotated[User, Depends(get_current_user)],
-) -> User:
+    current_user: Annotated[Principal, Depends(get_current_user)],
+) -> Principal:
     """Get current user and verify admin role."""
     if current_user.role != UserRole.ADMIN:
         raise AuthorizationError("Admin access required")
@@ -61,8 +101,8 @@ async def get_admin_user(
 
 
 async def get_editor_user(
-    current_user: Annotated[User, Depends(get_current_user)],
-) -> User:
+    current_user: Annotated[Principal, Depends(get_current_user)],
+) -> Principal:
     """Get current user and verify editor role (admin or dispatcher)."""
     if current_user.role not in (UserRole.ADMIN, UserRole.DISPATCHER):
         raise AuthorizationError("Editor access required")
@@ -70,7 +110,59 @@ async def get_editor_user(
 
 
 # Type aliases for cleaner dependency injection
-CurrentUser = Annotated[User, Depends(get_current_user)]
-AdminUser = Annotated[User, Depends(get_admin_user)]
-EditorUser = Annotated[User, Depends(get_editor_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
+AdminUser = Annotated[Principal, Depends(get_admin_user)]
+EditorUser = Annotated[Principal, Depends(get_editor_user)]
 DbSession = Annotated[AsyncSession, Depends(get_db)]
+SessionFactory = Annotated[async_sessionmaker[AsyncSession], Depends(get_session_factory)]
+
+
+class Idempotency:
+    """Replays and stores the response of a write request sent with an Idempotency-Key."""
+    
+    REPLAYED_HEADER = "Idempotent-Replayed"
+    
+    def __init__(self, request: Request, db: AsyncSession, principal: Principal, key: str | None):
+        self.request = request
+        self.service = IdempotencyService(db)
+        self.principal = principal
+        self.key = key
+    
+    async def replay(self) -> Response | None:
+        """Claim the key, or return the response stored for it."""
+        if self.key is None:
+            return None
+        fingerprint = request_fingerprint(
+            self.request.method,
+            self.request.url.path,
+            await self.request.body(),
+        )
+        stored = await self.service.begin(self.principal.id, self.key, fingerprint)
+        if stored is None:
+            return None
+        status_code, body = stored
+        return Response(
+            content=body,
+            status_code=status_code,
+            media_type="application/json",
+            headers={self.REPLAYED_HEADER: "true"},
+        )
+    
+    async def store(self, response: Response) -> Response:
+        """Keep the response for replays of the claimed key."""
+        if self.key is not None:
+            await self.service.complete(self.principal.id, self.key, response.status_code, response.body)
+        return response
+
+
+async def get_idempotency(
+    request: Request,
+    current_user: CurrentUser,
+    db: DbSession,
+    key: Annotated[str | None, Header(alias="Idempotency-Key", min_length=1, max_length=255)] = None,
+) -> Idempotency:
+    """Get the idempotency guard of a write request."""
+    return Idempotency(request, db, current_user, key)
+
+
+IdempotencyGuard = Annotated[Idempotency, Depends(get_idempotency)]
@@ -1,7 +1,10 @@
+import json
+import time
 from uuid import UUID
-from datetime import datetime
-from fastapi import APIRouter, Query
-from typing import Optional
+from datetime import datetime, date
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Optional
 
 from app.models.route import RouteStatus
 from app.schemas.route import (
@@ -10,10 +13,29 @@ from app.schemas.route import (
     RouteResponse,
     RouteListResponse,
     RouteCancelResponse,
+    RouteSort,
+    RouteSummary,
+    RouteView,
+    ExportFormat,
+    RouteImportResponse,
+    BulkStatusUpdate,
+    BulkStatusResponse,
     StopsUpdate,
+    StatsPeriod,
+    RouteStatsResponse,
 )
+from app.schemas.route_stop import RouteStopCreate, RouteStopUpdate
+from app.schemas.common import TotalMode
 from app.services.route import RouteService
-from .deps import CurrentUser, EditorUser, DbSession
+from app.services.export import RouteExportService
+from app.services.route_stats import RouteStatsService
+from app.core.pagination import encode_cursor
+from app.core.etag import etag_matches, cached_json_response, not_modified
+from app.core.responses import dump_json, model_response
+from app.core.response_cache import route_cache
+from app.core.exceptions import ValidationError
+from app.core.streaming import accepts_gzip, gzip_chunks, iter_ndjson
+from .deps import CurrentUser, EditorUser, DbSession, SessionFactory, IdempotencyGuard
 
 router = APIRouter(prefix="/api/routes", tags=["Routes"])
 
@@ -23,32 +45,125 @@ async def create_route(
     data: RouteCreate,
     current_user: EditorUser,
     db: DbSession,
+    idempotency: IdempotencyGuard,
 ):
     """
     Create a new route (admin/dispatcher only).
+    
+    Like the other route writes, a request sent with an Idempotency-Key
+    header runs once; retries with the same key and body get the stored
+    response back.
     """
+    replayed = await idempotency.replay()
+    if replayed:
+        return replayed
+    
     service = RouteService(db)
     route = await service.create(data, current_user)
-    return RouteResponse.model_validate(route)
+    return await idempotency.store(model_response(RouteResponse.model_validate(route), status_code=201))
+
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+async def _iter_list(items: list[Any]) -> AsyncIterator[Any]:
+    for item in items:
+        yield item
+
+
+@router.post("/bulk", response_model=RouteImportResponse)
+async def import_routes(
+    request: Request,
+    current_user: EditorUser,
+    db: DbSession,
+):
+    """
+    Create many routes at once (admin/dispatcher only).
+    
+    The body is a JSON array of route objects, or one route object per
+    line with an NDJSON content type. Invalid items are reported in the
+    per-item results and do not stop the import.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_MEDIA_TYPES:
+        items = iter_ndjson(request.stream())
+    else:
+        try:
+            body = json.loads(await request.body())
+        except ValueError:
+            raise ValidationError("Request body must be a JSON array or NDJSON")
+        if not isinstance(body, list):
+            raise ValidationError("Request body must be a JSON array or NDJSON")
+        items = _iter_list(body)
+    
+    started = time.perf_counter()
+    service = RouteService(db)
+    results = await service.import_routes(items, current_user)
+    duration = time.perf_counter() - started
+    
+    created = sum(result.ok for result in results)
+    return model_response(RouteImportResponse(
+        items=results,
+        created=created,
+        failed=len(results) - created,
+        duration_ms=round(duration * 1000, 1),
+        routes_per_second=round(created / duration, 1) if duration > 0 else 0.0,
+    ))
+
+
+@router.post("/bulk-status", response_model=BulkStatusResponse)
+async def bulk_update_status(
+    data: BulkStatusUpdate,
+    current_user: EditorUser,
+    db: DbSession,
+    idempotency: IdempotencyGuard,
+):
+    """
+    Change the status of many routes at once (admin/dispatcher only).
+    
+    Routes are selected by ids or by the list filters; routes whose
+    transition is not allowed are reported and left unchanged.
+    """
+    replayed = await idempotency.replay()
+    if replayed:
+        return replayed
+    
+    service = RouteService(db)
+    results = await service.bulk_update_status(data, current_user)
+    updated = sum(result.ok for result in results)
+    response = model_response(BulkStatusResponse(items=results, updated=updated, failed=len(results) - updated))
+    return await idempotency.store(response)
 
 
 @router.get("", response_model=RouteListResponse)
 async def list_routes(
+    request: Request,
     current_user: CurrentUser,
     db: DbSession,
     limit: int = Query(default=20, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
-    status: Optional[RouteStatus] = Query(default=None),
-    q: Optional[str] = Query(default=None, description="Search by route number or title"),
+    status: Optional[list[RouteStatus]] = Query(default=None, description="Repeat to match any of several statuses"),
+    q: Optional[str] = Query(default=None, description="Search by route number, title or stop address"),
     created_by: Optional[UUID] = Query(default=None),
     from_date: Optional[datetime] = Query(default=None, alias="from"),
     to_date: Optional[datetime] = Query(default=None, alias="to"),
+    cursor: Optional[str] = Query(default=None, description="Opaque cursor from next_cursor of the previous page"),
+    total_mode: TotalMode = Query(default=TotalMode.EXACT, alias="total"),
+    sort: RouteSort = Query(default=RouteSort.NEWEST, description="Order search results by relevance"),
+    view: RouteView = Query(default=RouteView.FULL, description="summary returns compact items without stops"),
 ):
     """
     Get paginated list of routes with filters.
+    
+    Pages can be walked either by offset or, without slowing down on deep
+    pages, by passing the returned next_cursor back as cursor. Relevance
+    ordered searches are paged by offset only.
+    
+    Responses carry an ETag; a matching If-None-Match gets 304 Not Modified.
+    Serialized pages are cached until a route changes.
     """
     service = RouteService(db)
-    routes, total = await service.get_list(
+    filters = dict(
         limit=limit,
         offset=offset,
         status=status,
@@ -56,28 +171,144 @@ async def list_routes(
         created_by=created_by,
         from_date=from_date,
         to_date=to_date,
+        cursor=cursor,
+        total_mode=total_mode,
+        sort=sort,
+        view=view,
     )
+    cache_key, cached = await route_cache.lookup_list(filters)
+    if cached:
+        etag, body = cached
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return cached_json_response(etag, body)
+    
+    params = request.query_params.multi_items()
+    if "if-none-match" in request.headers:
+        etag = await service.get_list_etag(params, **filters)
+        if etag_matches(request, etag):
+            return not_modified(etag)
     
-    return RouteListResponse(
-        items=[RouteResponse.model_validate(r) for r in routes],
+    routes, total, has_more = await service.get_list(**filters)
+    
+    next_cursor = None
+    by_relevance = bool(q) and sort == RouteSort.RELEVANCE
+    if has_more and not by_relevance:
+        next_cursor = encode_cursor(routes[-1].created_at, routes[-1].id)
+    
+    etag = service.list_etag(params, routes, total, has_more)
+    item_schema = RouteSummary if view == RouteView.SUMMARY else RouteResponse
+    body = dump_json(RouteListResponse(
+        items=[item_schema.model_validate(r) for r in routes],
         total=total,
         limit=limit,
         offset=offset,
+        has_more=has_more,
+        next_cursor=next_cursor,
+    ))
+    await route_cache.store(cache_key, etag, body)
+    return cached_json_response(etag, body)
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+}
+
+
+@router.get("/export")
+async def export_routes(
+    request: Request,
+    current_user: CurrentUser,
+    session_factory: SessionFactory,
+    fmt: ExportFormat = Query(default=ExportFormat.NDJSON, alias="format"),
+    status: Optional[list[RouteStatus]] = Query(default=None),
+    q: Optional[str] = Query(default=None),
+    created_by: Optional[UUID] = Query(default=None),
+    from_date: Optional[datetime] = Query(default=None, alias="from"),
+    to_date: Optional[datetime] = Query(default=None, alias="to"),
+):
+    """
+    Export all routes matching the list filters with their stops.
+    
+    NDJSON has one route per line with nested stops, CSV one row per stop.
+    The body is streamed (gzip encoded if accepted) without counting or
+    paging, so exports of any size use constant memory.
+    """
+    filters = dict(
+        status=status,
+        q=q,
+        created_by=created_by,
+        from_date=from_date,
+        to_date=to_date,
     )
+    
+    # The request's session is closed before the body is sent
+    async def body():
+        async with session_factory() as session:
+            async for chunk in RouteExportService(session).stream(fmt, **filters):
+                yield chunk
+    
+    headers = {"Content-Disposition": f'attachment; filename="routes.{fmt.value}"'}
+    content = body()
+    if accepts_gzip(request):
+        content = gzip_chunks(content)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(content, media_type=EXPORT_MEDIA_TYPES[fmt], headers=headers)
+
+
+@router.get("/stats", response_model=RouteStatsResponse)
+async def get_route_stats(
+    current_user: CurrentUser,
+    db: DbSession,
+    period: StatsPeriod = Query(default=StatsPeriod.DAY),
+    from_date: Optional[date] = Query(default=None, alias="from"),
+    to_date: Optional[date] = Query(default=None, alias="to"),
+):
+    """
+    Get route counts by status, creator and day or week.
+    
+    Counts of routes created and planned to depart are grouped by UTC day
+    or by week (starting on Monday) and limited to the optional date range.
+    Served from incrementally maintained totals, without scanning routes.
+    """
+    service = RouteStatsService(db)
+    stats = await service.get_stats(period=period, from_date=from_date, to_date=to_date)
+    return model_response(stats)
 
 
 @router.get("/{route_id}", response_model=RouteResponse)
 async def get_route(
     route_id: UUID,
+    request: Request,
     current_user: CurrentUser,
     db: DbSession,
 ):
     """
     Get route by ID.
+    
+    Responses carry an ETag; a matching If-None-Match gets 304 Not Modified.
+    Serialized routes are cached until the route changes.
     """
+    cache_key, cached = await route_cache.lookup_route(route_id)
+    if cached:
+        etag, body = cached
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return cached_json_response(etag, body)
+    
     service = RouteService(db)
+    if "if-none-match" in request.headers:
+        etag = await service.get_etag(route_id)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    
     route = await service.get_by_id(route_id)
-    return RouteResponse.model_validate(route)
+    etag = service.route_etag(route)
+    body = dump_json(RouteResponse.model_validate(route))
+    await route_cache.store(cache_key, etag, body)
+    return cached_json_response(etag, body)
 
 
 @router.patch("/{route_id}", response_model=RouteResponse)
@@ -86,13 +317,18 @@ async def update_route(
     data: RouteUpdate,
     current_user: EditorUser,
     db: DbSession,
+    idempotency: IdempotencyGuard,
 ):
     """
     Update route (admin/dispatcher only).
     """
+    replayed = await idempotency.replay()
+    if replayed:
+        return replayed
+    
     service = RouteService(db)
     route = await service.update(route_id, data, current_user)
-    return RouteResponse.model_validate(route)
+    return await idempotency.store(model_response(RouteResponse.model_validate(route)))
 
 
 @router.put("/{route_id}/stops", response_model=RouteResponse)
@@ -101,13 +337,79 @@ async def update_route_stops(
     data: StopsUpdate,
     current_user: EditorUser,
     db: DbSession,
+    idempotency: IdempotencyGuard,
 ):
     """
     Replace all route stops (admin/dispatcher only).
     """
+    replayed = await idempotency.replay()
+    if replayed:
+        return replayed
+    
     service = RouteService(db)
     route = await service.update_stops(route_id, data, current_user)
-    return RouteResponse.model_validate(route)
+    return await idempotency.store(model_response(RouteResponse.model_validate(route)))
+
+
+@router.post("/{route_id}/stops", response_model=RouteResponse, status_code=201)
+async def add_route_stop(
+    route_id: UUID,
+    data: RouteStopCreate,
+    current_user: EditorUser,
+    db: DbSession,
+    idempotency: IdempotencyGuard,
+):
+    """
+    Insert a stop at its seq (admin/dispatcher only).
+    """
+    replayed = await idempotency.replay()
+    if replayed:
+        return replayed
+    
+    service = RouteService(db)
+    route = await service.add_stop(route_id, data, current_user)
+    return await idempotency.store(model_response(RouteResponse.model_validate(route), status_code=201))
+
+
+@router.patch("/{route_id}/stops/{stop_id}", response_model=RouteResponse)
+async def update_route_stop(
+    route_id: UUID,
+    stop_id: UUID,
+    data: RouteStopUpdate,
+    current_user: EditorUser,
+    db: DbSession,
+    idempotency: IdempotencyGuard,
+):
+    """
+    Update a single route stop (admin/dispatcher only).
+    """
+    replayed = await idempotency.replay()
+    if replayed:
+        return replayed
+    
+    service = RouteService(db)
+    route = await service.update_stop(route_id, stop_id, data, current_user)
+    return await idempotency.store(model_response(RouteResponse.model_validate(route)))
+
+
+@router.delete("/{route_id}/stops/{stop_id}", response_model=RouteResponse)
+async def delete_route_stop(
+    route_id: UUID,
+    stop_id: UUID,
+    current_user: EditorUser,
+    db: DbSession,
+    idempotency: IdempotencyGuard,
+):
+    """
+    Delete a single route stop (admin/dispatcher only).
+    """
+    replayed = await idempotency.replay()
+    if replayed:
+        return replayed
+    
+    service = RouteService(db)
+    route = await service.delete_stop(route_id, stop_id, current_user)
+    return await idempotency.store(model_response(RouteResponse.model_validate(route)))
 
 
 @router.post("/{route_id}/cancel", response_model=RouteCancelResponse)
@@ -115,14 +417,20 @@ async def cancel_route(
     route_id: UUID,
     current_user: EditorUser,
     db: DbSession,
+    idempotency: IdempotencyGuard,
 ):
     """
     Cancel a route (admin/dispatcher only).
     """
+    replayed = await idempotency.replay()
+    if replayed:
+        return replayed
+    
     service = RouteService(db)
     route = await service.cancel(route_id, current_user)
-    return RouteCancelResponse(
+    response = model_response(RouteCancelResponse(
         id=route.id,
         route_number=route.route_number,
         status=route.status,
-    )
+    ))
+    return await idempotency.store(response)
@@ -8,7 +8,11 @@ from app.schemas.user import (
     UserResponse,
     UserListResponse,
 )
+from app.schemas.auth import RevokeSessionsRequest, RevokeSessionsResponse
+from app.schemas.common import TotalMode
 from app.services.user import UserService
+from app.services.auth import AuthService
+from app.core.responses import model_response
 from .deps import AdminUser, DbSession
 
 router = APIRouter(prefix="/api/users", tags=["Users"])
@@ -39,18 +43,41 @@ async def list_users(
     db: DbSession,
     limit: int = Query(default=20, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
+    total_mode: TotalMode = Query(default=TotalMode.EXACT, alias="total"),
 ):
     """
     Get paginated list of users (admin only).
     """
     service = UserService(db)
-    users, total = await service.get_list(limit=limit, offset=offset)
+    users, total, has_more = await service.get_list(
+        limit=limit,
+        offset=offset,
+        total_mode=total_mode,
+    )
     
-    return UserListResponse(
+    return model_response(UserListResponse(
         items=[UserResponse.model_validate(u) for u in users],
         total=total,
         limit=limit,
         offset=offset,
+        has_more=has_more,
+    ))
+
+
+@router.post("/revoke-sessions", response_model=RevokeSessionsResponse)
+async def revoke_sessions(
+    data: RevokeSessionsRequest,
+    current_user: AdminUser,
+    db: DbSession,
+):
+    """
+    Revoke all sessions of the given users or of every user with a role (admin only).
+    """
+    service = AuthService(db)
+    users_affected, revoked_count = await service.revoke_sessions(data, current_user)
+    return RevokeSessionsResponse(
+        users_affected=users_affected,
+        revoked_count=revoked_count,
     )
 
 
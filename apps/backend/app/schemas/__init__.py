@@ -9,6 +9,9 @@ from .auth import (
     TokenResponse,
     RefreshRequest,
     ChangePasswordRequest,
+    RevokeSessionsRequest,
+    RevokeSessionsResponse,
+    Principal,
 )
 from .route import (
     RouteCreate,
@@ -16,6 +19,10 @@ from .route import (
     RouteResponse,
     RouteListResponse,
     RouteCancelResponse,
+    RouteSort,
+    RouteSummary,
+    ExportFormat,
+    RouteView,
 )
 from .route_stop import (
     RouteStopCreate,
@@ -24,6 +31,7 @@ from .route_stop import (
 )
 from .common import (
     PaginationParams,
+    TotalMode,
     ErrorResponse,
     ErrorDetail,
 )
@@ -37,15 +45,29 @@ __all__ = [
     "TokenResponse",
     "RefreshRequest",
     "ChangePasswordRequest",
+    "RevokeSessionsRequest",
+    "RevokeSessionsResponse",
+    "Principal",
     "RouteCreate",
     "RouteUpdate",
     "RouteResponse",
     "RouteListResponse",
     "RouteCancelResponse",
+    "RouteSort",
+    "ExportFormat",
+    "RouteImportResult",
+    "RouteImportResponse",
+    "RouteFilter",
+    "BulkStatusUpdate",
+    "BulkStatusResult",
+    "BulkStatusResponse",
+    "RouteSummary",
+    "RouteView",
     "RouteStopCreate",
     "RouteStopUpdate",
     "RouteStopResponse",
     "PaginationParams",
+    "TotalMode",
     "ErrorResponse",
     "ErrorDetail",
 ]
@@ -1,5 +1,7 @@
-from pydantic import BaseModel, Field
+from uuid import UUID
+from pydantic import BaseModel, Field, ConfigDict, model_validator
 
+from app.models.user import UserRole
 from .user import UserResponse
 from .common import EmailStr
 
@@ -30,6 +32,7 @@ class RefreshResponse(BaseModel):
     """Refresh token response schema."""
     
     access_token: str
+    refresh_token: str
     token_type: str = "bearer"
 
 
@@ -38,3 +41,40 @@ class ChangePasswordRequest(BaseModel):
     
     current_password: str = Field(min_length=1)
     new_password: str = Field(min_length=6, max_length=128)
+
+
+class RevokeSessionsRequest(BaseModel):
+    """Revoke sessions request schema (either user ids or a role)."""
+    
+    user_ids: list[UUID] | None = Field(default=None, min_length=1, max_length=1000)
+    role: UserRole | None = None
+    
+    @model_validator(mode="after")
+    def validate_target(self) -> "RevokeSessionsRequest":
+        """Validate exactly one target is given."""
+        if (self.user_ids is None) == (self.role is None):
+            raise ValueError("Specify either user_ids or role")
+        return self
+
+
+class RevokeSessionsResponse(BaseModel):
+    """Revoke sessions response schema."""
+    
+    users_affected: int
+    revoked_count: int
+
+
+class Principal(BaseModel):
+    """Authenticated identity resolved for a request.
+    
+    Carries only the columns needed for authorization, so resolving it
+    never loads the user's routes or refresh tokens.
+    """
+    
+    id: UUID
+    role: UserRole
+    is_active: bool
+    must_change_password: bool
+    token_epoch: int = 0
+    
+    model_config = ConfigDict(frozen=True, from_attributes=True)
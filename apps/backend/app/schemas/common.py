@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field, field_validator
 from typing import Any, Annotated
+from enum import Enum
 import re
 
 
@@ -36,6 +37,14 @@ class PaginationParams(BaseModel):
     offset: int = Field(default=0, ge=0)
 
 
+class TotalMode(str, Enum):
+    """How list endpoints compute the total number of matching items."""
+    
+    EXACT = "exact"
+    ESTIMATE = "estimate"
+    NONE = "none"
+
+
 class ErrorDetail(BaseModel):
     """Error detail item."""
     
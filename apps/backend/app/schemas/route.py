@@ -1,11 +1,41 @@
-from pydantic import BaseModel, Field, field_validator, ConfigDict
-from datetime import datetime
+from pydantic import BaseModel, Field, field_validator, model_validator, ConfigDict
+from datetime import datetime, date
 from uuid import UUID
 from typing import Optional
+from enum import Enum
 
 from app.models.route import RouteStatus
 from .route_stop import RouteStopCreate, RouteStopResponse
 from .user import UserResponse
+from .common import ErrorDetail
+
+
+class RouteSort(str, Enum):
+    """Ordering of the route list."""
+    
+    NEWEST = "newest"
+    RELEVANCE = "relevance"
+
+
+class RouteView(str, Enum):
+    """Shape of route list items."""
+    
+    FULL = "full"
+    SUMMARY = "summary"
+
+
+class ExportFormat(str, Enum):
+    """File format of route exports."""
+    
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class StatsPeriod(str, Enum):
+    """Length of the periods route statistics are grouped by."""
+    
+    DAY = "day"
+    WEEK = "week"
 
 
 class RouteBase(BaseModel):
@@ -96,13 +126,98 @@ class RouteResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class RouteSummary(BaseModel):
+    """Compact route list item without stops and creator."""
+    
+    id: UUID
+    route_number: str
+    title: str
+    status: RouteStatus
+    created_by: UUID
+    planned_departure_at: datetime | None
+    stop_count: int
+    origin_address: str | None
+    destination_address: str | None
+    created_at: datetime
+    updated_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
 class RouteListResponse(BaseModel):
     """Schema for paginated route list response."""
     
-    items: list[RouteResponse]
-    total: int
+    items: list[RouteResponse] | list[RouteSummary]
+    total: int | None
     limit: int
     offset: int
+    has_more: bool = False
+    next_cursor: str | None = None
+
+
+class RouteImportResult(BaseModel):
+    """Outcome of one item of a bulk route import."""
+    
+    index: int
+    ok: bool
+    id: UUID | None = None
+    route_number: str | None = None
+    errors: list[ErrorDetail] = []
+
+
+class RouteImportResponse(BaseModel):
+    """Schema for bulk route import response."""
+    
+    items: list[RouteImportResult]
+    created: int
+    failed: int
+    duration_ms: float
+    routes_per_second: float
+
+
+class RouteFilter(BaseModel):
+    """Route list filters selecting routes for bulk operations."""
+    
+    status: list[RouteStatus] | None = None
+    q: str | None = None
+    created_by: UUID | None = None
+    from_date: datetime | None = Field(default=None, alias="from")
+    to_date: datetime | None = Field(default=None, alias="to")
+    
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class BulkStatusUpdate(BaseModel):
+    """Schema for changing the status of many routes (either ids or a filter)."""
+    
+    status: RouteStatus
+    ids: list[UUID] | None = Field(default=None, min_length=1, max_length=1000)
+    filter: RouteFilter | None = None
+    
+    @model_validator(mode="after")
+    def validate_target(self) -> "BulkStatusUpdate":
+        """Validate exactly one target is given."""
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Specify either ids or filter")
+        return self
+
+
+class BulkStatusResult(BaseModel):
+    """Outcome of a status change for one route."""
+    
+    id: UUID
+    route_number: str | None = None
+    ok: bool
+    previous_status: RouteStatus | None = None
+    error: str | None = None
+
+
+class BulkStatusResponse(BaseModel):
+    """Schema for bulk status change response."""
+    
+    items: list[BulkStatusResult]
+    updated: int
+    failed: int
 
 
 class RouteCancelResponse(BaseModel):
@@ -112,3 +227,30 @@ class RouteCancelResponse(BaseModel):
     route_number: str
     status: RouteStatus
     message: str = "Route cancelled successfully"
+
+
+class CreatorCount(BaseModel):
+    """Number of routes created by one user."""
+    
+    user_id: UUID
+    full_name: str | None
+    count: int
+
+
+class PeriodCount(BaseModel):
+    """Number of routes in a day or week starting at ``start``."""
+    
+    start: date
+    count: int
+
+
+class RouteStatsResponse(BaseModel):
+    """Schema for route statistics response."""
+    
+    total: int
+    # Keyed by status value; every status is present
+    by_status: dict[str, int]
+    by_creator: list[CreatorCount]
+    period: StatsPeriod
+    created: list[PeriodCount]
+    planned_departures: list[PeriodCount]
@@ -47,6 +47,7 @@ class UserListResponse(BaseModel):
     """Schema for paginated user list response."""
     
     items: list[UserResponse]
-    total: int
+    total: int | None
     limit: int
     offset: int
+    has_more: bool = False
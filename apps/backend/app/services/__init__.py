@@ -1,5 +1,7 @@
 from .user import UserService
 from .auth import AuthService
 from .route import RouteService
+from .idempotency import IdempotencyService
+from .route_stats import RouteStatsService
 
-__all__ = ["UserService", "AuthService", "RouteService"]
+__all__ = ["UserService", "AuthService", "RouteService", "IdempotencyService", "RouteStatsService"]
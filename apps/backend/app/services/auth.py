@@ -1,18 +1,26 @@
+from uuid import UUID, uuid4
 from datetime import datetime, timedelta
+from functools import partial
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.user import User
+from app.models.user import User, UserRole
 from app.models.refresh_token import RefreshToken
 from app.repositories.user import UserRepository
 from app.repositories.refresh_token import RefreshTokenRepository
 from app.core.security import (
-    verify_password,
+    password_hasher,
+    access_token_claims,
     create_access_token,
     create_refresh_token,
     decode_token,
+    hash_token,
 )
+from app.schemas.auth import Principal, RevokeSessionsRequest
+from app.core.cache import invalidate_principals
+from app.core.response_cache import route_cache
+from app.db.session import after_commit
 from app.core.config import settings
-from app.core.exceptions import AuthenticationError
+from app.core.exceptions import AuthenticationError, AuthorizationError
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
@@ -26,6 +34,17 @@ class AuthService:
         self.user_repo = UserRepository(db)
         self.token_repo = RefreshTokenRepository(db)
     
+    def _create_access_token(self, user: User) -> str:
+        """Create access token carrying the user's role and token epoch."""
+        return create_access_token(
+            access_token_claims(
+                user.id,
+                user.role.value,
+                user.must_change_password,
+                user.token_epoch,
+            )
+        )
+    
     async def login(self, email: str, password: str) -> tuple[str, str, User]:
         """
         Authenticate user and return tokens.
@@ -38,7 +57,7 @@ class AuthService:
             raise AuthenticationError("Invalid email or password")
         
         # Check password
-        if not verify_password(password, user.password_hash):
+        if not await password_hasher.verify(password, user.password_hash):
             logger.warning("login_failed", email=email, reason="invalid_password")
             raise AuthenticationError("Invalid email or password")
         
@@ -47,26 +66,36 @@ class AuthService:
             logger.warning("login_failed", email=email, reason="user_inactive")
             raise AuthenticationError("User account is deactivated")
         
-        # Create tokens
-        access_token = create_access_token({"sub": str(user.id)})
-        refresh_token = create_refresh_token({"sub": str(user.id)})
+        # Create tokens, starting a new token family
+        access_token = self._create_access_token(user)
+        refresh_token = await self._issue_refresh_token(user.id, uuid4())
+        
+        # Keep the number of active sessions bounded
+        pruned = await self.token_repo.prune_sessions(
+            user.id,
+            keep=settings.MAX_ACTIVE_SESSIONS_PER_USER,
+        )
         
-        # Store refresh token
+        logger.info("login_success", user_id=str(user.id), email=email, sessions_pruned=pruned)
+        return access_token, refresh_token, user
+    
+    async def _issue_refresh_token(self, user_id: UUID, family_id: UUID) -> str:
+        """Create and store a refresh token in the given family."""
+        refresh_token = create_refresh_token({"sub": str(user_id)})
         expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
         token_record = RefreshToken(
-            token=refresh_token,
-            user_id=user.id,
+            token_hash=hash_token(refresh_token),
+            user_id=user_id,
+            family_id=family_id,
             expires_at=expires_at,
         )
         await self.token_repo.create(token_record)
-        
-        logger.info("login_success", user_id=str(user.id), email=email)
-        return access_token, refresh_token, user
+        return refresh_token
     
-    async def refresh(self, refresh_token: str) -> str:
+    async def refresh(self, refresh_token: str) -> tuple[str, str]:
         """
-        Refresh access token using refresh token.
-        Returns: new access_token
+        Rotate refresh token and issue a new access token.
+        Returns: (access_token, refresh_token)
         """
         # Decode token
         payload = decode_token(refresh_token)
@@ -76,27 +105,48 @@ class AuthService:
         if payload.get("type") != "refresh":
             raise AuthenticationError("Invalid token type")
         
-        # Check if token exists and is valid
-        token_record = await self.token_repo.get_by_token(refresh_token)
-        if not token_record:
-            raise AuthenticationError("Refresh token not found")
-        
-        if token_record.is_revoked:
-            raise AuthenticationError("Refresh token has been revoked")
-        
-        if token_record.expires_at < datetime.utcnow():
-            raise AuthenticationError("Refresh token has expired")
+        # Retire the presented token; only one caller can succeed
+        token_hash = hash_token(refresh_token)
+        rotated = await self.token_repo.rotate(token_hash)
+        if not rotated:
+            await self._reject_unusable_token(token_hash)
+        user_id, family_id = rotated
         
         # Get user
-        user = await self.user_repo.get_by_id(token_record.user_id)
+        user = await self.user_repo.get_by_id(user_id)
         if not user or not user.is_active:
             raise AuthenticationError("User not found or inactive")
         
-        # Create new access token
-        access_token = create_access_token({"sub": str(user.id)})
+        # Create new tokens in the same family
+        access_token = self._create_access_token(user)
+        new_refresh_token = await self._issue_refresh_token(user.id, family_id)
         
         logger.info("token_refreshed", user_id=str(user.id))
-        return access_token
+        return access_token, new_refresh_token
+    
+    async def _reject_unusable_token(self, token_hash: str) -> None:
+        """Raise the reason a refresh token cannot be rotated.
+        
+        A revoked token being presented again means it was copied: the
+        whole family is revoked so neither party can keep using it.
+        """
+        token_record = await self.token_repo.get_by_token_hash(token_hash)
+        if not token_record:
+            raise AuthenticationError("Refresh token not found")
+        
+        if token_record.is_revoked:
+            revoked = await self.token_repo.revoke_family(token_record.family_id)
+            # Persist the family revocation despite the error response
+            await self.db.commit()
+            logger.warning(
+                "refresh_token_reuse",
+                user_id=str(token_record.user_id),
+                family_id=str(token_record.family_id),
+                revoked_count=revoked,
+            )
+            raise AuthenticationError("Refresh token has been revoked")
+        
+        raise AuthenticationError("Refresh token has expired")
     
     async def logout(self, refresh_token: str) -> bool:
         """
@@ -118,3 +168,36 @@ class AuthService:
         count = await self.token_repo.revoke_all_for_user(user_id)
         logger.info("logout_all", user_id=str(user_id), revoked_count=count)
         return count
+    
+    async def revoke_sessions(
+        self,
+        data: RevokeSessionsRequest,
+        revoked_by: Principal,
+    ) -> tuple[int, int]:
+        """
+        Revoke refresh and access tokens of many users at once (admin only).
+        Returns: (users_affected, refresh_tokens_revoked)
+        """
+        if revoked_by.role != UserRole.ADMIN:
+            raise AuthorizationError("Only admins can revoke sessions")
+        
+        revoked_count = await self.token_repo.revoke_for_users(
+            user_ids=data.user_ids,
+            role=data.role,
+        )
+        epochs = await self.user_repo.bump_token_epochs(
+            user_ids=data.user_ids,
+            role=data.role,
+        )
+        if epochs:
+            after_commit(self.db, partial(invalidate_principals, epochs))
+            after_commit(self.db, route_cache.invalidate_users)
+        
+        logger.info(
+            "sessions_revoked",
+            revoked_by=str(revoked_by.id),
+            role=data.role.value if data.role else None,
+            users_affected=len(epochs),
+            revoked_count=revoked_count,
+        )
+        return len(epochs), revoked_count
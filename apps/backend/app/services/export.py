@@ -0,0 +1,120 @@
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import AsyncIterator
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.route import ExportFormat
+from app.repositories.route import RouteRepository
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+ROUTE_FIELDS = [
+    "id",
+    "route_number",
+    "title",
+    "status",
+    "created_by",
+    "created_by_name",
+    "planned_departure_at",
+    "comment",
+    "created_at",
+    "updated_at",
+]
+STOP_FIELDS = [
+    "seq",
+    "type",
+    "address",
+    "lat",
+    "lng",
+    "time_window_from",
+    "time_window_to",
+    "contact_name",
+    "contact_phone",
+]
+
+# Output is flushed in chunks of roughly this many bytes
+CHUNK_SIZE = 64 * 1024
+
+
+def _plain(value):
+    """Convert a column value to a JSON/CSV friendly value."""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _csv_cell(value):
+    """Convert a column value to a CSV cell, NULL becoming empty."""
+    value = _plain(value)
+    return "" if value is None else value
+
+
+class RouteExportService:
+    """Service streaming routes with their stops as NDJSON or CSV."""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repo = RouteRepository(db)
+    
+    async def stream(self, fmt: ExportFormat, **filters) -> AsyncIterator[bytes]:
+        """Stream encoded export chunks for the route list filters."""
+        rows = self.repo.stream_export_rows(**filters)
+        if fmt == ExportFormat.CSV:
+            lines = self._csv_lines(rows)
+        else:
+            lines = self._ndjson_lines(rows)
+        
+        buffer = []
+        size = 0
+        async for line in lines:
+            buffer.append(line)
+            size += len(line)
+            if size >= CHUNK_SIZE:
+                yield "".join(buffer).encode()
+                buffer.clear()
+                size = 0
+        if buffer:
+            yield "".join(buffer).encode()
+        logger.info("routes_exported", format=fmt.value)
+    
+    async def _ndjson_lines(self, rows) -> AsyncIterator[str]:
+        """One JSON object per route with its stops nested."""
+        current = None
+        async for row in rows:
+            if current is None or current["id"] != str(row.id):
+                if current is not None:
+                    yield json.dumps(current, ensure_ascii=False) + "\n"
+                current = {field: _plain(getattr(row, field)) for field in ROUTE_FIELDS}
+                current["stops"] = []
+            if row.stop_seq is not None:
+                current["stops"].append(
+                    {field: _plain(getattr(row, f"stop_{field}")) for field in STOP_FIELDS}
+                )
+        if current is not None:
+            yield json.dumps(current, ensure_ascii=False) + "\n"
+    
+    async def _csv_lines(self, rows) -> AsyncIterator[str]:
+        """One CSV row per stop, repeating the route columns."""
+        out = io.StringIO()
+        writer = csv.writer(out)
+        columns = ROUTE_FIELDS + [f"stop_{field}" for field in STOP_FIELDS]
+        writer.writerow(["route_id" if c == "id" else c for c in columns])
+        async for row in rows:
+            writer.writerow([_csv_cell(getattr(row, c)) for c in columns])
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+        if out.tell():
+            yield out.getvalue()
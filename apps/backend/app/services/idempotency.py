@@ -0,0 +1,61 @@
+import hashlib
+from uuid import UUID
+from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repositories.idempotency import IdempotencyRepository
+from app.core.config import settings
+from app.core.exceptions import ValidationError, ConflictError
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def request_fingerprint(method: str, path: str, body: bytes) -> str:
+    """Digest identifying the request an idempotency key was first used for."""
+    digest = hashlib.sha256()
+    for part in (method.upper().encode(), path.encode(), body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class IdempotencyService:
+    """Service for responses stored under client supplied idempotency keys.
+    
+    The key is claimed in the same transaction as the work it guards and
+    the response is written before that transaction commits, so a rolled
+    back request leaves no trace and a retry racing the first attempt
+    waits for it and then replays its response.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repo = IdempotencyRepository(db)
+    
+    async def begin(self, user_id: UUID, key: str, fingerprint: str) -> tuple[int, bytes] | None:
+        """
+        Claim a key before running a request, or find its stored response.
+        Returns: None if the request should run, else (status code, body) to replay
+        """
+        expires_at = datetime.utcnow() + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+        if await self.repo.reserve(user_id, key, fingerprint, expires_at):
+            return None
+        
+        record = await self.repo.get(user_id, key)
+        if record is None or record[1] is None:
+            raise ConflictError("A request with this Idempotency-Key is still in progress")
+        
+        stored_fingerprint, status_code, body = record
+        if stored_fingerprint != fingerprint:
+            raise ValidationError(
+                "Idempotency-Key was already used for a different request",
+                details=[{"field": "Idempotency-Key", "message": "Key reused with another request"}],
+            )
+        
+        logger.info("idempotent_request_replayed", user_id=str(user_id), key=key)
+        return status_code, body
+    
+    async def complete(self, user_id: UUID, key: str, status_code: int, body: bytes) -> None:
+        """Store the response of a request whose key was claimed by begin."""
+        await self.repo.complete(user_id, key, status_code, body)
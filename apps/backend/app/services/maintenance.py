@@ -0,0 +1,215 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.session import AsyncSessionLocal
+from app.repositories.refresh_token import RefreshTokenRepository
+from app.repositories.idempotency import IdempotencyRepository
+from app.services.route_stats import RouteStatsService
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Postgres advisory lock keys, so only one worker runs each task at a time
+TOKEN_REAPER_LOCK_KEY = 4207001
+ROUTE_STATS_LOCK_KEY = 4207002
+
+
+async def try_lock(session: AsyncSession, key: int) -> bool:
+    """Take a cross-worker lock; other backends run a single process."""
+    if session.bind.dialect.name != "postgresql":
+        return True
+    result = await session.execute(select(func.pg_try_advisory_lock(key)))
+    return bool(result.scalar())
+
+
+async def unlock(session: AsyncSession, key: int) -> None:
+    """Release a lock taken with try_lock."""
+    if session.bind.dialect.name != "postgresql":
+        return
+    await session.execute(select(func.pg_advisory_unlock(key)))
+
+
+class TokenReaper:
+    """Background task deleting expired and long-revoked refresh tokens.
+    
+    Expired idempotency keys are purged by the same passes.
+    """
+    
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        interval: float,
+        batch_size: int,
+        batch_pause: float,
+        revoked_retention: timedelta,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.revoked_retention = revoked_retention
+        
+        # Metrics
+        self.runs = 0
+        self.rows_removed = 0
+        self.last_run_removed = 0
+        self.last_run_duration = 0.0
+    
+    async def run_forever(self) -> None:
+        """Run cleanup passes until cancelled."""
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("token_reaper_failed", error=str(e))
+            await asyncio.sleep(self.interval)
+    
+    async def run_once(self) -> int | None:
+        """
+        Run one cleanup pass.
+        Returns: number of rows removed, or None if another worker is running
+        """
+        async with self.session_factory() as lock_session:
+            if not await try_lock(lock_session, TOKEN_REAPER_LOCK_KEY):
+                logger.info("token_reaper_skipped", reason="locked_by_another_worker")
+                return None
+            try:
+                return await self._delete_in_batches()
+            finally:
+                await unlock(lock_session, TOKEN_REAPER_LOCK_KEY)
+    
+    async def _delete_in_batches(self) -> int:
+        """Delete rows in short transactions with a pause between them."""
+        started = time.perf_counter()
+        revoked_before = datetime.utcnow() - self.revoked_retention
+        removed = 0
+        
+        while True:
+            async with self.session_factory() as session:
+                tokens = await RefreshTokenRepository(session).cleanup_expired(
+                    limit=self.batch_size,
+                    revoked_before=revoked_before,
+                )
+                keys = await IdempotencyRepository(session).cleanup_expired(limit=self.batch_size)
+                await session.commit()
+            
+            removed += tokens + keys
+            if tokens < self.batch_size and keys < self.batch_size:
+                break
+            await asyncio.sleep(self.batch_pause)
+        
+        duration = time.perf_counter() - started
+        self.runs += 1
+        self.rows_removed += removed
+        self.last_run_removed = removed
+        self.last_run_duration = duration
+        
+        logger.info(
+            "token_reaper_run",
+            rows_removed=removed,
+            duration_ms=round(duration * 1000, 1),
+        )
+        return removed
+    
+    def stats(self) -> dict[str, float]:
+        """Return reaper metrics."""
+        return {
+            "runs": self.runs,
+            "rows_removed": self.rows_removed,
+            "last_run_removed": self.last_run_removed,
+            "last_run_duration": self.last_run_duration,
+        }
+
+
+class RouteStatsReconciler:
+    """Background task recounting route statistics to correct drift."""
+    
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        interval: float,
+        lock_timeout: float = 2.0,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.lock_timeout = lock_timeout
+        
+        # Metrics
+        self.runs = 0
+        self.buckets_corrected = 0
+        self.last_run_corrected = 0
+        self.last_run_duration = 0.0
+    
+    async def run_forever(self) -> None:
+        """Run reconciliation passes until cancelled."""
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("route_stats_reconcile_failed", error=str(e))
+            await asyncio.sleep(self.interval)
+    
+    async def run_once(self) -> int | None:
+        """
+        Run one reconciliation pass.
+        Returns: number of buckets corrected, or None if another worker is
+        running or route writers kept the statistics locked
+        """
+        async with self.session_factory() as lock_session:
+            if not await try_lock(lock_session, ROUTE_STATS_LOCK_KEY):
+                logger.info("route_stats_reconcile_skipped", reason="locked_by_another_worker")
+                return None
+            try:
+                started = time.perf_counter()
+                async with self.session_factory() as session:
+                    corrected = await RouteStatsService(session).reconcile(self.lock_timeout)
+                    await session.commit()
+            finally:
+                await unlock(lock_session, ROUTE_STATS_LOCK_KEY)
+        if corrected is None:
+            return None
+        
+        duration = time.perf_counter() - started
+        self.runs += 1
+        self.buckets_corrected += corrected
+        self.last_run_corrected = corrected
+        self.last_run_duration = duration
+        
+        logger.info(
+            "route_stats_reconciled",
+            buckets_corrected=corrected,
+            duration_ms=round(duration * 1000, 1),
+        )
+        return corrected
+    
+    def stats(self) -> dict[str, float]:
+        """Return reconciler metrics."""
+        return {
+            "runs": self.runs,
+            "buckets_corrected": self.buckets_corrected,
+            "last_run_corrected": self.last_run_corrected,
+            "last_run_duration": self.last_run_duration,
+        }
+
+
+token_reaper = TokenReaper(
+    AsyncSessionLocal,
+    interval=settings.TOKEN_REAPER_INTERVAL_SECONDS,
+    batch_size=settings.TOKEN_REAPER_BATCH_SIZE,
+    batch_pause=settings.TOKEN_REAPER_BATCH_PAUSE_SECONDS,
+    revoked_retention=timedelta(hours=settings.REVOKED_TOKEN_RETENTION_HOURS),
+)
+
+route_stats_reconciler = RouteStatsReconciler(
+    AsyncSessionLocal,
+    interval=settings.ROUTE_STATS_RECONCILE_INTERVAL_SECONDS,
+    lock_timeout=settings.ROUTE_STATS_RECONCILE_LOCK_TIMEOUT_SECONDS,
+)
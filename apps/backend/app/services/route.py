@@ -1,22 +1,72 @@
-from uuid import UUID
+from uuid import UUID, uuid4
+from collections import defaultdict
+from functools import partial
 from datetime import datetime
+from typing import Any, AsyncIterator
+from pydantic import ValidationError as PydanticValidationError
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
 
-from app.models.user import User, UserRole
+from app.models.user import UserRole
 from app.models.route import Route, RouteStatus
-from app.models.route_stop import RouteStop
-from app.schemas.route import RouteCreate, RouteUpdate, StopsUpdate
+from app.models.route_stop import RouteStop, StopType
+from app.models.route_stat import RouteStatDimension
+from app.schemas.route_stop import RouteStopCreate, RouteStopUpdate
+from app.schemas.route import (
+    RouteCreate,
+    RouteUpdate,
+    RouteSort,
+    RouteView,
+    RouteImportResult,
+    BulkStatusUpdate,
+    BulkStatusResult,
+    StopsUpdate,
+)
+from app.schemas.auth import Principal
+from app.schemas.common import TotalMode, ErrorDetail
 from app.repositories.route import RouteRepository
+from app.services.route_stats import RouteStatsService, route_stat_keys
 from app.core.exceptions import (
     NotFoundError,
     ConflictError,
     AuthorizationError,
     BusinessRuleError,
+    ValidationError,
 )
+from app.core.pagination import decode_cursor
+from app.core.etag import make_etag
+from app.core.response_cache import route_cache
+from app.db.session import after_commit
+from app.core.config import settings
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+STOP_FIELDS = (
+    "type",
+    "address",
+    "lat",
+    "lng",
+    "time_window_from",
+    "time_window_to",
+    "contact_name",
+    "contact_phone",
+)
+
+
+def _stop_contents(stop: RouteStop | RouteStopCreate) -> tuple:
+    """Comparable stop fields other than seq."""
+    values = []
+    for field in STOP_FIELDS:
+        value = getattr(stop, field)
+        if field in ("lat", "lng") and value is not None:
+            # Numeric columns load as Decimal with 8 decimal places
+            value = round(float(value), 8)
+        values.append(value)
+    return tuple(values)
+
 
 class RouteService:
     """Service for route operations."""
@@ -24,8 +74,17 @@ class RouteService:
     def __init__(self, db: AsyncSession):
         self.db = db
         self.repo = RouteRepository(db)
+        self.stats = RouteStatsService(db)
     
-    def _can_edit_routes(self, user: User) -> bool:
+    def _stat_keys(self, route: Route) -> list[tuple[str, str]]:
+        """Statistics buckets the route is currently counted in."""
+        return route_stat_keys(route.status, route.created_by, route.created_at, route.planned_departure_at)
+    
+    def _invalidate_cache(self, route_id: UUID) -> None:
+        """Drop cached responses of the route and of route lists after commit."""
+        after_commit(self.db, partial(route_cache.invalidate_route, route_id))
+    
+    def _can_edit_routes(self, user: Principal) -> bool:
         """Check if user can create/edit routes."""
         return user.role in (UserRole.ADMIN, UserRole.DISPATCHER)
     
@@ -36,17 +95,70 @@ class RouteService:
             raise NotFoundError("Route", str(route_id))
         return route
     
+    async def get_etag(self, route_id: UUID) -> str:
+        """Get the ETag of a route response with a single indexed lookup."""
+        version = await self.repo.get_version(route_id)
+        if version is None:
+            raise NotFoundError("Route", str(route_id))
+        return make_etag(route_id, *version)
+    
+    def route_etag(self, route: Route) -> str:
+        """Get the ETag of a loaded route, equal to what get_etag returns."""
+        return make_etag(route.id, route.updated_at, route.created_by_user.updated_at)
+    
+    async def get_list_etag(self, params: list[tuple[str, str]], **filters) -> str:
+        """
+        Get the ETag of a route list page without loading the routes.
+        
+        Takes the same keyword arguments as get_list and runs the same page
+        query selecting only item versions (plus the count for the total).
+        """
+        rows, total, has_more = await self.get_list(versions_only=True, **filters)
+        return self.list_etag(params, rows, total, has_more)
+    
+    def list_etag(
+        self,
+        params: list[tuple[str, str]],
+        items: list,
+        total: int | None,
+        has_more: bool,
+    ) -> str:
+        """Get the ETag of a route list page from its routes or rows."""
+        versions = []
+        for item in items:
+            if isinstance(item, Route):
+                versions.append((item.id, item.updated_at, item.created_by_user.updated_at))
+            else:
+                versions.append((item.id, item.updated_at, getattr(item, "creator_updated_at", None)))
+        return make_etag(sorted(params), total, has_more, versions)
+    
     async def get_list(
         self,
         limit: int = 20,
         offset: int = 0,
-        status: RouteStatus | None = None,
+        status: list[RouteStatus] | None = None,
         q: str | None = None,
         created_by: UUID | None = None,
         from_date: datetime | None = None,
         to_date: datetime | None = None,
-    ) -> tuple[list[Route], int]:
-        """Get paginated list of routes with filters."""
+        cursor: str | None = None,
+        total_mode: TotalMode = TotalMode.EXACT,
+        sort: RouteSort = RouteSort.NEWEST,
+        view: RouteView = RouteView.FULL,
+        versions_only: bool = False,
+    ) -> tuple[list, int | None, bool]:
+        """
+        Get paginated list of routes with filters.
+        Returns: (routes or rows, total, has_more)
+        """
+        after = None
+        if cursor is not None:
+            if offset:
+                raise ValidationError("cursor and offset cannot be combined")
+            if q and sort == RouteSort.RELEVANCE:
+                raise ValidationError("cursor cannot be combined with relevance ordering")
+            after = decode_cursor(cursor)
+        
         return await self.repo.get_list(
             limit=limit,
             offset=offset,
@@ -55,12 +167,17 @@ class RouteService:
             created_by=created_by,
             from_date=from_date,
             to_date=to_date,
+            after=after,
+            total_mode=total_mode,
+            sort=sort,
+            view=view,
+            versions_only=versions_only,
         )
     
     async def create(
         self,
         data: RouteCreate,
-        created_by: User,
+        created_by: Principal,
     ) -> Route:
         """Create a new route."""
         # Check permission
@@ -73,45 +190,30 @@ class RouteService:
             route_number = await self.repo.get_next_route_number()
         else:
             # Check if route number already exists
-            existing = await self.repo.get_by_route_number(route_number)
-            if existing:
+            if await self.repo.get_existing_route_numbers([route_number]):
                 raise ConflictError(f"Route with number '{route_number}' already exists")
+            # Keep generated numbers from running into this one later
+            await self.repo.advance_route_numbers([route_number])
         
-        # Create route
+        # Build the whole aggregate in memory; one flush inserts the route
+        # and its stops, and nothing has to be read back for the response
         route = Route(
             route_number=route_number,
             title=data.title,
             status=RouteStatus.DRAFT,
             created_by=created_by.id,
+            created_by_user=await self.repo.get_creator(created_by.id),
             planned_departure_at=data.planned_departure_at,
             comment=data.comment,
+            stops=[
+                RouteStop(**stop_data.model_dump())
+                for stop_data in sorted(data.stops, key=lambda stop: stop.seq)
+            ],
         )
-        
         route = await self.repo.create(route)
+        await self.stats.record(added=[self._stat_keys(route)])
         
-        # Create stops
-        stops = []
-        for stop_data in data.stops:
-            stop = RouteStop(
-                route_id=route.id,
-                seq=stop_data.seq,
-                type=stop_data.type,
-                address=stop_data.address,
-                lat=stop_data.lat,
-                lng=stop_data.lng,
-                time_window_from=stop_data.time_window_from,
-                time_window_to=stop_data.time_window_to,
-                contact_name=stop_data.contact_name,
-                contact_phone=stop_data.contact_phone,
-            )
-            stops.append(stop)
-        
-        await self.repo.add_stops(stops)
-        await self.db.flush()
-        
-        # Expire and refresh to get updated stops
-        await self.db.refresh(route, ["stops"])
-        
+        self._invalidate_cache(route.id)
         logger.info(
             "route_created",
             route_id=str(route.id),
@@ -120,11 +222,146 @@ class RouteService:
         )
         return route
     
+    async def import_routes(
+        self,
+        items: AsyncIterator[Any],
+        created_by: Principal,
+    ) -> list[RouteImportResult]:
+        """
+        Create routes in bulk, validating and inserting them in batches.
+        
+        Every batch gets its route numbers in one query and is inserted with
+        one multi-row statement for routes and one for stops. A batch that
+        fails to insert is rolled back to its savepoint and reported as
+        failed; earlier batches are kept and its reserved numbers are skipped.
+        Returns: one result per input item, in input order
+        """
+        if not self._can_edit_routes(created_by):
+            raise AuthorizationError("You don't have permission to create routes")
+        
+        results: list[RouteImportResult] = []
+        batch: list[tuple[int, Any]] = []
+        async for item in items:
+            if len(results) + len(batch) >= settings.ROUTE_IMPORT_MAX_ITEMS:
+                raise ValidationError(
+                    f"Import is limited to {settings.ROUTE_IMPORT_MAX_ITEMS} routes per request"
+                )
+            batch.append((len(results) + len(batch), item))
+            if len(batch) >= settings.ROUTE_IMPORT_BATCH_SIZE:
+                results.extend(await self._import_batch(batch, created_by))
+                batch = []
+        if batch:
+            results.extend(await self._import_batch(batch, created_by))
+        
+        created = sum(result.ok for result in results)
+        if created:
+            after_commit(self.db, route_cache.invalidate_route)
+        logger.info(
+            "routes_imported",
+            created=created,
+            failed=len(results) - created,
+            created_by=str(created_by.id),
+        )
+        return results
+    
+    async def _import_batch(
+        self,
+        batch: list[tuple[int, Any]],
+        created_by: Principal,
+    ) -> list[RouteImportResult]:
+        """Validate and insert one batch of imported routes."""
+        results: dict[int, RouteImportResult] = {}
+        valid: list[tuple[int, RouteCreate]] = []
+        for index, item in batch:
+            try:
+                if isinstance(item, Exception):
+                    raise ValueError(str(item))
+                valid.append((index, RouteCreate.model_validate(item)))
+            except PydanticValidationError as e:
+                results[index] = RouteImportResult(index=index, ok=False, errors=[
+                    ErrorDetail(
+                        field=".".join(str(part) for part in error["loc"]) or None,
+                        message=error["msg"],
+                    )
+                    for error in e.errors()
+                ])
+            except ValueError as e:
+                results[index] = RouteImportResult(index=index, ok=False, errors=[
+                    ErrorDetail(field=None, message=f"Invalid JSON: {e}"),
+                ])
+        
+        # Explicit numbers must be unique in the database and in the batch
+        explicit = [data.route_number for _, data in valid if data.route_number]
+        taken = await self.repo.get_existing_route_numbers(explicit)
+        seen: set[str] = set()
+        accepted: list[tuple[int, RouteCreate]] = []
+        for index, data in valid:
+            number = data.route_number
+            if number and (number in taken or number in seen):
+                results[index] = RouteImportResult(index=index, ok=False, errors=[
+                    ErrorDetail(
+                        field="route_number",
+                        message=f"Route with number '{number}' already exists",
+                    ),
+                ])
+                continue
+            if number:
+                seen.add(number)
+            accepted.append((index, data))
+        
+        await self.repo.advance_route_numbers(list(seen))
+        generated = iter(await self.repo.reserve_route_numbers(
+            sum(not data.route_number for _, data in accepted)
+        ))
+        now = datetime.utcnow()
+        route_rows: list[dict] = []
+        stop_rows: list[dict] = []
+        for index, data in accepted:
+            route_id = uuid4()
+            route_rows.append({
+                "id": route_id,
+                "route_number": data.route_number or next(generated),
+                "title": data.title,
+                "status": RouteStatus.DRAFT,
+                "created_by": created_by.id,
+                "planned_departure_at": data.planned_departure_at,
+                "comment": data.comment,
+                "created_at": now,
+                "updated_at": now,
+            })
+            for stop in data.stops:
+                stop_rows.append({"id": uuid4(), "route_id": route_id, "created_at": now, **stop.model_dump()})
+        
+        if route_rows:
+            try:
+                async with self.db.begin_nested():
+                    await self.repo.bulk_insert(route_rows, stop_rows)
+            except IntegrityError as e:
+                logger.warning("route_import_batch_failed", size=len(route_rows), error=str(e.orig))
+                for (index, _), row in zip(accepted, route_rows):
+                    results[index] = RouteImportResult(index=index, ok=False, errors=[
+                        ErrorDetail(field=None, message="Route conflicts with existing data"),
+                    ])
+            else:
+                for (index, _), row in zip(accepted, route_rows):
+                    results[index] = RouteImportResult(
+                        index=index,
+                        ok=True,
+                        id=row["id"],
+                        route_number=row["route_number"],
+                    )
+                await self.stats.record(added=[
+                    route_stat_keys(row["status"], row["created_by"], row["created_at"], row["planned_departure_at"])
+                    for row in route_rows
+                ])
+        
+        return [results[index] for index, _ in batch]
+    
     async def update(
         self,
         route_id: UUID,
         data: RouteUpdate,
-        updated_by: User,
+        updated_by: Principal,
     ) -> Route:
         """Update a route."""
         # Check permission
@@ -155,6 +392,7 @@ class RouteService:
                     )
         
         # Update fields
+        previous_keys = self._stat_keys(route)
         if data.title is not None:
             route.title = data.title
         if data.planned_departure_at is not None:
@@ -165,7 +403,9 @@ class RouteService:
             route.status = data.status
         
         route = await self.repo.update(route)
+        await self.stats.record(added=[self._stat_keys(route)], removed=[previous_keys])
         
+        self._invalidate_cache(route.id)
         logger.info(
             "route_updated",
             route_id=str(route.id),
@@ -177,14 +417,148 @@ class RouteService:
         self,
         route_id: UUID,
         data: StopsUpdate,
-        updated_by: User,
+        updated_by: Principal,
     ) -> Route:
         """Update route stops (replace all)."""
         # Check permission
         if not self._can_edit_routes(updated_by):
             raise AuthorizationError("You don't have permission to update routes")
         
-        # Get route
+        route = await self._get_route_for_stop_edit(route_id)
+        
+        changes = self._diff_stops(route, data.stops)
+        await self.repo.apply_stop_changes(*changes)
+        deleted, _, updates, inserts = changes
+        await self._sync_stops(
+            route,
+            deleted=set(deleted),
+            values={row["stop_id"]: {k: v for k, v in row.items() if k != "stop_id"} for row in updates},
+            inserted=inserts,
+        )
+        
+        logger.info(
+            "route_stops_updated",
+            route_id=str(route.id),
+            updated_by=str(updated_by.id),
+            stops_count=len(data.stops),
+            stops_deleted=len(changes[0]),
+            stops_updated=len(changes[2]),
+            stops_inserted=len(changes[3]),
+        )
+        return route
+    
+    async def add_stop(
+        self,
+        route_id: UUID,
+        data: RouteStopCreate,
+        updated_by: Principal,
+    ) -> Route:
+        """Insert a stop at its seq, moving the stops from that seq on one place later."""
+        if not self._can_edit_routes(updated_by):
+            raise AuthorizationError("You don't have permission to update routes")
+        
+        route = await self._get_route_for_stop_edit(route_id)
+        
+        shifted = await self._make_room(route, data.seq)
+        stop_id = uuid4()
+        row = {"id": stop_id, "route_id": route.id, "created_at": datetime.utcnow(), **data.model_dump()}
+        await self.repo.bulk_insert_stops([row])
+        await self._sync_stops(route, values=shifted, inserted=[row])
+        
+        logger.info(
+            "route_stop_added",
+            route_id=str(route.id),
+            stop_id=str(stop_id),
+            seq=data.seq,
+            updated_by=str(updated_by.id),
+        )
+        return route
+    
+    async def update_stop(
+        self,
+        route_id: UUID,
+        stop_id: UUID,
+        data: RouteStopUpdate,
+        updated_by: Principal,
+    ) -> Route:
+        """
+        Update fields of a single stop.
+        
+        A new seq works as in add_stop: the stop takes that seq and the
+        stops from it on move one place later.
+        """
+        if not self._can_edit_routes(updated_by):
+            raise AuthorizationError("You don't have permission to update routes")
+        
+        route = await self._get_route_for_stop_edit(route_id)
+        stop = self._find_stop(route, stop_id)
+        
+        values = data.model_dump(exclude_unset=True)
+        missing = [field for field in ("seq", "type", "address") if field in values and values[field] is None]
+        if missing:
+            raise ValidationError(
+                "Required stop fields cannot be null",
+                details=[{"field": field, "message": "Field cannot be null"} for field in missing],
+            )
+        
+        if "type" in values:
+            self._check_stop_types([
+                values["type"] if other.id == stop.id else other.type
+                for other in route.stops
+            ])
+        
+        shifted = {}
+        if values.get("seq", stop.seq) != stop.seq:
+            # Free the stop's own seq before shifting its neighbours
+            await self.repo.update_stop(stop.id, {"seq": 0})
+            shifted = await self._make_room(route, values["seq"], moving=stop)
+        else:
+            values.pop("seq", None)
+        
+        if values:
+            await self.repo.update_stop(stop.id, values)
+        await self._sync_stops(route, values={**shifted, stop.id: values})
+        
+        logger.info(
+            "route_stop_updated",
+            route_id=str(route.id),
+            stop_id=str(stop_id),
+            fields=sorted(values),
+            updated_by=str(updated_by.id),
+        )
+        return route
+    
+    async def delete_stop(
+        self,
+        route_id: UUID,
+        stop_id: UUID,
+        updated_by: Principal,
+    ) -> Route:
+        """Delete a single stop; the seqs of the other stops are kept."""
+        if not self._can_edit_routes(updated_by):
+            raise AuthorizationError("You don't have permission to update routes")
+        
+        route = await self._get_route_for_stop_edit(route_id)
+        stop = self._find_stop(route, stop_id)
+        
+        remaining = [other.type for other in route.stops if other.id != stop.id]
+        if len(remaining) < 2:
+            raise BusinessRuleError("Route must have at least 2 stops")
+        self._check_stop_types(remaining)
+        
+        await self.repo.delete_stop(stop.id)
+        await self._sync_stops(route, deleted={stop.id})
+        
+        logger.info(
+            "route_stop_deleted",
+            route_id=str(route.id),
+            stop_id=str(stop_id),
+            updated_by=str(updated_by.id),
+        )
+        return route
+    
+    async def _get_route_for_stop_edit(self, route_id: UUID) -> Route:
+        """Load a route whose stops may be changed."""
         route = await self.repo.get_by_id(route_id)
         if not route:
             raise NotFoundError("Route", str(route_id))
@@ -194,45 +568,131 @@ class RouteService:
             raise BusinessRuleError(
                 f"Cannot modify stops of {route.status.value} routes"
             )
+        return route
+    
+    def _find_stop(self, route: Route, stop_id: UUID) -> RouteStop:
+        """Get a stop of the route by ID."""
+        for stop in route.stops:
+            if stop.id == stop_id:
+                return stop
+        raise NotFoundError("Stop", str(stop_id))
+    
+    def _check_stop_types(self, types: list[StopType]) -> None:
+        """Check the stops still include an origin and a destination."""
+        if StopType.ORIGIN not in types:
+            raise BusinessRuleError("Route must have an origin stop")
+        if StopType.DESTINATION not in types:
+            raise BusinessRuleError("Route must have a destination stop")
+    
+    async def _make_room(
+        self,
+        route: Route,
+        seq: int,
+        moving: RouteStop | None = None,
+    ) -> dict[UUID, dict]:
+        """
+        Free ``seq`` by moving the run of consecutive stops starting there one place later.
+        Returns: new seq of every moved stop, keyed by stop ID
+        """
+        by_seq = {stop.seq: stop for stop in route.stops if stop is not moving}
+        if seq not in by_seq:
+            return {}
+        last = seq
+        while last + 1 in by_seq:
+            last += 1
+        await self.repo.shift_stops(route.id, seq, last, 1)
+        return {by_seq[n].id: {"seq": n + 1} for n in range(seq, last + 1)}
+    
+    async def _sync_stops(
+        self,
+        route: Route,
+        deleted: set[UUID] = frozenset(),
+        values: dict[UUID, dict] | None = None,
+        inserted: list[dict] = (),
+    ) -> None:
+        """
+        Apply rows written by bulk statements to the loaded stops and bump the route version.
         
-        # Delete existing stops
-        await self.repo.delete_stops(route_id)
-        
-        # Create new stops
+        The statements bypass the session, so instead of reading the stops
+        back the loaded collection is brought in line in memory.
+        """
+        values = values or {}
         stops = []
-        for stop_data in data.stops:
-            stop = RouteStop(
-                route_id=route.id,
-                seq=stop_data.seq,
-                type=stop_data.type,
-                address=stop_data.address,
-                lat=stop_data.lat,
-                lng=stop_data.lng,
-                time_window_from=stop_data.time_window_from,
-                time_window_to=stop_data.time_window_to,
-                contact_name=stop_data.contact_name,
-                contact_phone=stop_data.contact_phone,
-            )
+        for stop in route.stops:
+            if stop.id in deleted:
+                self.db.expunge(stop)
+                continue
+            for field, value in values.get(stop.id, {}).items():
+                set_committed_value(stop, field, value)
             stops.append(stop)
+        for row in inserted:
+            stop = RouteStop(**row)
+            # Attach as an already persisted row, so no INSERT is flushed
+            make_transient_to_detached(stop)
+            self.db.add(stop)
+            stops.append(stop)
+        set_committed_value(route, "stops", sorted(stops, key=lambda stop: stop.seq))
         
-        await self.repo.add_stops(stops)
+        # Stops are part of the route representation
+        route.updated_at = datetime.utcnow()
         await self.db.flush()
+        self._invalidate_cache(route.id)
+    
+    def _diff_stops(
+        self,
+        route: Route,
+        wanted: list[RouteStopCreate],
+    ) -> tuple[list[UUID], list[UUID], list[dict], list[dict]]:
+        """
+        Compute the changes turning the route's stops into the wanted ones.
         
-        # Expire and refresh to get updated stops
-        await self.db.refresh(route, ["stops"])
+        Wanted stops are matched to existing rows with identical contents
+        first (so moved stops keep their id and only change seq), then to
+        rows with the same type and address, then to the row at the same
+        seq (edited in place). Unmatched rows are deleted and unmatched
+        wanted stops inserted.
+        Returns: (ids to delete, ids changing seq, update rows, insert rows)
+        """
+        remaining = list(route.stops)
+        unmatched = list(wanted)
+        matched: list[tuple[RouteStop, RouteStopCreate]] = []
+        for key in (_stop_contents, lambda stop: (stop.type, stop.address), lambda stop: stop.seq):
+            candidates: dict[Any, list[RouteStop]] = defaultdict(list)
+            for stop in remaining:
+                candidates[key(stop)].append(stop)
+            
+            still_unmatched = []
+            for data in unmatched:
+                stops = candidates.get(key(data))
+                if stops:
+                    stop = next((s for s in stops if s.seq == data.seq), stops[0])
+                    stops.remove(stop)
+                    matched.append((stop, data))
+                else:
+                    still_unmatched.append(data)
+            unmatched = still_unmatched
+            remaining = [stop for stops in candidates.values() for stop in stops]
         
-        logger.info(
-            "route_stops_updated",
-            route_id=str(route.id),
-            updated_by=str(updated_by.id),
-            stops_count=len(stops),
+        now = datetime.utcnow()
+        updates = [
+            {"stop_id": stop.id, **data.model_dump()}
+            for stop, data in matched
+            if stop.seq != data.seq or _stop_contents(stop) != _stop_contents(data)
+        ]
+        return (
+            [stop.id for stop in remaining],
+            [stop.id for stop, data in matched if stop.seq != data.seq],
+            updates,
+            [
+                {"id": uuid4(), "route_id": route.id, "created_at": now, **data.model_dump()}
+                for data in unmatched
+            ],
         )
-        return route
     
     async def cancel(
         self,
         route_id: UUID,
-        cancelled_by: User,
+        cancelled_by: Principal,
     ) -> Route:
         """Cancel a route."""
         # Check permission
@@ -251,9 +711,12 @@ class RouteService:
             raise BusinessRuleError("Completed routes cannot be cancelled")
         
         # Cancel route
+        previous_keys = self._stat_keys(route)
         route.status = RouteStatus.CANCELLED
         route = await self.repo.update(route)
+        await self.stats.record(added=[self._stat_keys(route)], removed=[previous_keys])
         
+        self._invalidate_cache(route.id)
         logger.info(
             "route_cancelled",
             route_id=str(route.id),
@@ -261,6 +724,87 @@ class RouteService:
         )
         return route
     
+    async def bulk_update_status(
+        self,
+        data: BulkStatusUpdate,
+        updated_by: Principal,
+    ) -> list[BulkStatusResult]:
+        """
+        Change the status of many routes with the same rules as update/cancel.
+        
+        Runs one SELECT of the candidates (with their origin/destination
+        check computed in SQL) and one UPDATE of the eligible ones, however
+        many routes are selected.
+        Returns: one result per requested id, or per route matching the filter
+        """
+        if not self._can_edit_routes(updated_by):
+            raise AuthorizationError("You don't have permission to update routes")
+        
+        limit = settings.ROUTE_BULK_STATUS_MAX_ROUTES
+        if data.ids is not None:
+            rows = await self.repo.get_status_candidates(ids=data.ids)
+        else:
+            rows = await self.repo.get_status_candidates(
+                limit=limit + 1,
+                **data.filter.model_dump(),
+            )
+            if len(rows) > limit:
+                raise ValidationError(f"Filter matches more than {limit} routes")
+        
+        target = data.status
+        errors: dict[UUID, str] = {}
+        eligible = []
+        for row in rows:
+            if not self._is_valid_status_transition(row.status, target):
+                errors[row.id] = f"Invalid status transition from {row.status.value} to {target.value}"
+            elif target == RouteStatus.ACTIVE and not row.has_stops:
+                errors[row.id] = "Route must have origin and destination stops before activation"
+            else:
+                eligible.append(row.id)
+        
+        updated = await self.repo.set_status(
+            eligible,
+            target,
+            from_statuses=[s for s in RouteStatus if self._is_valid_status_transition(s, target)],
+            require_stops=target == RouteStatus.ACTIVE,
+        )
+        # Only the status moves; a status changed concurrently since the
+        # candidates were read is corrected by the reconciliation
+        status_keys = {row.id: [(RouteStatDimension.STATUS.value, row.status.value)] for row in rows}
+        await self.stats.record(
+            added=[[(RouteStatDimension.STATUS.value, target.value)]] * len(updated),
+            removed=[status_keys[route_id] for route_id in updated],
+        )
+        
+        results = [
+            BulkStatusResult(
+                id=row.id,
+                route_number=row.route_number,
+                ok=row.id in updated,
+                previous_status=row.status,
+                error=None if row.id in updated else errors.get(row.id, "Route was changed concurrently"),
+            )
+            for row in rows
+        ]
+        if data.ids is not None:
+            found = {row.id for row in rows}
+            results.extend(
+                BulkStatusResult(id=route_id, ok=False, error="Route not found")
+                for route_id in dict.fromkeys(data.ids)
+                if route_id not in found
+            )
+        
+        if updated:
+            after_commit(self.db, partial(route_cache.invalidate_routes, list(updated)))
+        logger.info(
+            "route_status_bulk_updated",
+            status=target.value,
+            updated=len(updated),
+            failed=len(results) - len(updated),
+            updated_by=str(updated_by.id),
+        )
+        return results
+    
     def _is_valid_status_transition(
         self,
         current: RouteStatus,
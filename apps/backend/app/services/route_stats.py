@@ -0,0 +1,130 @@
+from uuid import UUID
+from collections import Counter
+from datetime import datetime, date, timedelta
+from typing import Iterable
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.route import RouteStatus
+from app.models.route_stat import RouteStatDimension
+from app.schemas.route import StatsPeriod, CreatorCount, PeriodCount, RouteStatsResponse
+from app.repositories.route_stats import RouteStatsRepository, StatKey, stat_bucket
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def route_stat_keys(
+    status: RouteStatus,
+    created_by: UUID,
+    created_at: datetime,
+    planned_departure_at: datetime | None,
+) -> list[StatKey]:
+    """Buckets a route with these values is counted in."""
+    keys = [
+        (RouteStatDimension.STATUS.value, stat_bucket(status)),
+        (RouteStatDimension.CREATOR.value, stat_bucket(created_by)),
+        (RouteStatDimension.CREATED_DAY.value, stat_bucket(created_at.date())),
+    ]
+    if planned_departure_at is not None:
+        keys.append((RouteStatDimension.DEPARTURE_DAY.value, stat_bucket(planned_departure_at.date())))
+    return keys
+
+
+class RouteStatsService:
+    """Service for route statistics kept in a summary table.
+    
+    Route writes add their changes to the counts in their own transaction,
+    so reading statistics never scans routes. A periodic reconciliation
+    recounts everything and corrects any drift.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repo = RouteStatsRepository(db)
+    
+    async def record(
+        self,
+        added: Iterable[list[StatKey]] = (),
+        removed: Iterable[list[StatKey]] = (),
+    ) -> None:
+        """Count routes entering (added) and leaving (removed) buckets."""
+        deltas: Counter[StatKey] = Counter()
+        for keys in added:
+            deltas.update(keys)
+        for keys in removed:
+            deltas.subtract(keys)
+        await self.repo.apply({key: delta for key, delta in deltas.items() if delta})
+    
+    async def get_stats(
+        self,
+        period: StatsPeriod = StatsPeriod.DAY,
+        from_date: date | None = None,
+        to_date: date | None = None,
+    ) -> RouteStatsResponse:
+        """
+        Get route counts by status, creator and day or week.
+        
+        The date range limits the created and planned departure series;
+        weeks start on Monday.
+        """
+        counts = await self.repo.get_counts([RouteStatDimension.STATUS, RouteStatDimension.CREATOR])
+        counts.update(await self.repo.get_counts(
+            [RouteStatDimension.CREATED_DAY, RouteStatDimension.DEPARTURE_DAY],
+            from_bucket=from_date.isoformat() if from_date else None,
+            to_bucket=to_date.isoformat() if to_date else None,
+        ))
+        
+        by_status = {status.value: 0 for status in RouteStatus}
+        creators: dict[UUID, int] = {}
+        series: dict[str, Counter[date]] = {
+            RouteStatDimension.CREATED_DAY.value: Counter(),
+            RouteStatDimension.DEPARTURE_DAY.value: Counter(),
+        }
+        for (dimension, bucket), count in counts.items():
+            if dimension == RouteStatDimension.STATUS.value:
+                by_status[bucket] = count
+            elif dimension == RouteStatDimension.CREATOR.value:
+                creators[UUID(bucket)] = count
+            else:
+                day = date.fromisoformat(bucket)
+                if period == StatsPeriod.WEEK:
+                    day -= timedelta(days=day.weekday())
+                series[dimension][day] += count
+        
+        names = await self.repo.get_user_names(list(creators))
+        return RouteStatsResponse(
+            total=sum(by_status.values()),
+            by_status=by_status,
+            by_creator=[
+                CreatorCount(user_id=user_id, full_name=names.get(user_id), count=count)
+                for user_id, count in sorted(creators.items(), key=lambda item: (-item[1], str(item[0])))
+            ],
+            period=period,
+            created=self._series(series[RouteStatDimension.CREATED_DAY.value]),
+            planned_departures=self._series(series[RouteStatDimension.DEPARTURE_DAY.value]),
+        )
+    
+    def _series(self, counts: Counter[date]) -> list[PeriodCount]:
+        return [PeriodCount(start=start, count=counts[start]) for start in sorted(counts)]
+    
+    async def reconcile(self, lock_timeout: float) -> int | None:
+        """
+        Recount routes and correct the buckets of the summary table that drifted.
+        
+        The full recount does not block writers. Writes made meanwhile can
+        make more buckets look wrong, so only those buckets are counted again
+        with writers locked out, and the correct counts are written.
+        Returns: number of buckets that had drifted, or None if writers held
+        the table for longer than lock_timeout seconds
+        """
+        counts = await self.repo.count_routes()
+        if not await self.repo.lock(lock_timeout):
+            logger.info("route_stats_reconcile_skipped", reason="lock_timeout")
+            return None
+        changed = await self.repo.find_changed(counts)
+        if not changed:
+            return 0
+        drift = await self.repo.replace(await self.repo.count_routes(changed), changed)
+        if drift:
+            logger.warning("route_stats_drift_corrected", buckets=drift)
+        return drift
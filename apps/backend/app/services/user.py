@@ -1,10 +1,16 @@
 from uuid import UUID
+from functools import partial
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, UserUpdate
+from app.schemas.auth import Principal
+from app.schemas.common import TotalMode
 from app.repositories.user import UserRepository
-from app.core.security import get_password_hash
+from app.core.security import password_hasher
+from app.core.cache import invalidate_principals
+from app.core.response_cache import route_cache
+from app.db.session import after_commit
 from app.core.exceptions import NotFoundError, ConflictError, AuthorizationError
 from app.core.logging import get_logger
 
@@ -18,6 +24,15 @@ class UserService:
         self.db = db
         self.repo = UserRepository(db)
     
+    def _bump_token_epoch(self, user: User) -> None:
+        """Invalidate all access tokens issued to the user so far."""
+        user.token_epoch += 1
+    
+    def _invalidate_principal(self, user: User) -> None:
+        """Drop cached authorization state and responses embedding the user."""
+        after_commit(self.db, partial(invalidate_principals, {user.id: user.token_epoch}))
+        after_commit(self.db, route_cache.invalidate_users)
+    
     async def get_by_id(self, user_id: UUID) -> User:
         """Get user by ID."""
         user = await self.repo.get_by_id(user_id)
@@ -33,14 +48,18 @@ class UserService:
         self,
         limit: int = 20,
         offset: int = 0,
-    ) -> tuple[list[User], int]:
-        """Get paginated list of users."""
-        return await self.repo.get_list(limit=limit, offset=offset)
+        total_mode: TotalMode = TotalMode.EXACT,
+    ) -> tuple[list[User], int | None, bool]:
+        """
+        Get paginated list of users.
+        Returns: (users, total, has_more)
+        """
+        return await self.repo.get_list(limit=limit, offset=offset, total_mode=total_mode)
     
     async def create(
         self,
         data: UserCreate,
-        created_by: User,
+        created_by: Principal,
     ) -> User:
         """Create a new user (admin only)."""
         # Check permission
@@ -56,7 +75,7 @@ class UserService:
         user = User(
             email=data.email,
             full_name=data.full_name,
-            password_hash=get_password_hash(data.password),
+            password_hash=await password_hasher.hash(data.password),
             role=data.role,
             must_change_password=True,
         )
@@ -69,7 +88,7 @@ class UserService:
         self,
         user_id: UUID,
         data: UserUpdate,
-        updated_by: User,
+        updated_by: Principal,
     ) -> User:
         """Update a user (admin only)."""
         # Check permission
@@ -82,14 +101,21 @@ class UserService:
             raise NotFoundError("User", str(user_id))
         
         # Update fields
+        revoke_tokens = False
         if data.full_name is not None:
             user.full_name = data.full_name
-        if data.role is not None:
+        if data.role is not None and data.role != user.role:
             user.role = data.role
-        if data.is_active is not None:
+            revoke_tokens = True
+        if data.is_active is not None and data.is_active != user.is_active:
             user.is_active = data.is_active
+            revoke_tokens = True
+        
+        if revoke_tokens:
+            self._bump_token_epoch(user)
         
         user = await self.repo.update(user)
+        self._invalidate_principal(user)
         logger.info("user_updated", user_id=str(user.id), updated_by=str(updated_by.id))
         return user
     
@@ -97,7 +123,7 @@ class UserService:
         self,
         user_id: UUID,
         new_password: str,
-        reset_by: User,
+        reset_by: Principal,
     ) -> User:
         """Reset user password (admin only)."""
         # Check permission
@@ -110,10 +136,12 @@ class UserService:
             raise NotFoundError("User", str(user_id))
         
         # Reset password
-        user.password_hash = get_password_hash(new_password)
+        user.password_hash = await password_hasher.hash(new_password)
         user.must_change_password = True
+        self._bump_token_epoch(user)
         
         user = await self.repo.update(user)
+        self._invalidate_principal(user)
         logger.info("password_reset", user_id=str(user.id), reset_by=str(reset_by.id))
         return user
     
@@ -123,10 +151,12 @@ class UserService:
         new_password: str,
     ) -> User:
         """Change own password."""
-        user.password_hash = get_password_hash(new_password)
+        user.password_hash = await password_hasher.hash(new_password)
         user.must_change_password = False
+        self._bump_token_epoch(user)
         
         user = await self.repo.update(user)
+        self._invalidate_principal(user)
         logger.info("password_changed", user_id=str(user.id))
         return user
     
@@ -144,7 +174,7 @@ class UserService:
         user = User(
             email=email,
             full_name=full_name,
-            password_hash=get_password_hash(password),
+            password_hash=await password_hasher.hash(password),
             role=UserRole.ADMIN,
             must_change_password=False,
         )
@@ -1,20 +1,38 @@
 import pytest
+from contextlib import nullcontext
 from typing import AsyncGenerator
 from uuid import uuid4
 
 from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 
 from app.main import app
 from app.db.base import Base
-from app.db.session import get_db
+from app.db.session import get_db, get_session_factory, run_after_commit
 from app.models.user import User, UserRole
 from app.core.security import get_password_hash, create_access_token
+from app.core.cache import principal_cache, token_epochs, count_cache
+from app.core.response_cache import route_cache
 
 # Use SQLite for testing
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Isolate tests from state cached by earlier requests."""
+    principal_cache.clear()
+    token_epochs.clear()
+    count_cache.clear()
+    route_cache.clear()
+    yield
+    principal_cache.clear()
+    token_epochs.clear()
+    count_cache.clear()
+    route_cache.clear()
+
+
 @pytest.fixture(scope="function")
 async def test_engine():
     """Create test database engine."""
@@ -56,8 +74,11 @@ async def client(test_session: AsyncSession) -> AsyncGenerator[AsyncClient, None
     
     async def override_get_db():
         yield test_session
+        await run_after_commit(test_session)
     
     app.dependency_overrides[get_db] = override_get_db
+    # Streamed responses reuse the test session as well
+    app.dependency_overrides[get_session_factory] = lambda: lambda: nullcontext(test_session)
     
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
@@ -66,6 +87,35 @@ async def client(test_session: AsyncSession) -> AsyncGenerator[AsyncClient, None
     app.dependency_overrides.clear()
 
 
+class QueryCounter:
+    """Collects SQL statements executed against an engine."""
+    
+    def __init__(self):
+        self.statements: list[str] = []
+        self.parameters: list = []
+    
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+        self.parameters.append(parameters)
+    
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+    
+    def reset(self) -> None:
+        self.statements.clear()
+        self.parameters.clear()
+
+
+@pytest.fixture
+def query_counter(test_engine) -> QueryCounter:
+    """Count SQL statements executed during a test."""
+    counter = QueryCounter()
+    event.listen(test_engine.sync_engine, "before_cursor_execute", counter)
+    yield counter
+    event.remove(test_engine.sync_engine, "before_cursor_execute", counter)
+
+
 @pytest.fixture
 async def admin_user(test_session: AsyncSession) -> User:
     """Create admin user for testing."""
@@ -1,8 +1,23 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from uuid import uuid4
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.models.user import User
-from .conftest import auth_header
+from app.models.refresh_token import RefreshToken
+from app.models.idempotency_key import IdempotencyKey
+from app.core.cache import TTLCache, TokenEpochTable, principal_cache
+from app.core.exceptions import ServiceUnavailableError
+from app.core.config import settings
+from app.core import security
+from app.core.security import PasswordHasher, get_password_hash, verify_password
+from app.services.maintenance import TokenReaper
+from .conftest import QueryCounter, auth_header
 
 
 @pytest.mark.asyncio
@@ -47,6 +62,113 @@ async def test_login_invalid_password(client: AsyncClient, admin_user: User):
     assert data["error"]["code"] == "AUTHENTICATION_ERROR"
 
 
+@pytest.mark.asyncio
+async def test_refresh_rotates_token(client: AsyncClient, admin_user: User):
+    """Test refresh issues a new refresh token and retires the old one."""
+    login_response = await client.post(
+        "/api/auth/login",
+        json={"email": "admin@test.com", "password": "admin123"},
+    )
+    old_refresh = login_response.json()["refresh_token"]
+    
+    response = await client.post("/api/auth/refresh", json={"refresh_token": old_refresh})
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["refresh_token"] != old_refresh
+    assert "access_token" in data
+    
+    response = await client.post(
+        "/api/auth/refresh",
+        json={"refresh_token": data["refresh_token"]},
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_reuse_revokes_family(client: AsyncClient, admin_user: User):
+    """Test presenting a retired refresh token revokes its whole family."""
+    login_response = await client.post(
+        "/api/auth/login",
+        json={"email": "admin@test.com", "password": "admin123"},
+    )
+    old_refresh = login_response.json()["refresh_token"]
+    response = await client.post("/api/auth/refresh", json={"refresh_token": old_refresh})
+    new_refresh = response.json()["refresh_token"]
+    
+    response = await client.post("/api/auth/refresh", json={"refresh_token": old_refresh})
+    assert response.status_code == 401
+    
+    response = await client.post("/api/auth/refresh", json={"refresh_token": new_refresh})
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_reuse_detected_after_revoked_retention(
+    client: AsyncClient,
+    test_engine,
+    test_session: AsyncSession,
+    admin_user: User,
+):
+    """Test a rotated token outlives the reaper's revoked retention."""
+    login_response = await client.post(
+        "/api/auth/login",
+        json={"email": "admin@test.com", "password": "admin123"},
+    )
+    old_refresh = login_response.json()["refresh_token"]
+    response = await client.post("/api/auth/refresh", json={"refresh_token": old_refresh})
+    new_refresh = response.json()["refresh_token"]
+    
+    # Age every token past the retention and reap
+    await test_session.execute(
+        update(RefreshToken).values(created_at=datetime.utcnow() - timedelta(days=3))
+    )
+    await test_session.commit()
+    reaper = TokenReaper(
+        async_sessionmaker(test_engine, expire_on_commit=False),
+        interval=60,
+        batch_size=100,
+        batch_pause=0,
+        revoked_retention=timedelta(days=1),
+    )
+    assert await reaper.run_once() == 0
+    
+    response = await client.post("/api/auth/refresh", json={"refresh_token": old_refresh})
+    assert response.status_code == 401
+    assert response.json()["error"]["message"] == "Refresh token has been revoked"
+    
+    response = await client.post("/api/auth/refresh", json={"refresh_token": new_refresh})
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_login_prunes_oldest_sessions(
+    client: AsyncClient,
+    admin_user: User,
+    test_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Test active sessions per user are capped by dropping the oldest."""
+    monkeypatch.setattr(settings, "MAX_ACTIVE_SESSIONS_PER_USER", 2)
+    refresh_tokens = []
+    for _ in range(3):
+        response = await client.post(
+            "/api/auth/login",
+            json={"email": "admin@test.com", "password": "admin123"},
+        )
+        refresh_tokens.append(response.json()["refresh_token"])
+    
+    result = await test_session.execute(
+        select(RefreshToken).where(RefreshToken.user_id == admin_user.id)
+    )
+    assert len(result.scalars().all()) == 2
+    
+    response = await client.post("/api/auth/refresh", json={"refresh_token": refresh_tokens[0]})
+    assert response.status_code == 401
+    response = await client.post("/api/auth/refresh", json={"refresh_token": refresh_tokens[2]})
+    assert response.status_code == 200
+
+
 @pytest.mark.asyncio
 async def test_get_current_user(client: AsyncClient, admin_user: User, admin_token: str):
     """Test get current user."""
@@ -61,6 +183,126 @@ async def test_get_current_user(client: AsyncClient, admin_user: User, admin_tok
     assert data["role"] == "admin"
 
 
+@pytest.mark.asyncio
+async def test_get_current_user_does_not_load_relationships(
+    client: AsyncClient,
+    admin_user: User,
+    admin_token: str,
+    query_counter: QueryCounter,
+):
+    """Test authenticated requests never touch the user's routes or tokens."""
+    await client.post(
+        "/api/auth/login",
+        json={"email": "admin@test.com", "password": "admin123"},
+    )
+    for i in range(3):
+        await client.post(
+            "/api/routes",
+            headers=auth_header(admin_token),
+            json={
+                "title": f"Route {i}",
+                "stops": [
+                    {"seq": 1, "type": "origin", "address": "Moscow, Russia"},
+                    {"seq": 2, "type": "destination", "address": "Saint Petersburg, Russia"},
+                ],
+            },
+        )
+    
+    principal_cache.clear()
+    query_counter.reset()
+    response = await client.get(
+        "/api/auth/me",
+        headers=auth_header(admin_token),
+    )
+    
+    assert response.status_code == 200
+    assert query_counter.count == 2
+    for statement in query_counter.statements:
+        assert "routes" not in statement
+        assert "refresh_tokens" not in statement
+
+
+@pytest.mark.asyncio
+async def test_cached_principal_skips_user_query(
+    client: AsyncClient,
+    admin_user: User,
+    admin_token: str,
+    query_counter: QueryCounter,
+):
+    """Test repeated requests authenticate from the principal cache."""
+    response = await client.get("/api/routes", headers=auth_header(admin_token))
+    assert response.status_code == 200
+    
+    query_counter.reset()
+    response = await client.get("/api/routes", headers=auth_header(admin_token))
+    
+    assert response.status_code == 200
+    assert not any("FROM users" in s for s in query_counter.statements)
+    assert principal_cache.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_access_token_claims_authorize_without_user_query(
+    client: AsyncClient,
+    admin_user: User,
+    query_counter: QueryCounter,
+):
+    """Test tokens carrying role and epoch skip the user lookup entirely."""
+    login_response = await client.post(
+        "/api/auth/login",
+        json={"email": "admin@test.com", "password": "admin123"},
+    )
+    token = login_response.json()["access_token"]
+    
+    response = await client.get("/api/routes", headers=auth_header(token))
+    assert response.status_code == 200
+    
+    query_counter.reset()
+    response = await client.get("/api/routes", headers=auth_header(token))
+    
+    assert response.status_code == 200
+    assert not any("FROM users" in s for s in query_counter.statements)
+    assert principal_cache.hits == 0
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Test the cache stays bounded and counts evictions."""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats() == {"size": 2, "hits": 3, "misses": 1, "evictions": 1}
+
+
+def test_ttl_cache_expires_entries():
+    """Test entries are dropped once their time to live has passed."""
+    cache = TTLCache(maxsize=10, ttl=0)
+    cache.set("a", 1)
+    
+    assert cache.get("a") is None
+    assert cache.evictions == 1
+
+
+
+def test_token_epoch_reload_keeps_newer_bumps():
+    """Test a reload that read older epochs does not undo a bump."""
+    table = TokenEpochTable(refresh_interval=60)
+    bumped, other = uuid4(), uuid4()
+    table.replace({other: 1})
+    table.set(bumped, 2)
+    
+    table.replace({other: 3})
+    table.set(bumped, 1)
+    
+    assert table.get(bumped) == 2
+    assert table.get(other) == 3
+
+
 @pytest.mark.asyncio
 async def test_get_current_user_no_token(client: AsyncClient):
     """Test get current user without token."""
@@ -116,3 +358,127 @@ async def test_change_password_wrong_current(client: AsyncClient, admin_user: Us
     )
     
     assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_password_hashing_keeps_event_loop_responsive(monkeypatch: pytest.MonkeyPatch):
+    """Test bcrypt runs on worker threads while other coroutines keep running."""
+    hasher = PasswordHasher(max_workers=4, max_pending=16)
+    hashed = get_password_hash("password")
+    threads = []
+    release = threading.Event()
+    
+    def blocking_verify(plain_password: str, hashed_password: str) -> bool:
+        threads.append(threading.current_thread().name)
+        release.wait(timeout=5)
+        return verify_password(plain_password, hashed_password)
+    
+    monkeypatch.setattr(security, "verify_password", blocking_verify)
+    ticks = 0
+    
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0)
+            ticks += 1
+    
+    async def workers_busy():
+        while len(threads) < 4:
+            await asyncio.sleep(0)
+    
+    task = asyncio.create_task(ticker())
+    verifications = asyncio.gather(*(hasher.verify("password", hashed) for _ in range(8)))
+    try:
+        await asyncio.wait_for(workers_busy(), timeout=5)
+        
+        # Every worker is stuck in bcrypt, yet the loop keeps running the ticker
+        ticks_before = ticks
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert ticks > ticks_before
+        assert not verifications.done()
+        assert hasher.pending == 8
+        release.set()
+        results = await verifications
+    finally:
+        release.set()
+        task.cancel()
+        hasher.shutdown()
+    
+    assert all(results)
+    assert len(threads) == 8
+    assert all(name.startswith("password-hasher") for name in threads)
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_rejects_when_saturated():
+    """Test password operations beyond the pending limit are rejected."""
+    hasher = PasswordHasher(max_workers=1, max_pending=1)
+    try:
+        first = asyncio.create_task(hasher.hash("password"))
+        await asyncio.sleep(0)
+        
+        with pytest.raises(ServiceUnavailableError):
+            await hasher.hash("password")
+        
+        assert (await first).startswith("$2b$")
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_token_reaper_deletes_expired_and_revoked_in_batches(
+    test_engine,
+    test_session: AsyncSession,
+    admin_user: User,
+):
+    """Test the reaper removes dead tokens and idempotency keys in batches."""
+    now = datetime.utcnow()
+    old = now - timedelta(days=3)
+    for i in range(5):
+        test_session.add(RefreshToken(
+            token_hash=f"expired-{i}", user_id=admin_user.id,
+            expires_at=now - timedelta(hours=1), created_at=old,
+        ))
+    test_session.add(RefreshToken(
+        token_hash="revoked-old", user_id=admin_user.id, is_revoked=True,
+        expires_at=now + timedelta(days=4), created_at=old,
+    ))
+    test_session.add(RefreshToken(
+        token_hash="revoked-recent", user_id=admin_user.id, is_revoked=True,
+        expires_at=now + timedelta(days=7), created_at=now,
+    ))
+    test_session.add(RefreshToken(
+        token_hash="live", user_id=admin_user.id,
+        expires_at=now + timedelta(days=7), created_at=now,
+    ))
+    test_session.add(RefreshToken(
+        token_hash="rotated-old", user_id=admin_user.id, is_revoked=True,
+        expires_at=now + timedelta(days=4), created_at=old, rotated_at=old,
+    ))
+    for key, expires_at in [("expired", now - timedelta(hours=1)), ("live", now + timedelta(hours=1))]:
+        test_session.add(IdempotencyKey(
+            user_id=admin_user.id, key=key, fingerprint="0" * 64,
+            status_code=201, body=b"{}", created_at=old, expires_at=expires_at,
+        ))
+    await test_session.commit()
+    
+    reaper = TokenReaper(
+        async_sessionmaker(test_engine, expire_on_commit=False),
+        interval=60,
+        batch_size=2,
+        batch_pause=0,
+        revoked_retention=timedelta(days=1),
+    )
+    removed = await reaper.run_once()
+    
+    assert removed == 7
+    assert reaper.stats()["runs"] == 1
+    assert reaper.stats()["rows_removed"] == 7
+    result = await test_session.execute(
+        select(RefreshToken.token_hash).order_by(RefreshToken.token_hash)
+    )
+    assert list(result.scalars()) == ["live", "revoked-recent", "rotated-old"]
+    result = await test_session.execute(select(IdempotencyKey.key))
+    assert list(result.scalars()) == ["live"]
+
@@ -0,0 +1,124 @@
+import asyncio
+import time
+import pytest
+from uuid import uuid4
+
+from app.core.response_cache import RedisCacheBackend, RouteCache
+
+
+class FakeRedis:
+    """Minimal RESP server supporting the commands used by the cache."""
+    
+    def __init__(self):
+        self.data: dict[bytes, tuple[bytes, float | None]] = {}
+    
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                args = await self._read_command(reader)
+                writer.write(self._execute(args))
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            writer.close()
+    
+    async def _read_command(self, reader: asyncio.StreamReader) -> list[bytes]:
+        count = int((await reader.readuntil(b"\r\n"))[1:-2])
+        args = []
+        for _ in range(count):
+            length = int((await reader.readuntil(b"\r\n"))[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+    
+    def _get(self, key: bytes) -> bytes | None:
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            return None
+        return value
+    
+    def _execute(self, args: list[bytes]) -> bytes:
+        command = args[0].upper()
+        if command == b"MGET":
+            values = [self._get(key) for key in args[1:]]
+            out = [b"*%d\r\n" % len(values)]
+            for value in values:
+                out.append(b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value))
+            return b"".join(out)
+        if command == b"SET":
+            expires_at = None
+            if len(args) == 5 and args[3].upper() == b"PX":
+                expires_at = time.monotonic() + int(args[4]) / 1000
+            self.data[args[1]] = (args[2], expires_at)
+            return b"+OK\r\n"
+        if command == b"DEL":
+            removed = sum(self.data.pop(key, None) is not None for key in args[1:])
+            return b":%d\r\n" % removed
+        return b"-ERR unknown command\r\n"
+
+
+@pytest.fixture
+async def fake_redis():
+    """Run a fake Redis server on a local port."""
+    fake = FakeRedis()
+    server = await asyncio.start_server(fake.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    fake.url = f"redis://127.0.0.1:{port}/0"
+    yield fake
+    server.close()
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_round_trip(fake_redis: FakeRedis):
+    """Test values survive the Redis protocol unchanged."""
+    backend = RedisCacheBackend(fake_redis.url)
+    
+    await backend.set("a", b"binary\r\nvalue", ttl=60)
+    assert await backend.get_many(["a", "missing"]) == [b"binary\r\nvalue", None]
+    
+    await backend.delete("a")
+    assert await backend.get_many(["a"]) == [None]
+    await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_route_cache_on_redis_backend(fake_redis: FakeRedis):
+    """Test stored responses are found until the route is invalidated."""
+    cache = RouteCache(RedisCacheBackend(fake_redis.url), ttl=60)
+    route_id = uuid4()
+    
+    key, cached = await cache.lookup_route(route_id)
+    assert cached is None
+    await cache.store(key, '"etag"', b'{"id": 1}')
+    
+    _, cached = await cache.lookup_route(route_id)
+    assert cached == ('"etag"', b'{"id": 1}')
+    
+    await cache.invalidate_route(route_id)
+    _, cached = await cache.lookup_route(route_id)
+    assert cached is None
+    assert cache.stats()["detail"] == {"hits": 1, "misses": 2, "hit_ratio": 1 / 3}
+
+
+@pytest.mark.asyncio
+async def test_list_cache_keys_ignore_parameter_order(fake_redis: FakeRedis):
+    """Test list entries are shared by equivalent filter sets."""
+    cache = RouteCache(RedisCacheBackend(fake_redis.url), ttl=60)
+    
+    key, _ = await cache.lookup_list({"limit": 20, "status": ["active", "draft"]})
+    await cache.store(key, '"etag"', b"[]")
+    
+    _, cached = await cache.lookup_list({"status": ["draft", "active"], "limit": 20})
+    assert cached == ('"etag"', b"[]")
+    
+    await cache.invalidate_route()
+    _, cached = await cache.lookup_list({"limit": 20, "status": ["active", "draft"]})
+    assert cached is None
+
+
+@pytest.mark.asyncio
+async def test_route_cache_degrades_when_backend_is_down():
+    """Test an unreachable backend behaves as a disabled cache."""
+    cache = RouteCache(RedisCacheBackend("redis://127.0.0.1:1/0", timeout=0.2), ttl=60)
+    
+    assert await cache.lookup_route(uuid4()) == (None, None)
+    await cache.store("key", '"etag"', b"{}")
+    await cache.invalidate_route(uuid4())
@@ -1,8 +1,53 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime
+from uuid import uuid4
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import event, select, func, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 
+from app.db.base import Base
 from app.models.user import User
-from .conftest import auth_header
+from app.models.route import Route
+from app.models.idempotency_key import IdempotencyKey
+from app.db.session import get_db
+from app.repositories.route import RouteRepository
+from app.schemas.auth import Principal
+from app.schemas.route import RouteCreate
+from app.services.route import RouteService
+from app.core.config import settings
+from app.core.response_cache import route_cache
+from app.services.maintenance import RouteStatsReconciler
+from app.services.route_stats import RouteStatsService
+from app.repositories.route_stats import RouteStatsRepository
+from app.models.route_stat import RouteStat
+from app.main import app
+from .conftest import QueryCounter, auth_header
+
+
+async def create_route(
+    client: AsyncClient,
+    token: str,
+    title: str = "Test Route",
+    destination: str = "Saint Petersburg, Russia",
+) -> dict:
+    """Create a two-stop route through the API."""
+    response = await client.post(
+        "/api/routes",
+        headers=auth_header(token),
+        json={
+            "title": title,
+            "stops": [
+                {"seq": 1, "type": "origin", "address": "Moscow, Russia"},
+                {"seq": 2, "type": "destination", "address": destination},
+            ],
+        },
+    )
+    assert response.status_code == 201
+    return response.json()
 
 
 @pytest.mark.asyncio
@@ -324,3 +369,1064 @@ async def test_update_route_stops(
     data = response.json()
     assert len(data["stops"]) == 3
     assert data["stops"][0]["address"] == "New Moscow, Russia"
+
+
+@pytest.mark.asyncio
+async def test_update_route_stops_diff(client: AsyncClient, dispatcher_token: str):
+    """Test moved stops keep their ids while edited, new and removed stops apply."""
+    route = await create_route(client, dispatcher_token)
+    await client.put(
+        f"/api/routes/{route['id']}/stops",
+        headers=auth_header(dispatcher_token),
+        json={"stops": [
+            {"seq": 1, "type": "origin", "address": "A"},
+            {"seq": 2, "type": "stop", "address": "B"},
+            {"seq": 3, "type": "stop", "address": "C"},
+            {"seq": 4, "type": "destination", "address": "D"},
+        ]},
+    )
+    response = await client.get(f"/api/routes/{route['id']}", headers=auth_header(dispatcher_token))
+    before = {stop["address"]: stop["id"] for stop in response.json()["stops"]}
+    
+    # C and B swap places, D gets a contact, X is inserted before D
+    response = await client.put(
+        f"/api/routes/{route['id']}/stops",
+        headers=auth_header(dispatcher_token),
+        json={"stops": [
+            {"seq": 1, "type": "origin", "address": "A"},
+            {"seq": 2, "type": "stop", "address": "C"},
+            {"seq": 3, "type": "stop", "address": "B"},
+            {"seq": 4, "type": "stop", "address": "X"},
+            {"seq": 5, "type": "destination", "address": "D", "contact_name": "Ivan"},
+        ]},
+    )
+    
+    assert response.status_code == 200
+    stops = response.json()["stops"]
+    assert [(s["seq"], s["address"]) for s in stops] == [(1, "A"), (2, "C"), (3, "B"), (4, "X"), (5, "D")]
+    assert [s["id"] for s in stops[:3]] == [before["A"], before["C"], before["B"]]
+    assert stops[3]["id"] not in before.values()
+    assert stops[4]["id"] == before["D"] and stops[4]["contact_name"] == "Ivan"
+
+
+@pytest.mark.asyncio
+async def test_update_long_route_stops_statement_count(
+    client: AsyncClient,
+    dispatcher_token: str,
+    query_counter: QueryCounter,
+):
+    """Test editing a 500-stop route runs a fixed number of statements."""
+    stops = [{"seq": 1, "type": "origin", "address": "Stop 1"}]
+    stops += [{"seq": i, "type": "stop", "address": f"Stop {i}"} for i in range(2, 500)]
+    stops += [{"seq": 500, "type": "destination", "address": "Stop 500"}]
+    response = await client.post(
+        "/api/routes",
+        headers=auth_header(dispatcher_token),
+        json={"title": "Long Route", "stops": stops},
+    )
+    route_id = response.json()["id"]
+    
+    # Insert a stop at seq 2, drop one in the middle and edit another
+    edited = [dict(stop) for stop in stops]
+    edited[100]["contact_phone"] = "+7 999 000 0000"
+    del edited[250]
+    edited.insert(1, {"seq": 0, "type": "stop", "address": "New stop"})
+    for seq, stop in enumerate(edited, start=1):
+        stop["seq"] = seq
+    
+    query_counter.reset()
+    response = await client.put(
+        f"/api/routes/{route_id}/stops",
+        headers=auth_header(dispatcher_token),
+        json={"stops": edited},
+    )
+    
+    assert response.status_code == 200
+    assert [s["address"] for s in response.json()["stops"]] == [s["address"] for s in edited]
+    assert response.json()["stops"][101]["contact_phone"] == "+7 999 000 0000"
+    # Load, delete, park, update, insert, reload and route version bump
+    writes = [s for s in query_counter.statements if s.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE"))]
+    assert len(writes) <= 5, writes
+    assert query_counter.count <= 12, query_counter.statements
+
+
+@pytest.mark.asyncio
+async def test_add_route_stop(
+    client: AsyncClient,
+    dispatcher_token: str,
+    query_counter: QueryCounter,
+):
+    """Test inserting a stop moves only the run of stops from its seq on."""
+    route = await create_route(client, dispatcher_token)
+    url = f"/api/routes/{route['id']}/stops"
+    await client.put(url, headers=auth_header(dispatcher_token), json={"stops": [
+        {"seq": 1, "type": "origin", "address": "A"},
+        {"seq": 2, "type": "stop", "address": "B"},
+        {"seq": 5, "type": "destination", "address": "E"},
+    ]})
+    
+    query_counter.reset()
+    response = await client.post(
+        url,
+        headers=auth_header(dispatcher_token),
+        json={"seq": 2, "type": "stop", "address": "X"},
+    )
+    
+    assert response.status_code == 201
+    stops = response.json()["stops"]
+    assert [(s["seq"], s["address"]) for s in stops] == [(1, "A"), (2, "X"), (3, "B"), (5, "E")]
+    shifts = [p for st, p in zip(query_counter.statements, query_counter.parameters) if st.startswith("UPDATE route_stops")]
+    assert len(shifts) == 2
+    assert shifts[0][-2:] == (2, 2)
+
+
+@pytest.mark.asyncio
+async def test_update_route_stop(client: AsyncClient, dispatcher_token: str):
+    """Test patching one stop changes its fields and moves it to a new seq."""
+    route = await create_route(client, dispatcher_token)
+    url = f"/api/routes/{route['id']}/stops"
+    response = await client.post(
+        url,
+        headers=auth_header(dispatcher_token),
+        json={"seq": 2, "type": "stop", "address": "Tver, Russia"},
+    )
+    origin, tver, destination = response.json()["stops"]
+    
+    response = await client.patch(
+        f"{url}/{tver['id']}",
+        headers=auth_header(dispatcher_token),
+        json={"contact_phone": "+7 999 000 0000"},
+    )
+    assert response.status_code == 200
+    stops = response.json()["stops"]
+    assert stops[1]["contact_phone"] == "+7 999 000 0000"
+    assert stops[0] == origin and stops[2] == destination
+    
+    # Moving the stop in front of the origin pushes only the origin back into the freed seq
+    response = await client.patch(
+        f"{url}/{tver['id']}",
+        headers=auth_header(dispatcher_token),
+        json={"seq": 1},
+    )
+    assert response.status_code == 200
+    assert [(s["seq"], s["id"]) for s in response.json()["stops"]] == [
+        (1, tver["id"]), (2, origin["id"]), (3, destination["id"]),
+    ]
+    
+    response = await client.patch(
+        f"{url}/{origin['id']}",
+        headers=auth_header(dispatcher_token),
+        json={"type": "stop"},
+    )
+    assert response.status_code == 400
+    
+    response = await client.patch(
+        f"{url}/{origin['id']}",
+        headers=auth_header(dispatcher_token),
+        json={"address": None},
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_delete_route_stop(client: AsyncClient, dispatcher_token: str):
+    """Test deleting stops keeps the origin/destination rules."""
+    route = await create_route(client, dispatcher_token)
+    url = f"/api/routes/{route['id']}/stops"
+    origin, destination = route["stops"]
+    
+    response = await client.delete(f"{url}/{destination['id']}", headers=auth_header(dispatcher_token))
+    assert response.status_code == 400
+    
+    response = await client.post(
+        url,
+        headers=auth_header(dispatcher_token),
+        json={"seq": 2, "type": "stop", "address": "Tver, Russia"},
+    )
+    tver = response.json()["stops"][1]
+    
+    response = await client.delete(f"{url}/{tver['id']}", headers=auth_header(dispatcher_token))
+    assert response.status_code == 200
+    assert [(s["seq"], s["id"]) for s in response.json()["stops"]] == [(1, origin["id"]), (3, destination["id"])]
+    
+    response = await client.delete(f"{url}/{tver['id']}", headers=auth_header(dispatcher_token))
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_list_routes_with_cursor(
+    client: AsyncClient,
+    dispatcher_user: User,
+    dispatcher_token: str,
+):
+    """Test walking route pages by cursor returns every route once."""
+    for i in range(5):
+        await create_route(client, dispatcher_token, f"Cursor Route {i}")
+    
+    response = await client.get(
+        "/api/routes?limit=100",
+        headers=auth_header(dispatcher_token),
+    )
+    expected = [item["id"] for item in response.json()["items"]]
+    
+    seen = []
+    url = "/api/routes?limit=2"
+    while True:
+        response = await client.get(url, headers=auth_header(dispatcher_token))
+        assert response.status_code == 200
+        data = response.json()
+        seen.extend(item["id"] for item in data["items"])
+        if data["next_cursor"] is None:
+            break
+        url = f"/api/routes?limit=2&cursor={data['next_cursor']}"
+    
+    assert seen == expected
+    assert len(seen) == 5
+
+
+@pytest.mark.asyncio
+async def test_list_routes_invalid_cursor(
+    client: AsyncClient,
+    dispatcher_user: User,
+    dispatcher_token: str,
+):
+    """Test a malformed cursor is rejected."""
+    response = await client.get(
+        "/api/routes?cursor=not-a-cursor",
+        headers=auth_header(dispatcher_token),
+    )
+    
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_list_routes_without_total(
+    client: AsyncClient,
+    dispatcher_user: User,
+    dispatcher_token: str,
+    query_counter: QueryCounter,
+):
+    """Test total=none skips the count query and reports has_more."""
+    await create_route(client, dispatcher_token, "First")
+    await create_route(client, dispatcher_token, "Second")
+    
+    query_counter.reset()
+    response = await client.get(
+        "/api/routes?limit=1&total=none",
+        headers=auth_header(dispatcher_token),
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] is None
+    assert data["has_more"] is True
+    assert len(data["items"]) == 1
+    assert not any("count(" in s.lower() for s in query_counter.statements)
+
+
+@pytest.mark.asyncio
+async def test_list_routes_estimated_total_is_cached(
+    client: AsyncClient,
+    dispatcher_user: User,
+    dispatcher_token: str,
+):
+    """Test total=estimate reuses a recent count for the same filters."""
+    await create_route(client, dispatcher_token, "First")
+    response = await client.get(
+        "/api/routes?total=estimate",
+        headers=auth_header(dispatcher_token),
+    )
+    assert response.json()["total"] == 1
+    
+    await create_route(client, dispatcher_token, "Second")
+    response = await client.get(
+        "/api/routes?total=estimate",
+        headers=auth_header(dispatcher_token),
+    )
+    assert response.json()["total"] == 1
+    
+    response = await client.get(
+        "/api/routes?total=exact",
+        headers=auth_header(dispatcher_token),
+    )
+    assert response.json()["total"] == 2
+
+
+@pytest.mark.asyncio
+async def test_search_routes_by_stop_address(
+    client: AsyncClient,
+    dispatcher_user: User,
+    dispatcher_token: str,
+):
+    """Test q also matches stop addresses."""
+    await create_route(client, dispatcher_token, "Northern line", destination="Murmansk, Russia")
+    await create_route(client, dispatcher_token, "Southern line", destination="Sochi, Russia")
+    
+    response = await client.get(
+        "/api/routes?q=murmansk",
+        headers=auth_header(dispatcher_token),
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 1
+    assert data["items"][0]["title"] == "Northern line"
+
+
+@pytest.mark.asyncio
+async def test_search_routes_by_relevance(
+    client: AsyncClient,
+    dispatcher_user: User,
+    dispatcher_token: str,
+):
+    """Test sort=relevance puts title matches before stop address matches."""
+    await create_route(client, dispatcher_token, "Kazan express")
+    await create_route(client, dispatcher_token, "Volga line", destination="Kazan, Russia")
+    
+    response = await client.get(
+        "/api/routes?q=kazan",
+        headers=auth_header(dispatcher_token),
+    )
+    assert [r["title"] for r in response.json()["items"]] == ["Volga line", "Kazan express"]
+    
+    response = await client.get(
+        "/api/routes?q=kazan&sort=relevance&limit=1",
+        headers=auth_header(dispatcher_token),
+    )
+    data = response.json()
+    assert [r["title"] for r in data["items"]] == ["Kazan express"]
+    assert data["has_more"] is True
+    assert data["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "filters",
+    [
+        "",
+        "status=draft",
+        "status=draft&status=active",
+        "created_by={user_id}",
+        "from=2020-01-01T00:00:00&to=2100-01-01T00:00:00",
+        "status=active&created_by={user_id}",
+        "status=draft&from=2020-01-01T00:00:00",
+        "created_by={user_id}&from=2020-01-01T00:00:00",
+    ],
+)
+async def test_list_routes_filters_use_indexes(
+    client: AsyncClient,
+    dispatcher_user: User,
+    dispatcher_token: str,
+    test_session: AsyncSession,
+    query_counter: QueryCounter,
+    filters: str,
+):
+    """Test every list filter combination is planned without a full table scan."""
+    await create_route(client, dispatcher_token)
+    
+    query_counter.reset()
+    response = await client.get(
+        f"/api/routes?{filters.format(user_id=dispatcher_user.id)}",
+        headers=auth_header(dispatcher_token),
+    )
+    assert response.status_code == 200
+    
+    executed = list(zip(query_counter.statements, query_counter.parameters))
+    connection = await test_session.connection()
+    for statement, parameters in executed:
+        result = await connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        plan = [row[-1] for row in result]
+        full_scans = [step for step in plan if step.startswith("SCAN ") and "USING" not in step]
+        assert not full_scans, f"{statement}\n{plan}"
+
+
+@pytest.mark.asyncio
+async def test_list_routes_summary_view(
+    client: AsyncClient,
+    dispatcher_user: User,
+    dispatcher_token: str,
+    query_counter: QueryCounter,
+):
+    """Test view=summary returns compact items from a single query."""
+    await create_route(client, dispatcher_token, "First", destination="Kazan, Russia")
+    await create_route(client, dispatcher_token, "Second")
+    
+    query_counter.reset()
+    response = await client.get(
+        "/api/routes?view=summary&total=none&limit=1",
+        headers=auth_header(dispatcher_token),
+    )
+    
+    assert response.status_code == 200
+    assert query_counter.count == 1
+    data = response.json()
+    assert data["next_cursor"] is not None
+    item = data["items"][0]
+    assert item["title"] == "Second"
+    assert item["stop_count"] == 2
+    assert item["origin_address"] == "Moscow, Russia"
+    assert item["destination_address"] == "Saint Petersburg, Russia"
+    assert "stops" not in item
+    assert "comment" not in item
+    
+    response = await client.get(
+        f"/api/routes?view=summary&cursor={data['next_cursor']}",
+        headers=auth_header(dispatcher_token),
+    )
+    item = response.json()["items"][0]
+    assert item["title"] == "First"
+    assert item["destination_address"] == "Kazan, Russia"
+
+
+@pytest.mark.asyncio
+async def test_get_route_conditional(
+    client: AsyncClient,
+    dispatcher_user: User,
+    dispatcher_token: str,
+    query_counter: QueryCounter,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Test route detail answers If-None-Match with 304 until the route changes."""
+    monkeypatch.setattr(route_cache, "detail_enabled", False)
+    route = await create_route(client, dispatcher_token)
+    url = f"/api/routes/{route['id']}"
+    
+    response = await client.get(url, headers=auth_header(dispatcher_token))
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "private, no-cache"
+    etag = response.headers["etag"]
+    
+    query_counter.reset()
+    headers = {**auth_header(dispatcher_token), "If-None-Match": etag}
+    response = await client.get(url, headers=headers)
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert query_counter.count == 1
+    
+    await client.put(
+        f"{url}/stops",
+        headers=auth_header(dispatcher_token),
+        json={
+            "stops": [
+                {"seq": 1, "type": "origin", "address": "Moscow, Russia"},
+                {"seq": 2, "type": "destination", "address": "Kazan, Russia"},
+            ],
+        },
+    )
+    response = await client.get(url, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_list_routes_conditional(
+    client: AsyncClient,
+    dispatcher_user: User,
+    dispatcher_token: str,
+):
+    """Test route list ETags follow the filters and the matching routes."""
+    await create_route(client, dispatcher_token)
+    
+    response = await client.get("/api/routes?status=draft", headers=auth_header(dispatcher_token))
+    etag = response.headers["etag"]
+    headers = {**auth_header(dispatcher_token), "If-None-Match": etag}
+    
+    response = await client.get("/api/routes?status=draft", headers=headers)
+    assert response.status_code == 304
+    
+    response = await client.get("/api/routes?status=active", headers=headers)
+    assert response.status_code == 200
+    
+    response = await client.get("/api/routes?view=summary", headers=auth_header(dispatcher_token))
+    summary_headers = {**auth_header(dispatcher_token), "If-None-Match": response.headers["etag"]}
+    response = await client.get("/api/routes?view=summary", headers=summary_headers)
+    assert response.status_code == 304
+    
+    await create_route(client, dispatcher_token, "Second")
+    response = await client.get("/api/routes?status=draft", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["total"] == 2
+
+
+@pytest.mark.asyncio
+async def test_get_route_served_from_cache(
+    client: AsyncClient,
+    dispatcher_user: User,
+    dispatcher_token: str,
+    query_counter: QueryCounter,
+):
+    """Test repeated route reads skip the database until the route changes."""
+    route = await create_route(client, dispatcher_token)
+    url = f"/api/routes/{route['id']}"
+    
+    first = await client.get(url, headers=auth_header(dispatcher_token))
+    query_counter.reset()
+    second = await client.get(url, headers=auth_header(dispatcher_token))
+    
+    assert query_counter.count == 0
+    assert second.json() == first.json()
+    assert second.headers["etag"] == first.headers["etag"]
+    assert route_cache.stats()["detail"]["hits"] == 1
+    
+    await client.patch(url, headers=auth_header(dispatcher_token), json={"title": "Renamed"})
+    response = await client.get(url, headers=auth_header(dispatcher_token))
+    assert response.json()["title"] == "Renamed"
+
+
+@pytest.mark.asyncio
+async def test_list_routes_cache_invalidated_by_writes(
+    client: AsyncClient,
+    dispatcher_user: User,
+    dispatcher_token: str,
+    admin_user: User,
+    admin_token: str,
+    query_counter: QueryCounter,
+):
+    """Test cached list pages follow route and creator changes."""
+    route = await create_route(client, dispatcher_token)
+    
+    await client.get("/api/routes", headers=auth_header(dispatcher_token))
+    query_counter.reset()
+    response = await client.get("/api/routes", headers=auth_header(dispatcher_token))
+    assert query_counter.count == 0
+    assert response.json()["total"] == 1
+    
+    await client.post(f"/api/routes/{route['id']}/cancel", headers=auth_header(dispatcher_token))
+    response = await client.get("/api/routes", headers=auth_header(dispatcher_token))
+    assert response.json()["items"][0]["status"] == "cancelled"
+    
+    await client.patch(
+        f"/api/users/{dispatcher_user.id}",
+        headers=auth_header(admin_token),
+        json={"full_name": "Renamed Dispatcher"},
+    )
+    response = await client.get("/api/routes", headers=auth_header(dispatcher_token))
+    assert response.json()["items"][0]["created_by_user"]["full_name"] == "Renamed Dispatcher"
+
+
+@pytest.mark.asyncio
+async def test_export_routes_ndjson(
+    client: AsyncClient,
+    dispatcher_user: User,
+    dispatcher_token: str,
+):
+    """Test NDJSON export streams one route per line with nested stops."""
+    await create_route(client, dispatcher_token, "First")
+    await create_route(client, dispatcher_token, "Second", destination="Kazan, Russia")
+    
+    response = await client.get(
+        "/api/routes/export?format=ndjson",
+        headers=auth_header(dispatcher_token),
+    )
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["title"] for r in lines] == ["Second", "First"]
+    assert lines[0]["created_by_name"] == dispatcher_user.full_name
+    assert [s["address"] for s in lines[0]["stops"]] == ["Moscow, Russia", "Kazan, Russia"]
+
+
+@pytest.mark.asyncio
+async def test_export_routes_csv_gzip(
+    client: AsyncClient,
+    dispatcher_user: User,
+    dispatcher_token: str,
+):
+    """Test CSV export has one row per stop and honours filters and gzip."""
+    route = await create_route(client, dispatcher_token, "First")
+    await create_route(client, dispatcher_token, "Second")
+    await client.post(f"/api/routes/{route['id']}/cancel", headers=auth_header(dispatcher_token))
+    
+    response = await client.get(
+        "/api/routes/export?format=csv&status=cancelled",
+        headers={**auth_header(dispatcher_token), "Accept-Encoding": "gzip"},
+    )
+    
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 2
+    assert {r["route_number"] for r in rows} == {route["route_number"]}
+    assert [r["stop_seq"] for r in rows] == ["1", "2"]
+    assert rows[0]["status"] == "cancelled"
+
+
+def import_item(title: str, route_number: str | None = None) -> dict:
+    """Build a route object for the bulk import endpoint."""
+    item = {
+        "title": title,
+        "stops": [
+            {"seq": 1, "type": "origin", "address": "Moscow, Russia"},
+            {"seq": 2, "type": "destination", "address": "Kazan, Russia"},
+        ],
+    }
+    if route_number:
+        item["route_number"] = route_number
+    return item
+
+
+@pytest.mark.asyncio
+async def test_import_routes_json(
+    client: AsyncClient,
+    dispatcher_token: str,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Test bulk import reports per-item results and creates valid routes."""
+    monkeypatch.setattr(settings, "ROUTE_IMPORT_BATCH_SIZE", 2)
+    existing = await create_route(client, dispatcher_token, "Existing")
+    
+    response = await client.post(
+        "/api/routes/bulk",
+        headers=auth_header(dispatcher_token),
+        json=[
+            import_item("First"),
+            {"title": "No stops", "stops": []},
+            import_item("Duplicate", route_number=existing["route_number"]),
+            import_item("Custom", route_number="CUSTOM-1"),
+            import_item("Last"),
+        ],
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["created"], data["failed"]) == (3, 2)
+    assert [item["ok"] for item in data["items"]] == [True, False, False, True, True]
+    assert data["items"][1]["errors"][0]["field"] == "stops"
+    assert data["items"][2]["errors"][0]["field"] == "route_number"
+    assert data["items"][3]["route_number"] == "CUSTOM-1"
+    numbers = {data["items"][i]["route_number"] for i in (0, 4)}
+    assert len(numbers) == 2 and existing["route_number"] not in numbers
+    
+    listed = await client.get("/api/routes", headers=auth_header(dispatcher_token))
+    assert listed.json()["total"] == 4
+    route = await client.get(
+        f"/api/routes/{data['items'][0]['id']}",
+        headers=auth_header(dispatcher_token),
+    )
+    assert [s["address"] for s in route.json()["stops"]] == ["Moscow, Russia", "Kazan, Russia"]
+
+
+@pytest.mark.asyncio
+async def test_import_routes_ndjson(client: AsyncClient, dispatcher_token: str):
+    """Test bulk import reads NDJSON and reports malformed lines."""
+    body = "\n".join([json.dumps(import_item("First")), "{not json", json.dumps(import_item("Second"))])
+    
+    response = await client.post(
+        "/api/routes/bulk",
+        headers={**auth_header(dispatcher_token), "Content-Type": "application/x-ndjson"},
+        content=body.encode(),
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["created"], data["failed"]) == (2, 1)
+    assert data["items"][1]["errors"][0]["message"].startswith("Invalid JSON")
+
+
+@pytest.mark.asyncio
+async def test_import_routes_forbidden_for_viewers(client: AsyncClient, viewer_token: str):
+    """Test viewers cannot import routes."""
+    response = await client.post(
+        "/api/routes/bulk",
+        headers=auth_header(viewer_token),
+        json=[import_item("First")],
+    )
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_route_numbers_unique_under_concurrent_creates(tmp_path, dispatcher_user: User):
+    """Test parallel creates in separate transactions never share a number."""
+    # A file database gives every session its own connection and transaction
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'routes.db'}",
+        connect_args={"timeout": 30},
+    )
+    
+    @event.listens_for(engine.sync_engine, "connect")
+    def skip_fsync(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA synchronous=OFF")
+    
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        session.add(User(**{c.key: getattr(dispatcher_user, c.key) for c in User.__table__.columns}))
+        await session.commit()
+    principal = Principal.model_validate(dispatcher_user)
+    data = RouteCreate.model_validate(import_item("Parallel"))
+    
+    async def create_one() -> str:
+        async with session_factory() as session:
+            route = await RouteService(session).create(data, principal)
+            await session.commit()
+            return route.route_number
+    
+    try:
+        numbers = await asyncio.gather(*(create_one() for _ in range(100)))
+        async with session_factory() as session:
+            await RouteService(session).create(
+                RouteCreate.model_validate(import_item("Explicit", route_number=numbers[0][:-4] + "0500")),
+                principal,
+            )
+            after_explicit = await RouteRepository(session).get_next_route_number()
+    finally:
+        await engine.dispose()
+    
+    assert len(set(numbers)) == 100
+    assert sorted(int(n.split("-")[-1]) for n in numbers) == list(range(1, 101))
+    assert after_explicit.endswith("-0501")
+
+
+@pytest.mark.asyncio
+async def test_route_numbers_continue_after_existing_routes(
+    client: AsyncClient,
+    test_session: AsyncSession,
+    dispatcher_user: User,
+    dispatcher_token: str,
+):
+    """Test an empty counter table starts after numbers already in use."""
+    year = datetime.utcnow().year
+    for number in (f"RT-{year}-0001", f"RT-{year}-0007", f"RT-{year}-x", f"RT-{year - 1}-0042"):
+        test_session.add(Route(route_number=number, title="Existing", created_by=dispatcher_user.id))
+    await test_session.flush()
+    
+    route = await create_route(client, dispatcher_token)
+    assert route["route_number"] == f"RT-{year}-0008"
+    
+    response = await client.post(
+        "/api/routes/bulk",
+        headers=auth_header(dispatcher_token),
+        json=[import_item("A"), import_item("B")],
+    )
+    assert [item["route_number"] for item in response.json()["items"]] == [
+        f"RT-{year}-0009", f"RT-{year}-0010",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_status_by_ids(client: AsyncClient, dispatcher_token: str):
+    """Test bulk status changes report invalid transitions and unknown ids."""
+    first = await create_route(client, dispatcher_token, "First")
+    second = await create_route(client, dispatcher_token, "Second")
+    cancelled = await create_route(client, dispatcher_token, "Cancelled")
+    await client.post(f"/api/routes/{cancelled['id']}/cancel", headers=auth_header(dispatcher_token))
+    missing = "00000000-0000-0000-0000-000000000001"
+    
+    response = await client.post(
+        "/api/routes/bulk-status",
+        headers=auth_header(dispatcher_token),
+        json={"status": "active", "ids": [first["id"], second["id"], cancelled["id"], missing]},
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["updated"], data["failed"]) == (2, 2)
+    outcomes = {item["id"]: item for item in data["items"]}
+    assert outcomes[first["id"]]["ok"] and outcomes[first["id"]]["previous_status"] == "draft"
+    assert outcomes[cancelled["id"]]["error"] == "Invalid status transition from cancelled to active"
+    assert outcomes[missing]["error"] == "Route not found"
+    
+    response = await client.get(f"/api/routes/{second['id']}", headers=auth_header(dispatcher_token))
+    assert response.json()["status"] == "active"
+
+
+@pytest.mark.asyncio
+async def test_bulk_status_by_filter_statement_count(
+    client: AsyncClient,
+    dispatcher_token: str,
+    query_counter: QueryCounter,
+):
+    """Test a filter-selected bulk status change runs the same statements for any size."""
+    
+    async def complete_all() -> dict:
+        await client.post(
+            "/api/routes/bulk-status",
+            headers=auth_header(dispatcher_token),
+            json={"status": "active", "filter": {"status": ["draft"]}},
+        )
+        query_counter.reset()
+        response = await client.post(
+            "/api/routes/bulk-status",
+            headers=auth_header(dispatcher_token),
+            json={"status": "completed", "filter": {"status": ["active"]}},
+        )
+        assert response.status_code == 200
+        return response.json()
+    
+    await create_route(client, dispatcher_token)
+    assert (await complete_all())["updated"] == 1
+    small = query_counter.count
+    
+    for i in range(10):
+        await create_route(client, dispatcher_token, f"Route {i}")
+    assert (await complete_all())["updated"] == 10
+    assert query_counter.count == small
+    
+    response = await client.post(
+        "/api/routes/bulk-status",
+        headers=auth_header(dispatcher_token),
+        json={"status": "active"},
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_write_endpoints_statement_counts(
+    client: AsyncClient,
+    dispatcher_token: str,
+    query_counter: QueryCounter,
+):
+    """Test route writes build responses without re-reading what they wrote."""
+    headers = auth_header(dispatcher_token)
+    # The year's first number also creates the counter row
+    await create_route(client, dispatcher_token, "First")
+    
+    query_counter.reset()
+    route = await create_route(client, dispatcher_token)
+    # Counter increment, route insert, stops insert and stats upsert; the creator
+    # is already in the shared test session, elsewhere it costs one lookup by id
+    assert [s.split()[0] for s in query_counter.statements] == ["UPDATE"] + ["INSERT"] * 3
+    assert route["created_by_user"] is not None and len(route["stops"]) == 2
+    
+    query_counter.reset()
+    response = await client.patch(f"/api/routes/{route['id']}", headers=headers, json={"title": "Renamed"})
+    assert response.json()["title"] == "Renamed"
+    # Route, creator and stops loads plus the update; stats are unchanged
+    assert query_counter.count == 4
+    
+    query_counter.reset()
+    response = await client.put(f"/api/routes/{route['id']}/stops", headers=headers, json={"stops": [
+        {"seq": 1, "type": "origin", "address": "Moscow, Russia"},
+        {"seq": 2, "type": "stop", "address": "Tver, Russia"},
+        {"seq": 3, "type": "destination", "address": "Saint Petersburg, Russia"},
+    ]})
+    assert [s["address"] for s in response.json()["stops"]] == [
+        "Moscow, Russia", "Tver, Russia", "Saint Petersburg, Russia",
+    ]
+    # Three loads, park, update, insert and the route version bump
+    assert query_counter.count == 7
+    
+    query_counter.reset()
+    response = await client.post(f"/api/routes/{route['id']}/cancel", headers=headers)
+    assert response.json()["status"] == "cancelled"
+    # Three loads, the update and the stats upsert
+    assert query_counter.count == 5
+    
+    response = await client.get(f"/api/routes/{route['id']}", headers=headers)
+    assert response.json()["status"] == "cancelled"
+    assert len(response.json()["stops"]) == 3
+
+
+@pytest.mark.asyncio
+async def test_create_route_idempotent_replay(
+    client: AsyncClient,
+    test_session: AsyncSession,
+    dispatcher_token: str,
+):
+    """Test a retried create returns the stored response without running again."""
+    headers = {**auth_header(dispatcher_token), "Idempotency-Key": "create-1"}
+    body = import_item("Retried")
+    
+    first = await client.post("/api/routes", headers=headers, json=body)
+    assert first.status_code == 201
+    assert "Idempotent-Replayed" not in first.headers
+    
+    second = await client.post("/api/routes", headers=headers, json=body)
+    assert second.status_code == 201
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert second.content == first.content
+    assert await test_session.scalar(select(func.count()).select_from(Route)) == 1
+    
+    # The same key with another body is rejected
+    other = await client.post("/api/routes", headers=headers, json=import_item("Other"))
+    assert other.status_code == 422
+    
+    # Once expired the key can be used again
+    await test_session.execute(update(IdempotencyKey).values(expires_at=datetime(2000, 1, 1)))
+    third = await client.post("/api/routes", headers=headers, json=body)
+    assert third.status_code == 201
+    assert "Idempotent-Replayed" not in third.headers
+    assert third.json()["id"] != first.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_idempotent_create_runs_once_under_concurrent_retries(
+    tmp_path,
+    client: AsyncClient,
+    dispatcher_user: User,
+    dispatcher_token: str,
+):
+    """Test simultaneous retries with one key create a single route.
+    
+    A failed request releases its key, so a later request may reuse it.
+    """
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'routes.db'}",
+        connect_args={"timeout": 30},
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        session.add(User(**{c.key: getattr(dispatcher_user, c.key) for c in User.__table__.columns}))
+        await session.commit()
+    
+    # Every request gets its own transaction, committed like get_db does
+    async def get_file_db():
+        async with session_factory() as session:
+            yield session
+            await session.commit()
+    
+    app.dependency_overrides[get_db] = get_file_db
+    headers = {**auth_header(dispatcher_token), "Idempotency-Key": "parallel"}
+    try:
+        missing = await client.post(f"/api/routes/{uuid4()}/cancel", headers=headers)
+        responses = await asyncio.gather(*(
+            client.post("/api/routes", headers=headers, json=import_item("Parallel"))
+            for _ in range(10)
+        ))
+        async with session_factory() as session:
+            routes = await session.scalar(select(func.count()).select_from(Route))
+    finally:
+        await engine.dispose()
+    
+    assert missing.status_code == 404
+    assert [r.status_code for r in responses] == [201] * 10
+    assert len({r.json()["id"] for r in responses}) == 1
+    assert sum("Idempotent-Replayed" in r.headers for r in responses) == 9
+    assert routes == 1
+
+
+@pytest.mark.asyncio
+async def test_route_stats_follow_writes(
+    client: AsyncClient,
+    test_engine,
+    test_session: AsyncSession,
+    dispatcher_user: User,
+    dispatcher_token: str,
+    query_counter: QueryCounter,
+):
+    """Test statistics kept up to date by writes match a full recount."""
+    headers = auth_header(dispatcher_token)
+    first = await create_route(client, dispatcher_token, "First")
+    second = await create_route(client, dispatcher_token, "Second")
+    await client.patch(f"/api/routes/{first['id']}", headers=headers, json={
+        "planned_departure_at": "2026-03-04T10:00:00",
+    })
+    await client.patch(f"/api/routes/{second['id']}", headers=headers, json={
+        "planned_departure_at": "2026-03-02T08:00:00",
+    })
+    await client.patch(f"/api/routes/{first['id']}", headers=headers, json={
+        "planned_departure_at": "2026-03-03T10:00:00",
+    })
+    await client.post(f"/api/routes/{second['id']}/cancel", headers=headers)
+    await client.post("/api/routes/bulk-status", headers=headers, json={"status": "active", "ids": [first["id"]]})
+    await client.post("/api/routes/bulk", headers=headers, json=[import_item("A"), import_item("B")])
+    
+    query_counter.reset()
+    response = await client.get("/api/routes/stats", headers=headers)
+    assert response.status_code == 200
+    assert not any("FROM routes" in statement for statement in query_counter.statements)
+    
+    stats = response.json()
+    today = datetime.utcnow().date().isoformat()
+    assert stats["total"] == 4
+    assert stats["by_status"] == {"draft": 2, "active": 1, "completed": 0, "cancelled": 1}
+    assert stats["by_creator"] == [
+        {"user_id": str(dispatcher_user.id), "full_name": "Test Dispatcher", "count": 4},
+    ]
+    assert stats["created"] == [{"start": today, "count": 4}]
+    assert stats["planned_departures"] == [
+        {"start": "2026-03-02", "count": 1},
+        {"start": "2026-03-03", "count": 1},
+    ]
+    
+    response = await client.get("/api/routes/stats?period=week&from=2026-03-01&to=2026-03-31", headers=headers)
+    assert response.json()["planned_departures"] == [{"start": "2026-03-02", "count": 2}]
+    assert response.json()["created"] == []
+    
+    # A recount finds nothing to correct
+    await test_session.commit()
+    reconciler = RouteStatsReconciler(async_sessionmaker(test_engine, expire_on_commit=False), interval=60)
+    assert await reconciler.run_once() == 0
+
+
+@pytest.mark.asyncio
+async def test_route_stats_reconciler_corrects_drift(
+    client: AsyncClient,
+    test_engine,
+    test_session: AsyncSession,
+    dispatcher_token: str,
+):
+    """Test the reconciler overwrites drifted and stray buckets."""
+    await create_route(client, dispatcher_token)
+    await test_session.execute(update(RouteStat).where(RouteStat.bucket == "draft").values(count=7))
+    test_session.add(RouteStat(dimension="departure_day", bucket="2020-01-01", count=3))
+    await test_session.commit()
+    
+    reconciler = RouteStatsReconciler(async_sessionmaker(test_engine, expire_on_commit=False), interval=60)
+    assert await reconciler.run_once() == 2
+    assert reconciler.stats()["buckets_corrected"] == 2
+    
+    response = await client.get("/api/routes/stats", headers=auth_header(dispatcher_token))
+    assert response.json()["by_status"]["draft"] == 1
+    assert response.json()["planned_departures"] == []
+
+
+@pytest.mark.asyncio
+async def test_route_write_completes_during_stats_reconcile(
+    tmp_path,
+    monkeypatch: pytest.MonkeyPatch,
+    dispatcher_user: User,
+):
+    """Test route writes are not blocked while the reconciler recounts routes."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'routes.db'}",
+        connect_args={"timeout": 30},
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        session.add(User(**{c.key: getattr(dispatcher_user, c.key) for c in User.__table__.columns}))
+        await session.commit()
+    principal = Principal.model_validate(dispatcher_user)
+    
+    async def create_one(title: str) -> None:
+        async with session_factory() as session:
+            await RouteService(session).create(RouteCreate.model_validate(import_item(title)), principal)
+            await session.commit()
+    
+    # Hold the reconciler between its full recount and the corrections
+    scanned = asyncio.Event()
+    resume = asyncio.Event()
+    count_routes = RouteStatsRepository.count_routes
+    
+    async def paused_count_routes(self, keys=None):
+        counts = await count_routes(self, keys)
+        if keys is None:
+            scanned.set()
+            await resume.wait()
+        return counts
+    
+    monkeypatch.setattr(RouteStatsRepository, "count_routes", paused_count_routes)
+    reconciler = RouteStatsReconciler(session_factory, interval=60)
+    try:
+        await create_one("Before")
+        reconcile = asyncio.create_task(reconciler.run_once())
+        await asyncio.wait_for(scanned.wait(), timeout=5)
+        await asyncio.wait_for(create_one("During"), timeout=5)
+        resume.set()
+        corrected = await asyncio.wait_for(reconcile, timeout=5)
+        async with session_factory() as session:
+            stats = await RouteStatsService(session).get_stats()
+    finally:
+        resume.set()
+        await engine.dispose()
+    
+    # The route written during the recount is not mistaken for drift
+    assert corrected == 0
+    assert stats.by_status["draft"] == 2
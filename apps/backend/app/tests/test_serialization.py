@@ -0,0 +1,91 @@
+import json
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core.responses import dump_json
+from app.models.route import RouteStatus
+from app.models.route_stop import StopType
+from app.models.user import UserRole
+from app.schemas.route import RouteListResponse, RouteResponse
+
+
+def make_page(routes: int = 100, stops: int = 20) -> list[SimpleNamespace]:
+    """Build ORM-like routes for serialization from attributes."""
+    now = datetime.utcnow()
+    user = SimpleNamespace(
+        id=uuid.uuid4(),
+        email="dispatcher@test.com",
+        full_name="Test Dispatcher",
+        role=UserRole.DISPATCHER,
+        is_active=True,
+        must_change_password=False,
+        created_at=now,
+        updated_at=now,
+    )
+    page = []
+    for i in range(routes):
+        route_id = uuid.uuid4()
+        page.append(SimpleNamespace(
+            id=route_id,
+            route_number=f"RT-2026-{i:04d}",
+            title=f"Route {i}",
+            status=RouteStatus.DRAFT,
+            created_by=user.id,
+            created_by_user=user,
+            planned_departure_at=datetime(2026, 1, 15, 8, tzinfo=timezone.utc),
+            comment="Express",
+            stops=[
+                SimpleNamespace(
+                    id=uuid.uuid4(),
+                    route_id=route_id,
+                    seq=seq,
+                    type=StopType.STOP,
+                    address=f"Address {seq}",
+                    lat=55.7558,
+                    lng=37.6173,
+                    time_window_from=now,
+                    time_window_to=None,
+                    contact_name="Ivan",
+                    contact_phone="+7 999 123 4567",
+                    created_at=now,
+                )
+                for seq in range(1, stops + 1)
+            ],
+            created_at=now,
+            updated_at=now,
+        ))
+    return page
+
+
+def build_list(page: list[SimpleNamespace]) -> RouteListResponse:
+    """Validate a page of routes into the list response."""
+    return RouteListResponse(
+        items=[RouteResponse.model_validate(route) for route in page],
+        total=len(page),
+        limit=len(page),
+        offset=0,
+    )
+
+
+@pytest.mark.asyncio
+async def test_route_page_direct_serialization_matches_response_model():
+    """Test direct serialization gives the same JSON as FastAPI's response_model path."""
+    page = make_page()
+    field = create_response_field(name="response", type_=RouteListResponse)
+    
+    async def response_model_path() -> bytes:
+        # What FastAPI does with a returned model: validate again, encode, json.dumps
+        content = await serialize_response(field=field, response_content=build_list(page), is_coroutine=True)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+    
+    def direct_path() -> bytes:
+        return dump_json(build_list(page))
+    
+    expected = await response_model_path()
+    assert json.loads(direct_path()) == json.loads(expected)
+
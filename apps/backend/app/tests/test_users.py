@@ -1,7 +1,14 @@
 import pytest
 from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.user import User
+from app.models.user import User, UserRole
+from app.core.cache import principal_cache, token_epochs
+from app.db.session import run_after_commit
+from app.repositories.user import UserRepository
+from app.schemas.auth import Principal
+from app.schemas.user import UserUpdate
+from app.services.user import UserService
 from .conftest import auth_header
 
 
@@ -104,6 +111,25 @@ async def test_list_users_as_admin(client: AsyncClient, admin_user: User, admin_
     assert len(data["items"]) >= 1
 
 
+@pytest.mark.asyncio
+async def test_list_users_without_total(
+    client: AsyncClient,
+    admin_user: User,
+    admin_token: str,
+    viewer_user: User,
+):
+    """Test users can be listed without computing the total."""
+    response = await client.get(
+        "/api/users?limit=1&total=none",
+        headers=auth_header(admin_token),
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] is None
+    assert data["has_more"] is True
+
+
 @pytest.mark.asyncio
 async def test_list_users_as_dispatcher_forbidden(
     client: AsyncClient,
@@ -171,3 +197,185 @@ async def test_deactivate_user(client: AsyncClient, admin_user: User, admin_toke
     
     assert response.status_code == 200
     assert response.json()["is_active"] is False
+
+
+@pytest.mark.asyncio
+async def test_deactivated_user_token_rejected(
+    client: AsyncClient,
+    admin_user: User,
+    admin_token: str,
+    viewer_user: User,
+    viewer_token: str,
+):
+    """Test deactivation takes effect for an already cached principal."""
+    response = await client.get("/api/auth/me", headers=auth_header(viewer_token))
+    assert response.status_code == 200
+    
+    response = await client.patch(
+        f"/api/users/{viewer_user.id}",
+        headers=auth_header(admin_token),
+        json={"is_active": False},
+    )
+    assert response.status_code == 200
+    
+    response = await client.get("/api/auth/me", headers=auth_header(viewer_token))
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_deactivation_drops_principal_cached_before_commit(
+    client: AsyncClient,
+    test_session: AsyncSession,
+    admin_user: User,
+    viewer_user: User,
+    viewer_token: str,
+):
+    """Test a principal cached between the flush and the commit is dropped."""
+    stale = await UserRepository(test_session).get_principal(viewer_user.id)
+    await UserService(test_session).update(
+        viewer_user.id,
+        UserUpdate(is_active=False),
+        Principal.model_validate(admin_user),
+    )
+    
+    # Another request reads the row before the change is committed
+    principal_cache.set(viewer_user.id, stale)
+    await test_session.commit()
+    await run_after_commit(test_session)
+    
+    response = await client.get("/api/auth/me", headers=auth_header(viewer_token))
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_role_change_keeps_access_tokens(
+    client: AsyncClient,
+    test_session: AsyncSession,
+    admin_user: User,
+    viewer_user: User,
+):
+    """Test a token epoch bump takes effect only once it is committed."""
+    login_response = await client.post(
+        "/api/auth/login",
+        json={"email": "viewer@test.com", "password": "viewer123"},
+    )
+    token = login_response.json()["access_token"]
+    viewer_id = viewer_user.id
+    
+    await UserService(test_session).update(
+        viewer_id,
+        UserUpdate(role=UserRole.DISPATCHER),
+        Principal.model_validate(admin_user),
+    )
+    assert token_epochs.get(viewer_id) == 0
+    
+    # What get_db does when the request fails
+    test_session.info.pop("after_commit", None)
+    await test_session.rollback()
+    
+    response = await client.get("/api/auth/me", headers=auth_header(token))
+    assert response.status_code == 200
+    assert token_epochs.get(viewer_id) == 0
+
+
+@pytest.mark.asyncio
+async def test_role_change_revokes_access_tokens(
+    client: AsyncClient,
+    admin_user: User,
+    admin_token: str,
+    viewer_user: User,
+):
+    """Test changing a role invalidates access tokens issued before."""
+    login_response = await client.post(
+        "/api/auth/login",
+        json={"email": "viewer@test.com", "password": "viewer123"},
+    )
+    old_token = login_response.json()["access_token"]
+    
+    response = await client.get("/api/auth/me", headers=auth_header(old_token))
+    assert response.status_code == 200
+    
+    response = await client.patch(
+        f"/api/users/{viewer_user.id}",
+        headers=auth_header(admin_token),
+        json={"role": "dispatcher"},
+    )
+    assert response.status_code == 200
+    
+    response = await client.get("/api/auth/me", headers=auth_header(old_token))
+    assert response.status_code == 401
+    
+    login_response = await client.post(
+        "/api/auth/login",
+        json={"email": "viewer@test.com", "password": "viewer123"},
+    )
+    new_token = login_response.json()["access_token"]
+    
+    response = await client.get("/api/auth/me", headers=auth_header(new_token))
+    assert response.status_code == 200
+    assert response.json()["role"] == "dispatcher"
+
+
+@pytest.mark.asyncio
+async def test_revoke_sessions_by_role(
+    client: AsyncClient,
+    admin_user: User,
+    admin_token: str,
+    dispatcher_user: User,
+    viewer_user: User,
+):
+    """Test admin can revoke sessions of every user with a role at once."""
+    sessions = {}
+    for email, password in (
+        ("dispatcher@test.com", "dispatcher123"),
+        ("viewer@test.com", "viewer123"),
+    ):
+        response = await client.post(
+            "/api/auth/login",
+            json={"email": email, "password": password},
+        )
+        sessions[email] = response.json()
+    
+    response = await client.post(
+        "/api/users/revoke-sessions",
+        headers=auth_header(admin_token),
+        json={"role": "dispatcher"},
+    )
+    
+    assert response.status_code == 200
+    assert response.json() == {"users_affected": 1, "revoked_count": 1}
+    
+    dispatcher = sessions["dispatcher@test.com"]
+    response = await client.get("/api/auth/me", headers=auth_header(dispatcher["access_token"]))
+    assert response.status_code == 401
+    response = await client.post(
+        "/api/auth/refresh",
+        json={"refresh_token": dispatcher["refresh_token"]},
+    )
+    assert response.status_code == 401
+    
+    viewer = sessions["viewer@test.com"]
+    response = await client.get("/api/auth/me", headers=auth_header(viewer["access_token"]))
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_revoke_sessions_requires_single_target(
+    client: AsyncClient,
+    admin_user: User,
+    admin_token: str,
+):
+    """Test revoke sessions rejects requests with both or no targets."""
+    response = await client.post(
+        "/api/users/revoke-sessions",
+        headers=auth_header(admin_token),
+        json={},
+    )
+    assert response.status_code == 422
+    
+    response = await client.post(
+        "/api/users/revoke-sessions",
+        headers=auth_header(admin_token),
+        json={"role": "viewer", "user_ids": [str(admin_user.id)]},
+    )
+    assert response.status_code == 422
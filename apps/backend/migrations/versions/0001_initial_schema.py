@@ -0,0 +1,95 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16 00:00:00
+
+Schema as created by Base.metadata.create_all before migrations were
+introduced. Databases created that way should be stamped with this
+revision (``alembic stamp 0001``) before upgrading.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('users',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('full_name', sa.String(length=255), nullable=False),
+    sa.Column('password_hash', sa.String(length=255), nullable=False),
+    sa.Column('role', sa.Enum('ADMIN', 'DISPATCHER', 'VIEWER', name='userrole'), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('must_change_password', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_users'))
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_table('refresh_tokens',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('token', sa.String(length=500), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('is_revoked', sa.Boolean(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name=op.f('fk_refresh_tokens_user_id_users'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_refresh_tokens'))
+    )
+    op.create_index(op.f('ix_refresh_tokens_token'), 'refresh_tokens', ['token'], unique=True)
+    op.create_table('routes',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('route_number', sa.String(length=50), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('status', sa.Enum('DRAFT', 'ACTIVE', 'COMPLETED', 'CANCELLED', name='routestatus'), nullable=False),
+    sa.Column('created_by', sa.UUID(), nullable=False),
+    sa.Column('planned_departure_at', sa.DateTime(), nullable=True),
+    sa.Column('comment', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], name=op.f('fk_routes_created_by_users')),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_routes'))
+    )
+    op.create_index(op.f('ix_routes_route_number'), 'routes', ['route_number'], unique=True)
+    op.create_index(op.f('ix_routes_status'), 'routes', ['status'], unique=False)
+    op.create_table('route_stops',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('route_id', sa.UUID(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('type', sa.Enum('ORIGIN', 'STOP', 'DESTINATION', name='stoptype'), nullable=False),
+    sa.Column('address', sa.Text(), nullable=False),
+    sa.Column('lat', sa.Numeric(precision=10, scale=8), nullable=True),
+    sa.Column('lng', sa.Numeric(precision=11, scale=8), nullable=True),
+    sa.Column('time_window_from', sa.DateTime(), nullable=True),
+    sa.Column('time_window_to', sa.DateTime(), nullable=True),
+    sa.Column('contact_name', sa.String(length=255), nullable=True),
+    sa.Column('contact_phone', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['route_id'], ['routes.id'], name=op.f('fk_route_stops_route_id_routes'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_route_stops')),
+    sa.UniqueConstraint('route_id', 'seq', name='uq_route_stops_route_seq')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('route_stops')
+    op.drop_index(op.f('ix_routes_status'), table_name='routes')
+    op.drop_index(op.f('ix_routes_route_number'), table_name='routes')
+    op.drop_table('routes')
+    op.drop_index(op.f('ix_refresh_tokens_token'), table_name='refresh_tokens')
+    op.drop_table('refresh_tokens')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    bind = op.get_bind()
+    for enum_name in ('stoptype', 'routestatus', 'userrole'):
+        sa.Enum(name=enum_name).drop(bind, checkfirst=True)
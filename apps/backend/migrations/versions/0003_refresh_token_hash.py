@@ -0,0 +1,76 @@
+"""store refresh tokens by sha-256 digest
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 00:00:00
+
+Replaces the 500-character ``token`` column and its unique index with a
+64-character ``token_hash``. Existing rows are backfilled with the
+digest of their token, so issued refresh tokens stay valid.
+
+"""
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+
+def upgrade() -> None:
+    op.add_column('refresh_tokens', sa.Column('token_hash', sa.String(length=64), nullable=True))
+
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute(
+            "UPDATE refresh_tokens "
+            "SET token_hash = encode(sha256(convert_to(token, 'UTF8')), 'hex')"
+        )
+    else:
+        tokens = sa.table(
+            'refresh_tokens',
+            sa.column('id'),
+            sa.column('token', sa.String),
+            sa.column('token_hash', sa.String),
+        )
+        while True:
+            rows = bind.execute(
+                sa.select(tokens.c.id, tokens.c.token)
+                .where(tokens.c.token_hash.is_(None))
+                .limit(BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            bind.execute(
+                tokens.update()
+                .where(tokens.c.id == sa.bindparam('row_id'))
+                .values(token_hash=sa.bindparam('digest')),
+                [
+                    {'row_id': row.id, 'digest': hashlib.sha256(row.token.encode()).hexdigest()}
+                    for row in rows
+                ],
+            )
+
+    with op.batch_alter_table('refresh_tokens') as batch_op:
+        batch_op.alter_column('token_hash', existing_type=sa.String(length=64), nullable=False)
+        batch_op.drop_index('ix_refresh_tokens_token')
+        batch_op.drop_column('token')
+        batch_op.create_index('ix_refresh_tokens_token_hash', ['token_hash'], unique=True)
+
+
+def downgrade() -> None:
+    # Digests cannot be turned back into tokens, so stored sessions are dropped
+    op.execute("DELETE FROM refresh_tokens")
+    with op.batch_alter_table('refresh_tokens') as batch_op:
+        batch_op.drop_index('ix_refresh_tokens_token_hash')
+        batch_op.drop_column('token_hash')
+        batch_op.add_column(sa.Column('token', sa.String(length=500), nullable=False))
+        batch_op.create_index('ix_refresh_tokens_token', ['token'], unique=True)
@@ -0,0 +1,40 @@
+"""refresh token families
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 00:00:00
+
+Existing tokens become single-member families.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('refresh_tokens', sa.Column('family_id', sa.UUID(), nullable=True))
+    op.execute("UPDATE refresh_tokens SET family_id = id")
+    with op.batch_alter_table('refresh_tokens') as batch_op:
+        batch_op.alter_column('family_id', existing_type=sa.UUID(), nullable=False)
+        batch_op.create_index('ix_refresh_tokens_family_id', ['family_id'], unique=False)
+        batch_op.create_index(
+            'ix_refresh_tokens_user_id_created_at',
+            ['user_id', 'created_at'],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('refresh_tokens') as batch_op:
+        batch_op.drop_index('ix_refresh_tokens_user_id_created_at')
+        batch_op.drop_index('ix_refresh_tokens_family_id')
+        batch_op.drop_column('family_id')
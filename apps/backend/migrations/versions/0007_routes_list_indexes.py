@@ -0,0 +1,64 @@
+"""routes list filter indexes
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPEN_ROUTES = sa.text("status IN ('DRAFT', 'ACTIVE')")
+
+
+def upgrade() -> None:
+    # Built without blocking writes; Postgres needs this outside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_routes_status_created_at_id',
+            'routes',
+            ['status', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_routes_created_by_created_at_id',
+            'routes',
+            ['created_by', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_routes_open_created_at_id',
+            'routes',
+            ['created_at', 'id'],
+            unique=False,
+            postgresql_where=OPEN_ROUTES,
+            sqlite_where=OPEN_ROUTES,
+            postgresql_concurrently=True,
+        )
+        # Leading column of ix_routes_status_created_at_id
+        op.drop_index('ix_routes_status', table_name='routes', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_routes_status',
+            'routes',
+            ['status'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index('ix_routes_open_created_at_id', table_name='routes', postgresql_concurrently=True)
+        op.drop_index('ix_routes_created_by_created_at_id', table_name='routes', postgresql_concurrently=True)
+        op.drop_index('ix_routes_status_created_at_id', table_name='routes', postgresql_concurrently=True)
@@ -0,0 +1,49 @@
+"""route number counters
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-16 00:00:00
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ROUTE_NUMBER_PATTERN = re.compile(r"RT-(\d{4})-(\d+)")
+
+
+def upgrade() -> None:
+    counters = op.create_table(
+        'route_number_counters',
+        sa.Column('year', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('last_value', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('year'),
+    )
+    
+    # Start every year after the highest number already in use
+    highest: dict[int, int] = {}
+    rows = op.get_bind().execute(
+        sa.text("SELECT route_number FROM routes WHERE route_number LIKE 'RT-%'")
+    )
+    for (route_number,) in rows:
+        match = ROUTE_NUMBER_PATTERN.fullmatch(route_number)
+        if match:
+            year, num = int(match.group(1)), int(match.group(2))
+            highest[year] = max(highest.get(year, 0), num)
+    if highest:
+        op.bulk_insert(counters, [
+            {'year': year, 'last_value': num} for year, num in highest.items()
+        ])
+
+
+def downgrade() -> None:
+    op.drop_table('route_number_counters')
@@ -0,0 +1,54 @@
+"""route stats
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 00:00:00
+
+"""
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    stats = op.create_table(
+        'route_stats',
+        sa.Column('dimension', sa.String(length=20), nullable=False),
+        sa.Column('bucket', sa.String(length=64), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('dimension', 'bucket', name=op.f('pk_route_stats')),
+    )
+    
+    # Seed the totals from existing routes; bucket names match RouteStatsRepository
+    groups = [
+        ('status', "LOWER(CAST(status AS VARCHAR))", lambda value: value),
+        ('creator', "created_by", lambda value: str(uuid.UUID(str(value)))),
+        ('created_day', "CAST(DATE(created_at) AS VARCHAR)", lambda value: value),
+        ('departure_day', "CAST(DATE(planned_departure_at) AS VARCHAR)", lambda value: value),
+    ]
+    bind = op.get_bind()
+    rows = []
+    for dimension, expression, to_bucket in groups:
+        result = bind.execute(sa.text(
+            f"SELECT {expression}, COUNT(*) FROM routes "
+            f"WHERE {expression} IS NOT NULL GROUP BY {expression}"
+        ))
+        rows.extend(
+            {'dimension': dimension, 'bucket': to_bucket(value), 'count': count}
+            for value, count in result
+        )
+    if rows:
+        op.bulk_insert(stats, rows)
+
+
+def downgrade() -> None:
+    op.drop_table('route_stats')
@@ -19,6 +19,25 @@ apiClient.interceptors.request.use((config) => {
   return config
 })
 
+// Refresh tokens are single-use, so concurrent 401s share one refresh call
+let refreshPromise: Promise<string> | null = null
+
+const refreshAccessToken = (refreshToken: string): Promise<string> => {
+  if (!refreshPromise) {
+    refreshPromise = axios
+      .post(`${API_URL}/auth/refresh`, { refresh_token: refreshToken })
+      .then((response) => {
+        const { access_token, refresh_token } = response.data
+        useAuthStore.getState().setTokens(access_token, refresh_token)
+        return access_token as string
+      })
+      .finally(() => {
+        refreshPromise = null
+      })
+  }
+  return refreshPromise
+}
+
 // Response interceptor to handle token refresh
 apiClient.interceptors.response.use(
   (response) => response,
@@ -31,12 +50,7 @@ apiClient.interceptors.response.use(
       try {
         const refreshToken = useAuthStore.getState().refreshToken
         if (refreshToken) {
-          const response = await axios.post(`${API_URL}/auth/refresh`, {
-            refresh_token: refreshToken,
-          })
-          
-          const { access_token } = response.data
-          useAuthStore.getState().setAccessToken(access_token)
+          const access_token = await refreshAccessToken(refreshToken)
           
           originalRequest.headers.Authorization = `Bearer ${access_token}`
           return apiClient(originalRequest)
@@ -1,6 +1,7 @@
 import apiClient from './client'
 import {
   Route,
+  RouteSummary,
   RouteCreate,
   RouteUpdate,
   StopsUpdate,
@@ -16,6 +17,13 @@ export const routesApi = {
     return response.data
   },
 
+  listSummary: async (filters?: RouteFilters): Promise<PaginatedResponse<RouteSummary>> => {
+    const response = await apiClient.get<PaginatedResponse<RouteSummary>>('/routes', {
+      params: { ...filters, view: 'summary' },
+    })
+    return response.data
+  },
+
   get: async (id: string): Promise<Route> => {
     const response = await apiClient.get<Route>(`/routes/${id}`)
     return response.data
@@ -88,6 +88,20 @@ export interface Route {
   updated_at: string
 }
 
+export interface RouteSummary {
+  id: string
+  route_number: string
+  title: string
+  status: RouteStatus
+  created_by: string
+  planned_departure_at?: string | null
+  stop_count: number
+  origin_address: string | null
+  destination_address: string | null
+  created_at: string
+  updated_at: string
+}
+
 export interface RouteCreate {
   route_number?: string | null
   title: string
@@ -9,6 +9,13 @@ export function useRoutes(filters?: RouteFilters) {
   })
 }
 
+export function useRouteSummaries(filters?: RouteFilters) {
+  return useQuery({
+    queryKey: ['routes', 'summary', filters],
+    queryFn: () => routesApi.listSummary(filters),
+  })
+}
+
 export function useRoute(id: string) {
   return useQuery({
     queryKey: ['routes', id],
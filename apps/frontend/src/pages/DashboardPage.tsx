@@ -1,12 +1,12 @@
 import { Link } from 'react-router-dom'
 import { Route, CheckCircle, XCircle, Clock, Plus } from 'lucide-react'
-import { useRoutes } from '../hooks/useRoutes'
+import { useRouteSummaries } from '../hooks/useRoutes'
 import { useAuthStore } from '../store/auth'
 import { LoadingSpinner, StatusBadge } from '../components'
 
 export default function DashboardPage() {
   const { user } = useAuthStore()
-  const { data: allRoutes, isLoading } = useRoutes({ limit: 100 })
+  const { data: allRoutes, isLoading } = useRouteSummaries({ limit: 100 })
   
   const stats = {
     total: allRoutes?.total || 0,
@@ -130,7 +130,7 @@ export default function DashboardPage() {
                     <StatusBadge status={route.status} />
                   </td>
                   <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
-                    {route.stops.length} ост.
+                    {route.stop_count} ост.
                   </td>
                 </tr>
               ))}
@@ -9,6 +9,7 @@ interface AuthState {
   isAuthenticated: boolean
   setAuth: (user: User, accessToken: string, refreshToken: string) => void
   setAccessToken: (accessToken: string) => void
+  setTokens: (accessToken: string, refreshToken: string) => void
   setUser: (user: User) => void
   logout: () => void
 }
@@ -34,6 +35,12 @@ export const useAuthStore = create<AuthState>()(
           accessToken,
         }),
 
+      setTokens: (accessToken, refreshToken) =>
+        set({
+          accessToken,
+          refreshToken,
+        }),
+
       setUser: (user) =>
         set({
           user,